@@ -0,0 +1,124 @@
+"""
+Prediction Interval Latency Benchmark
+
+Measures what model-based confidence ranges add to serving: for each batch
+size, the point prediction alone against the point prediction plus the
+interval (one call to the bundle's multi-quantile booster, as in
+/predict and /predict/batch). Also reports the interval's coverage and
+width on the test split, next to the fixed ±10% range it replaces.
+
+Usage:
+    cd MHD/benchmarks
+    python bench_intervals.py --model-dir ../models --data-dir ../data/processed
+
+Rows come from the processed test split, so the numbers include realistic
+trees paths; times are medians over --repeats calls after a warm-up call.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+MHD_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(MHD_ROOT / 'src' / 'training'))
+sys.path.insert(0, str(MHD_ROOT))
+
+from bundle import BUNDLE_FILENAME  # noqa: E402
+from train_model import load_training_data  # noqa: E402
+from src.serving.app import confidence_ranges  # noqa: E402
+from src.serving.registry import ModelVersion  # noqa: E402
+
+
+def _median_ms(fn, repeats: int) -> float:
+    fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def bench_batch(model: ModelVersion, X: np.ndarray, repeats: int) -> dict:
+    """Time point-only and point + interval scoring of one batch."""
+    def point():
+        return model.predict(X)
+
+    def point_and_interval():
+        return confidence_ranges(model, X, model.predict(X).astype(float).tolist())
+
+    point_ms = _median_ms(point, repeats)
+    interval_ms = _median_ms(point_and_interval, repeats)
+    return {
+        'batch_size': len(X),
+        'point_ms': point_ms,
+        'point_interval_ms': interval_ms,
+        'overhead_pct': (interval_ms / point_ms - 1) * 100,
+        'interval_us_per_row': (interval_ms - point_ms) * 1000 / len(X),
+    }
+
+
+def interval_quality(model: ModelVersion, X: np.ndarray, y: np.ndarray) -> dict:
+    """Coverage and mean width of the served range against the fixed ±10% range."""
+    prices = model.predict(X).astype(float)
+    served = confidence_ranges(model, X, prices.tolist())
+    low = np.array([r['low'] for r in served])
+    high = np.array([r['high'] for r in served])
+    return {
+        'level': served[0].get('level'),
+        'coverage': float(np.mean((y >= low) & (y <= high))),
+        'mean_width': float(np.mean(high - low)),
+        'fixed_coverage': float(np.mean((y >= prices * 0.90) & (y <= prices * 1.10))),
+        'fixed_mean_width': float(np.mean(prices * 0.20)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark prediction interval latency')
+    parser.add_argument('--model-dir', type=str, default=str(MHD_ROOT / 'models'),
+                        help='Directory containing model.bundle')
+    parser.add_argument('--data-dir', type=str, default=str(MHD_ROOT / 'data' / 'processed'),
+                        help='Directory with processed data (test split is used)')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 10, 100, 1000],
+                        help='Batch sizes to time')
+    parser.add_argument('--repeats', type=int, default=200,
+                        help='Timed calls per batch size')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Optional JSON results path')
+
+    args = parser.parse_args()
+
+    model = ModelVersion(Path(args.model_dir) / BUNDLE_FILENAME)
+    if not model.quantiles:
+        sys.exit(f"Model {model.version} has no quantile booster (train with --quantiles)")
+    _, X_test, _, y_test, _ = load_training_data(args.data_dir, load_train=False)
+    X = np.ascontiguousarray(X_test, dtype=np.float32)
+    y = y_test.to_numpy(dtype=np.float64)
+
+    results = [bench_batch(model, X[:size], args.repeats)
+               for size in args.batch_sizes if size <= len(X)]
+    quality = interval_quality(model, X, y)
+
+    print(f"\nModel {model.version}, quantiles {model.quantiles}")
+    print(f"{'batch':>6} {'point':>10} {'+interval':>10} {'overhead':>9} {'per row':>10}")
+    for r in results:
+        print(f"{r['batch_size']:>6} {r['point_ms']:>8.3f}ms {r['point_interval_ms']:>8.3f}ms "
+              f"{r['overhead_pct']:>8.0f}% {r['interval_us_per_row']:>8.1f}us")
+    print(f"\n{quality['level']:.0%} interval: coverage {quality['coverage']:.1%}, "
+          f"mean width ${quality['mean_width']:,.0f}")
+    print(f"Fixed ±10%:    coverage {quality['fixed_coverage']:.1%}, "
+          f"mean width ${quality['fixed_mean_width']:,.0f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'model_version': model.version, 'latency': results, 'quality': quality},
+                      f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Model Artifact Load Benchmark
+
+Re-exports a trained model bundle in each artifact format and compares file
+size, load time and time to first prediction. Serving cold start and model
+reload both pay the load cost, so run this when changing the artifact format.
+
+Formats:
+    joblib        pickled XGBRegressor (the previous model.joblib)
+    json          XGBoost JSON model
+    ubj           XGBoost UBJSON model (the previous model.xgb)
+    bundle        model.bundle read and fully materialized (training reader)
+    bundle-mmap   model.bundle memory-mapped, booster materialized on first use
+                  (serving reader)
+
+Usage:
+    cd MHD/benchmarks
+    python bench_model_load.py --model-dir ../models --repeats 20
+
+Files are read from the page cache after the first repeat, so load times
+are warm-cache numbers; the first repeat is reported separately.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import xgboost as xgb
+
+MHD_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(MHD_ROOT / 'src' / 'training'))
+sys.path.insert(0, str(MHD_ROOT))
+
+from bundle import BUNDLE_FILENAME, load_bundle, write_bundle  # noqa: E402
+from src.serving.bundle import ModelBundle  # noqa: E402
+
+
+def export_formats(bundle_path: Path, work_dir: Path) -> dict:
+    """Write the bundle's main booster in every format; returns name -> path."""
+    bundle = load_bundle(bundle_path)
+    booster = bundle['boosters']['main']
+    regressor = xgb.XGBRegressor(**bundle['metadata'].get('params', {}))
+    regressor.load_model(bytearray(booster.save_raw('ubj')))
+
+    paths = {
+        'joblib': work_dir / 'model.joblib',
+        'json': work_dir / 'model.json',
+        'ubj': work_dir / 'model.ubj',
+        'bundle': work_dir / BUNDLE_FILENAME,
+    }
+    joblib.dump(regressor, paths['joblib'])
+    booster.save_model(paths['json'])
+    booster.save_model(paths['ubj'])
+    write_bundle(paths['bundle'], bundle['boosters'], bundle['feature_spec'], bundle['metadata'])
+    paths['bundle-mmap'] = paths['bundle']
+    return paths
+
+
+def _load_booster(fmt: str, path: Path):
+    """Load one format and return something with a booster to predict with."""
+    if fmt == 'joblib':
+        return joblib.load(path).get_booster()
+    if fmt in ('json', 'ubj'):
+        booster = xgb.Booster()
+        booster.load_model(path)
+        return booster
+    if fmt == 'bundle':
+        return load_bundle(path)['boosters']['main']
+    return ModelBundle(path).booster('main')
+
+
+def bench_format(fmt: str, path: Path, row: np.ndarray, repeats: int) -> dict:
+    """Time load and load + first prediction for one format."""
+    load_times, first_predict_times = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        if fmt == 'bundle-mmap':
+            # Opening maps the file and parses the header only
+            bundle = ModelBundle(path)
+            loaded = time.perf_counter()
+            booster = bundle.booster('main')
+        else:
+            booster = _load_booster(fmt, path)
+            loaded = time.perf_counter()
+        booster.inplace_predict(row)
+        done = time.perf_counter()
+        load_times.append(loaded - start)
+        first_predict_times.append(done - start)
+
+    return {
+        'format': fmt,
+        'size_bytes': path.stat().st_size,
+        'first_load_ms': load_times[0] * 1000,
+        'load_ms_median': statistics.median(load_times) * 1000,
+        'first_prediction_ms_median': statistics.median(first_predict_times) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark model artifact load times')
+    parser.add_argument('--model-dir', type=str, default=str(MHD_ROOT / 'models'),
+                        help='Directory containing model.bundle')
+    parser.add_argument('--repeats', type=int, default=20,
+                        help='Loads per format')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Optional JSON results path')
+
+    args = parser.parse_args()
+
+    bundle_path = Path(args.model_dir) / BUNDLE_FILENAME
+    n_features = len(load_bundle(bundle_path)['feature_spec']['feature_columns'])
+    row = np.zeros((1, n_features), dtype=np.float32)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        paths = export_formats(bundle_path, Path(work_dir))
+        results = [bench_format(fmt, path, row, args.repeats) for fmt, path in paths.items()]
+
+    print(f"\n{'format':<12} {'size':>10} {'first load':>11} {'load p50':>10} {'load+predict p50':>17}")
+    for r in results:
+        print(f"{r['format']:<12} {r['size_bytes'] / 1024:>8.0f}KB {r['first_load_ms']:>9.2f}ms "
+              f"{r['load_ms_median']:>8.2f}ms {r['first_prediction_ms_median']:>15.2f}ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
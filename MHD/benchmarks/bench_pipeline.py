@@ -0,0 +1,433 @@
+"""
+End-to-End Pipeline Benchmark
+
+Times and memory-profiles every pipeline step at several dataset sizes:
+
+    generate            generate_memphis_housing_data, written to the raw CSV
+    prepare             prepare_data (prepare_data_streaming above --stream-above)
+    train               load_training_data + train_xgboost
+    save                save_model (model bundle)
+    evaluate            generate_evaluation_report (streaming above --stream-above)
+    serving_load        the service's load_model
+    serving_transform   engineer_features, one request at a time
+    serving_predict     the loaded model's predict, one request at a time
+    serving_batch       engineer_features + predict per --batch-size batch
+    serving_comparables comparables index query, one request at a time
+
+Each size runs in a fresh worker process, so a step's peak RSS is not
+inflated by a larger size that ran before it. For every step the history
+keeps wall and CPU time, peak RSS, RSS growth over the step and rows/sec,
+plus the sub-stage times the step's own StageProfiler records; the serving
+steps add latency percentiles per call (per request, or per batch). CPU time
+and RSS are the worker's own, so streaming evaluation's shard processes are
+not included.
+
+Every run is appended to a JSON history. Each step is compared with the
+most recent earlier run of the same size and flagged as a regression when
+its wall time or RSS growth rises by more than --threshold and by more than
+a noise floor (--min-seconds, --min-rss-mb). Compare runs from the same
+machine: the host is recorded and a change is reported.
+
+Everything runs offline: the steps are called directly rather than through
+the MLflow wrappers, and MLFLOW_TRACKING_URI points into the work directory
+so nothing can reach a tracking server.
+
+Usage:
+    cd MHD/benchmarks
+    python bench_pipeline.py --sizes 5k 100k
+    python bench_pipeline.py --sizes 5k 100k 1m 10m --fail-on-regression
+
+Generating data is a per-row Python loop (about 4 minutes per million rows),
+so the 1m and 10m sizes are long runs meant for a dedicated machine; data is
+generated --generate-chunk rows at a time to keep memory bounded.
+"""
+
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+MHD_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(MHD_ROOT / 'src' / 'training'))
+sys.path.insert(0, str(MHD_ROOT))
+
+from profiling import StageProfiler, current_rss_bytes  # noqa: E402
+
+DEFAULT_SIZES = ['5k', '100k', '1m', '10m']
+DEFAULT_HISTORY = Path(__file__).resolve().parent / 'results' / 'history.json'
+
+# Measures compared between runs, with the option holding each one's noise floor
+COMPARED = {'wall_s': 'min_seconds', 'rss_growth_mb': 'min_rss_mb'}
+
+
+def parse_size(value: str) -> int:
+    """Row count from '5000', '5k', '1m' or '1.5m'."""
+    multipliers = {'k': 1_000, 'm': 1_000_000}
+    value = value.strip().lower()
+    if value[-1:] in multipliers:
+        return int(float(value[:-1]) * multipliers[value[-1]])
+    return int(value)
+
+
+# --- worker -------------------------------------------------------------
+
+@contextmanager
+def _step(profiler: StageProfiler, steps: dict, name: str):
+    """Profile one step and record it (with RSS growth) under steps[name]."""
+    gc.collect()
+    rss_start = current_rss_bytes()
+    with profiler.stage(name) as info:
+        yield info
+    entry = dict(profiler.stages[-1])
+    del entry['stage']
+    entry['rss_growth_mb'] = entry['peak_rss_mb'] - rss_start / 2**20
+    for key in ('sub_profile', 'latency_us'):
+        if key in info:
+            entry[key] = info[key]
+    steps[name] = entry
+
+
+def _sub_stages(sub_profiler: StageProfiler) -> dict:
+    return {s['stage']: s['wall_s'] for s in sub_profiler.stages}
+
+
+def _latency_percentiles(seconds: list) -> dict:
+    values = np.asarray(seconds) * 1e6
+    return {'p50': float(np.percentile(values, 50)), 'p99': float(np.percentile(values, 99)),
+            'mean': float(values.mean())}
+
+
+def _serving_requests(raw_path: Path, n_requests: int) -> list:
+    """Valid request bodies taken from the raw data."""
+    import pandas as pd
+    from pydantic import ValidationError
+    from src.serving.app import HousingFeatures
+
+    fields = list(HousingFeatures.model_fields)
+    rows = pd.read_csv(raw_path, nrows=n_requests * 2, usecols=fields).to_dict('records')
+    requests = []
+    for row in rows:
+        try:
+            requests.append(HousingFeatures(**row))
+        except ValidationError:
+            continue
+        if len(requests) == n_requests:
+            break
+    return requests
+
+
+def bench_size(n_rows: int, work_dir: str, options: dict) -> dict:
+    """
+    Run every pipeline step on n_rows generated rows (in a worker process).
+
+    Returns:
+        Dictionary with 'rows', 'steps' (step -> measurements) and the
+        trained model's test metrics
+    """
+    os.environ['MLFLOW_TRACKING_URI'] = (Path(work_dir) / 'mlruns').as_uri()
+
+    from comparables import copy_index
+    from evaluate import generate_evaluation_report
+    from generate_data import generate_memphis_housing_data
+    from prep_data import prepare_data, prepare_data_streaming
+    from train_model import load_feature_spec, load_training_data, save_model, train_xgboost
+    from src.serving import app as serving
+
+    work_dir = Path(work_dir)
+    raw_path = work_dir / 'raw' / 'memphis_housing.csv'
+    processed_dir = work_dir / 'processed'
+    model_dir = work_dir / 'models'
+    reports_dir = work_dir / 'reports'
+    raw_path.parent.mkdir(parents=True, exist_ok=True)
+    streaming = n_rows > options['stream_above']
+
+    profiler = StageProfiler('bench')
+    steps = {}
+    with open(work_dir / 'bench.log', 'w') as log, redirect_stdout(log):
+        with _step(profiler, steps, 'generate') as step:
+            written = chunk = 0
+            while written < n_rows:
+                size = min(options['generate_chunk'], n_rows - written)
+                df = generate_memphis_housing_data(size, seed=options['seed'] + chunk)
+                df.to_csv(raw_path, mode='a' if written else 'w', header=not written, index=False)
+                written += size
+                chunk += 1
+            del df
+            step['rows'] = n_rows
+
+        with _step(profiler, steps, 'prepare') as step:
+            sub = StageProfiler('prepare')
+            if streaming:
+                prepare_data_streaming(str(raw_path), str(processed_dir), seed=options['seed'],
+                                       chunksize=options['chunksize'], profiler=sub)
+            else:
+                prepare_data(str(raw_path), str(processed_dir), seed=options['seed'], profiler=sub)
+            step['rows'] = n_rows
+            step['sub_profile'] = _sub_stages(sub)
+
+        with _step(profiler, steps, 'train') as step:
+            sub = StageProfiler('train')
+            X_train, X_test, y_train, y_test, feature_cols = load_training_data(str(processed_dir))
+            model, metrics = train_xgboost(X_train, y_train, X_test, y_test,
+                                           nthread=options['nthread'], profiler=sub)
+            step['rows'] = len(X_train)
+            step['sub_profile'] = _sub_stages(sub)
+        del X_train, X_test, y_train, y_test
+
+        with _step(profiler, steps, 'save'):
+            save_model(model, str(model_dir), feature_cols, metrics,
+                       feature_spec=load_feature_spec(str(processed_dir)))
+            copy_index(processed_dir, model_dir)
+        del model
+
+        with _step(profiler, steps, 'evaluate') as step:
+            sub = StageProfiler('evaluate')
+            report = generate_evaluation_report(str(model_dir), str(processed_dir), str(reports_dir),
+                                                profiler=sub, streaming=streaming,
+                                                n_jobs=options['n_jobs'])
+            step['rows'] = report['test_samples']
+            step['sub_profile'] = _sub_stages(sub)
+
+        with _step(profiler, steps, 'serving_load'):
+            serving.load_model(str(model_dir / 'model.bundle'))
+            served = serving.registry.get()
+        requests = _serving_requests(raw_path, options['serving_requests'])
+
+        with _step(profiler, steps, 'serving_transform') as step:
+            rows, latencies = [], []
+            for features in requests:
+                start = time.perf_counter()
+                rows.append(serving.engineer_features(features, served))
+                latencies.append(time.perf_counter() - start)
+            step['rows'] = len(requests)
+            step['latency_us'] = _latency_percentiles(latencies)
+
+        with _step(profiler, steps, 'serving_predict') as step:
+            latencies = []
+            for X in rows:
+                start = time.perf_counter()
+                served.predict(X)
+                latencies.append(time.perf_counter() - start)
+            step['rows'] = len(rows)
+            step['latency_us'] = _latency_percentiles(latencies)
+
+        with _step(profiler, steps, 'serving_batch') as step:
+            latencies = []
+            for i in range(0, len(requests), options['batch_size']):
+                start = time.perf_counter()
+                X = np.vstack([serving.engineer_features(f, served)
+                               for f in requests[i:i + options['batch_size']]])
+                served.predict(X)
+                latencies.append(time.perf_counter() - start)
+            step['rows'] = len(requests)
+            step['latency_us'] = _latency_percentiles(latencies)
+
+        with _step(profiler, steps, 'serving_comparables') as step:
+            latencies = []
+            for features in requests:
+                start = time.perf_counter()
+                serving.comparables_index.query([features.model_dump()])
+                latencies.append(time.perf_counter() - start)
+            step['rows'] = len(requests)
+            step['latency_us'] = _latency_percentiles(latencies)
+
+    return {
+        'rows': n_rows,
+        'streaming': streaming,
+        'steps': steps,
+        'test_metrics': {k: metrics[k] for k in ('test_rmse', 'test_mae', 'test_r2')},
+    }
+
+
+# --- history ------------------------------------------------------------
+
+def host_info() -> dict:
+    import pandas as pd
+    import xgboost as xgb
+
+    return {
+        'machine': platform.node(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'xgboost': xgb.__version__,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=MHD_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path: Path) -> list:
+    if not path.exists():
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def find_regressions(run: dict, history: list, threshold: float, floors: dict) -> list:
+    """
+    Compare each step with the latest earlier run of the same size.
+
+    Args:
+        threshold: Relative increase that counts as a regression (0.2 = 20%)
+        floors: Measure -> minimum absolute increase to report
+
+    Returns:
+        List of regressions (size, step, measure, previous, current, change_pct)
+    """
+    regressions = []
+    for size, result in run['sizes'].items():
+        previous = next((r for r in reversed(history) if size in r['sizes']), None)
+        if previous is None:
+            continue
+        for step, entry in result['steps'].items():
+            before = previous['sizes'][size]['steps'].get(step)
+            if not before:
+                continue
+            for measure, floor in floors.items():
+                old, new = before.get(measure), entry.get(measure)
+                if old is None or new is None:
+                    continue
+                if new - old > floor and new > old * (1 + threshold):
+                    regressions.append({
+                        'size': size,
+                        'step': step,
+                        'measure': measure,
+                        'previous': old,
+                        'current': new,
+                        'change_pct': (new / old - 1) * 100 if old > 0 else None,
+                        'previous_run': previous['timestamp'],
+                    })
+    return regressions
+
+
+def print_result(size: str, result: dict) -> None:
+    print(f"\n{size} rows ({'streaming' if result['streaming'] else 'in memory'}), "
+          f"test RMSE ${result['test_metrics']['test_rmse']:,.0f}")
+    print(f"  {'step':<19} {'wall':>9} {'cpu':>9} {'peak RSS':>10} {'RSS growth':>11} "
+          f"{'rows/s':>12} {'p50/p99 latency':>18}")
+    for step, entry in result['steps'].items():
+        rate = f"{entry['rows_per_s']:>12,.0f}" if entry['rows_per_s'] else f"{'-':>12}"
+        latency = (f"{entry['latency_us']['p50']:>7.0f}/{entry['latency_us']['p99']:.0f}us"
+                   if 'latency_us' in entry else '')
+        print(f"  {step:<19} {entry['wall_s']:>8.2f}s {entry['cpu_s']:>8.2f}s "
+              f"{entry['peak_rss_mb']:>7.0f}MiB {entry['rss_growth_mb']:>8.0f}MiB {rate} {latency:>18}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the pipeline end to end at several sizes')
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES,
+                        help='Dataset sizes in rows (e.g. 5k 100k 1m 10m)')
+    parser.add_argument('--history', type=str, default=str(DEFAULT_HISTORY),
+                        help='JSON history file that runs are appended to')
+    parser.add_argument('--label', type=str, default=None,
+                        help='Free-form note stored with the run')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Relative increase over the last run flagged as a regression')
+    parser.add_argument('--min-seconds', type=float, default=0.05,
+                        help='Ignore wall time increases smaller than this')
+    parser.add_argument('--min-rss-mb', type=float, default=32,
+                        help='Ignore RSS growth increases smaller than this')
+    parser.add_argument('--stream-above', type=int, default=1_000_000,
+                        help='Use streaming prep and evaluation above this many rows')
+    parser.add_argument('--chunksize', type=int, default=500_000,
+                        help='Rows per chunk for streaming prep')
+    parser.add_argument('--generate-chunk', type=int, default=1_000_000,
+                        help='Rows generated per call')
+    parser.add_argument('--serving-requests', type=int, default=1000,
+                        help='Requests timed in the serving steps')
+    parser.add_argument('--batch-size', type=int, default=100,
+                        help='Rows per batch in the serving_batch step')
+    parser.add_argument('--nthread', type=int, default=None,
+                        help='Training threads (default: all cores)')
+    parser.add_argument('--n-jobs', type=int, default=None,
+                        help='Streaming evaluation workers (default: all cores)')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='Data generation and split seed')
+    parser.add_argument('--work-dir', type=str, default=None,
+                        help='Keep generated data, models and logs here (default: a temp dir, removed)')
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help='Exit non-zero when a regression is flagged')
+
+    args = parser.parse_args()
+    options = {
+        'stream_above': args.stream_above,
+        'chunksize': args.chunksize,
+        'generate_chunk': args.generate_chunk,
+        'serving_requests': args.serving_requests,
+        'batch_size': args.batch_size,
+        'nthread': args.nthread,
+        'n_jobs': args.n_jobs,
+        'seed': args.seed,
+    }
+    floors = {measure: getattr(args, option) for measure, option in COMPARED.items()}
+
+    root = Path(args.work_dir) if args.work_dir else Path(tempfile.mkdtemp(prefix='mhd-bench-'))
+    run = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'label': args.label,
+        'commit': git_commit(),
+        'host': host_info(),
+        'options': options,
+        'sizes': {},
+    }
+    try:
+        for size in args.sizes:
+            n_rows = parse_size(size)
+            work_dir = root / str(n_rows)
+            work_dir.mkdir(parents=True, exist_ok=True)
+            print(f"Benchmarking {n_rows:,} rows (log: {work_dir / 'bench.log'})...")
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                result = executor.submit(bench_size, n_rows, str(work_dir), options).result()
+            run['sizes'][str(n_rows)] = result
+            print_result(f"{n_rows:,}", result)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(root, ignore_errors=True)
+
+    history_path = Path(args.history)
+    history = load_history(history_path)
+    if history and history[-1]['host'] != run['host']:
+        print("\nWarning: host differs from the previous run; comparisons may not be meaningful")
+    run['regressions'] = find_regressions(run, history, args.threshold, floors)
+
+    history_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(history_path, 'w') as f:
+        json.dump(history + [run], f, indent=2)
+    print(f"\nRun appended to {history_path} ({len(history) + 1} runs)")
+
+    if run['regressions']:
+        print(f"\nRegressions vs. the previous run (>{args.threshold:.0%}):")
+        for r in run['regressions']:
+            change = f"+{r['change_pct']:.0f}%" if r['change_pct'] is not None else 'new'
+            print(f"  {int(r['size']):>12,} rows  {r['step']:<19} {r['measure']:<14} "
+                  f"{r['previous']:.3f} -> {r['current']:.3f} ({change})")
+        if args.fail_on_regression:
+            sys.exit(1)
+    else:
+        print("\nNo regressions")
+
+
+if __name__ == '__main__':
+    main()
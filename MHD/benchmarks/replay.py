@@ -0,0 +1,390 @@
+"""
+Traffic Replay for the Prediction Service
+
+Replays captured traffic against the serving app and reports latency per
+endpoint, and checks the predictions against a baseline. Use it to validate
+model or engine changes under the real mix of single and batch calls and the
+real burstiness, rather than a synthetic load.
+
+Inputs (files or directories, mixed freely):
+    capture-*.parquet   segments written by the service's request capture
+                        (src/serving/capture.py); rows are regrouped into
+                        requests by request_id
+    *.ndjson            one request per line:
+                        {"timestamp": 1718000000.25, "endpoint": "/predict",
+                         "body": {...}, "predictions": [245000.0]}
+                        timestamp (seconds) and predictions are optional
+
+Timing (--speed):
+    original   keep the captured inter-arrival times
+    <factor>   accelerate them, e.g. 10 replays ten times faster
+    max        send as fast as possible, --concurrency requests in flight
+
+Target:
+    by default the app runs in-process (httpx ASGI transport, no server or
+    network) with the bundle given by --model, or the one the service would
+    load; --url replays against a running instance instead.
+
+Baseline: by default each response is compared with the prediction captured
+alongside the request, rounded to the nearest $1,000 like the API's
+responses. --save-baseline writes this run's predictions, and --baseline
+compares with a saved run instead (same inputs, so requests line up by
+position). A prediction matches when it is within --tolerance (relative)
+or --abs-tolerance (dollars) of the baseline.
+
+Usage:
+    cd MHD/benchmarks
+    python replay.py /captures --speed 10 --output replay.json
+    python replay.py /captures --speed max --concurrency 32 --url http://localhost:8000
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+import pyarrow.parquet as pq
+
+MHD_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(MHD_ROOT))
+
+from src.serving.capture import FEATURE_FIELDS, SEGMENT_GLOB  # noqa: E402
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+# --- loading ------------------------------------------------------------
+
+def _expand(paths: list) -> list:
+    """Files named directly, plus capture segments and NDJSON files in directories."""
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(path.glob(SEGMENT_GLOB)) + sorted(path.glob('*.ndjson')))
+        else:
+            files.append(path)
+    return files
+
+
+def _capture_requests(path: Path) -> list:
+    """Rebuild requests from one capture segment (one row per scored property)."""
+    table = pq.read_table(path).sort_by([('timestamp', 'ascending'), ('request_id', 'ascending'),
+                                        ('row', 'ascending')])
+    columns = table.to_pydict()
+    names = [name for name, _ in FEATURE_FIELDS]
+
+    requests = []
+    current = None
+    for i, request_id in enumerate(columns['request_id']):
+        if current is None or current['id'] != request_id:
+            current = {
+                'id': request_id,
+                'timestamp': columns['timestamp'][i].timestamp(),
+                'endpoint': columns['endpoint'][i],
+                'properties': [],
+                'predictions': [],
+            }
+            requests.append(current)
+        current['properties'].append({name: columns[name][i] for name in names})
+        current['predictions'].append(columns['predicted_price'][i])
+
+    for request in requests:
+        properties = request.pop('properties')
+        request['body'] = (properties[0] if request['endpoint'] == '/predict'
+                           else {'properties': properties})
+        # The API rounds its responses to the nearest $1,000
+        request['predictions'] = [round(p, -3) for p in request.pop('predictions')]
+        del request['id']
+    return requests
+
+
+def _ndjson_requests(path: Path) -> list:
+    requests = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                requests.append({
+                    'timestamp': record.get('timestamp'),
+                    'endpoint': record['endpoint'],
+                    'body': record['body'],
+                    'predictions': record.get('predictions'),
+                })
+    return requests
+
+
+def load_requests(paths: list) -> list:
+    """
+    Read requests from capture segments and NDJSON files.
+
+    Returns:
+        Requests ({'timestamp', 'endpoint', 'body', 'predictions'}) in arrival
+        order; requests without a timestamp keep their file order
+    """
+    requests = []
+    for path in _expand(paths):
+        if path.suffix == '.parquet':
+            requests.extend(_capture_requests(path))
+        else:
+            requests.extend(_ndjson_requests(path))
+
+    if requests and all(r['timestamp'] is not None for r in requests):
+        requests.sort(key=lambda r: r['timestamp'])
+    return requests
+
+
+# --- replay -------------------------------------------------------------
+
+def _offsets(requests: list, speed) -> list:
+    """Send time of each request in seconds after the start; None means no pacing."""
+    if speed is None or not requests or any(r['timestamp'] is None for r in requests):
+        return [None] * len(requests)
+    first = requests[0]['timestamp']
+    return [(r['timestamp'] - first) / speed for r in requests]
+
+
+async def _send(client: httpx.AsyncClient, request: dict) -> dict:
+    started = time.perf_counter()
+    try:
+        response = await client.post(request['endpoint'], json=request['body'])
+        latency = time.perf_counter() - started
+        if response.status_code != 200:
+            return {'latency': latency, 'error': f'HTTP {response.status_code}'}
+        payload = response.json()
+        predictions = [p['predicted_price'] for p in payload.get('predictions', [payload])]
+        return {'latency': latency, 'predictions': predictions}
+    except httpx.HTTPError as e:
+        return {'latency': time.perf_counter() - started, 'error': type(e).__name__}
+
+
+async def replay(client: httpx.AsyncClient, requests: list, speed=None,
+                 concurrency: int = 16) -> tuple:
+    """
+    Send the requests, paced by their timestamps or as fast as allowed.
+
+    Args:
+        speed: Time acceleration factor (1.0 = original timing); None for max rate
+        concurrency: Requests in flight at most (max rate only; paced replay
+            sends each request at its time regardless)
+
+    Returns:
+        (results in request order, wall-clock seconds)
+    """
+    offsets = _offsets(requests, speed)
+    paced = offsets[0] is not None if offsets else False
+    semaphore = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+
+    async def run(request, offset):
+        if paced:
+            due = start + offset
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # How late the request went out (the replayer falling behind)
+            lag = max(0.0, time.perf_counter() - due)
+            result = await _send(client, request)
+            result['lag'] = lag
+            return result
+        async with semaphore:
+            return await _send(client, request)
+
+    results = await asyncio.gather(*(run(r, o) for r, o in zip(requests, offsets)))
+    return results, time.perf_counter() - start
+
+
+# --- reporting ----------------------------------------------------------
+
+def latency_summary(requests: list, results: list) -> dict:
+    """Request counts, errors and latency percentiles (ms) per endpoint."""
+    by_endpoint = {}
+    for request, result in zip(requests, results):
+        by_endpoint.setdefault(request['endpoint'], []).append(result)
+
+    summary = {}
+    for endpoint, endpoint_results in sorted(by_endpoint.items()):
+        latencies = np.array([r['latency'] for r in endpoint_results if 'error' not in r]) * 1000
+        stats = {'requests': len(endpoint_results),
+                 'errors': sum('error' in r for r in endpoint_results)}
+        if len(latencies):
+            stats.update({f'p{q}_ms': float(np.percentile(latencies, q)) for q in PERCENTILES})
+            stats['max_ms'] = float(latencies.max())
+            stats['mean_ms'] = float(latencies.mean())
+        summary[endpoint] = stats
+    return summary
+
+
+def compare_predictions(baseline: list, results: list, tolerance: float = 0.01,
+                        abs_tolerance: float = 0.0, max_examples: int = 10) -> dict:
+    """
+    Check replayed predictions against the baseline.
+
+    Args:
+        baseline: Expected predictions per request (None where there is none)
+        results: Replay results in the same order
+        tolerance: Allowed relative difference
+        abs_tolerance: Allowed absolute difference (dollars)
+
+    Returns:
+        Dictionary with compared, mismatched and skipped counts, the largest
+        differences and a few example mismatches
+    """
+    compared = mismatched = skipped = 0
+    max_abs = max_rel = 0.0
+    examples = []
+    for index, (expected, result) in enumerate(zip(baseline, results)):
+        actual = result.get('predictions')
+        if expected is None or actual is None or len(expected) != len(actual):
+            skipped += 1
+            continue
+        expected = np.asarray(expected, dtype=np.float64)
+        actual = np.asarray(actual, dtype=np.float64)
+        diff = np.abs(actual - expected)
+        rel = diff / np.maximum(np.abs(expected), 1.0)
+        bad = (diff > abs_tolerance) & (rel > tolerance)
+
+        compared += len(expected)
+        mismatched += int(bad.sum())
+        max_abs = max(max_abs, float(diff.max(initial=0)))
+        max_rel = max(max_rel, float(rel.max(initial=0)))
+        for row in np.flatnonzero(bad)[:max(0, max_examples - len(examples))]:
+            examples.append({'request': index, 'row': int(row),
+                             'expected': float(expected[row]), 'actual': float(actual[row])})
+
+    return {
+        'compared': compared,
+        'mismatched': mismatched,
+        'skipped_requests': skipped,
+        'max_abs_diff': max_abs,
+        'max_rel_diff': max_rel,
+        'tolerance': tolerance,
+        'abs_tolerance': abs_tolerance,
+        'examples': examples,
+    }
+
+
+def _in_process_client(model_path: str = None) -> httpx.AsyncClient:
+    """Client for the serving app in this process, with its model loaded."""
+    from src.serving import app as serving
+
+    serving.load_model(model_path)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=serving.app),
+                             base_url='http://replay')
+
+
+def _parse_speed(value: str):
+    if value == 'max':
+        return None
+    if value == 'original':
+        return 1.0
+    speed = float(value)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError('speed must be positive')
+    return speed
+
+
+async def _run(args, requests: list) -> tuple:
+    client = (httpx.AsyncClient(base_url=args.url, timeout=args.timeout) if args.url
+              else _in_process_client(args.model))
+    async with client:
+        return await replay(client, requests, args.speed, args.concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay captured traffic against the prediction service')
+    parser.add_argument('inputs', nargs='+',
+                        help='Capture segments, NDJSON files, or directories of them')
+    parser.add_argument('--speed', type=_parse_speed, default=None,
+                        help="'original', an acceleration factor, or 'max' (default)")
+    parser.add_argument('--concurrency', type=int, default=16,
+                        help='Requests in flight at max rate')
+    parser.add_argument('--url', type=str, default=None,
+                        help='Replay against a running instance instead of in-process')
+    parser.add_argument('--model', type=str, default=None,
+                        help='Model bundle for the in-process app')
+    parser.add_argument('--timeout', type=float, default=30.0,
+                        help='Per-request timeout in seconds (--url only)')
+    parser.add_argument('--limit', type=int, default=None,
+                        help='Replay only the first N requests')
+    parser.add_argument('--baseline', type=str, default=None,
+                        help='Predictions saved by --save-baseline (default: captured predictions)')
+    parser.add_argument('--save-baseline', type=str, default=None,
+                        help="Write this run's predictions for later --baseline comparisons")
+    parser.add_argument('--tolerance', type=float, default=0.01,
+                        help='Allowed relative prediction difference')
+    parser.add_argument('--abs-tolerance', type=float, default=0.0,
+                        help='Allowed absolute prediction difference in dollars')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Optional JSON report path')
+    parser.add_argument('--fail-on-mismatch', action='store_true',
+                        help='Exit non-zero on errors or prediction mismatches')
+
+    args = parser.parse_args()
+
+    requests = load_requests(args.inputs)[:args.limit]
+    if not requests:
+        parser.error('no requests found in the inputs')
+    if args.speed is not None and any(r['timestamp'] is None for r in requests):
+        print("Warning: some requests have no timestamp, replaying at max rate")
+
+    mode = 'max rate' if args.speed is None else f'{args.speed:g}x original timing'
+    print(f"Replaying {len(requests)} requests ({mode}) against {args.url or 'in-process app'}")
+    results, elapsed = asyncio.run(_run(args, requests))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['predictions']
+        if len(baseline) != len(requests):
+            parser.error(f'baseline has {len(baseline)} requests, replay has {len(requests)}')
+    else:
+        baseline = [r['predictions'] for r in requests]
+
+    report = {
+        'requests': len(requests),
+        'mode': mode,
+        'elapsed_seconds': elapsed,
+        'throughput_rps': len(requests) / elapsed if elapsed else None,
+        'endpoints': latency_summary(requests, results),
+        'predictions': compare_predictions(baseline, results, args.tolerance, args.abs_tolerance),
+    }
+    lags = [r['lag'] for r in results if 'lag' in r]
+    if lags:
+        report['schedule_lag_ms'] = {f'p{q}': float(np.percentile(lags, q) * 1000)
+                                     for q in PERCENTILES}
+
+    print(f"\nReplayed in {elapsed:.2f}s ({report['throughput_rps']:.1f} req/s)")
+    print(f"\n{'endpoint':<16} {'requests':>9} {'errors':>7} {'p50':>9} {'p90':>9} "
+          f"{'p99':>9} {'max':>9}")
+    for endpoint, stats in report['endpoints'].items():
+        cells = [f"{stats[k]:>7.2f}ms" if k in stats else f"{'-':>9}"
+                 for k in ('p50_ms', 'p90_ms', 'p99_ms', 'max_ms')]
+        print(f"{endpoint:<16} {stats['requests']:>9} {stats['errors']:>7} {' '.join(cells)}")
+    if lags:
+        print(f"\nSchedule lag p99: {report['schedule_lag_ms']['p99']:.1f}ms")
+
+    check = report['predictions']
+    print(f"\nPredictions: {check['compared']} compared, {check['mismatched']} outside tolerance, "
+          f"{check['skipped_requests']} requests without a baseline "
+          f"(max diff ${check['max_abs_diff']:,.0f}, {check['max_rel_diff']:.2%})")
+    for example in check['examples']:
+        print(f"  request {example['request']} row {example['row']}: "
+              f"expected ${example['expected']:,.0f}, got ${example['actual']:,.0f}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({'predictions': [r.get('predictions') for r in results]}, f)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    errors = sum(stats['errors'] for stats in report['endpoints'].values())
+    if args.fail_on_mismatch and (errors or check['mismatched']):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,287 @@
+"""
+Async Python client for the Memphis Housing Price Prediction API.
+
+One PredictionClient holds one pooled httpx.AsyncClient, so every call made
+through it reuses the same keep-alive connections. Create it once per
+process (or event loop) and share it:
+
+    async with PredictionClient('http://localhost:8000') as client:
+        result = await client.predict({'sqft': 1800, 'beds': 3, ...})
+
+Single-property predict() calls are coalesced: calls made within
+batch_window_ms of each other (for the same model version and tier) go out
+as one /predict/batch request, and each caller gets its own entry of the
+batch response. A batch is sent early once it reaches max_batch_size.
+Coalesced results come from /predict/batch, so their features_used is the
+batch endpoint's shorter summary. If the batch is rejected as invalid
+(422), its calls are resent one by one so only the invalid ones fail.
+
+Requests answered with 429 or 503, or failing to connect, are retried with
+exponential backoff and full jitter, honoring Retry-After when the server
+sends it. Prediction requests have no side effects, so retrying is safe.
+
+predict_frame() streams a DataFrame through /predict/batch in chunks of
+batch_size rows with at most `concurrency` requests in flight.
+"""
+
+import asyncio
+import random
+from typing import List, Mapping, Optional
+
+import httpx
+import pandas as pd
+
+# Request fields of the API's HousingFeatures; predict_frame sends only these columns
+FEATURE_FIELDS = [
+    'sqft', 'beds', 'baths', 'year_built', 'lot_size_acres', 'stories', 'garage_spaces',
+    'has_pool', 'renovated', 'neighborhood', 'distance_to_downtown', 'crime_index',
+    'school_rating', 'property_type',
+]
+
+RETRY_STATUSES = frozenset({429, 503})
+
+
+class PredictionAPIError(RuntimeError):
+    """Raised for an error response, or when retries are exhausted."""
+
+    def __init__(self, status_code: Optional[int], detail):
+        self.status_code = status_code
+        self.detail = detail
+        super().__init__(f"HTTP {status_code}: {detail}" if status_code else str(detail))
+
+
+class PredictionClient:
+    """
+    Pooled, batching client for the prediction API.
+
+    Args:
+        base_url: Service URL, e.g. 'http://localhost:8000'
+        model_version: Version or alias sent as X-Model-Version (None for the
+            service's default)
+        tier: Latency tier ('full' or 'compact'; None for the service's default)
+        max_connections: Size of the shared connection pool
+        timeout: Per-request timeout in seconds
+        batch_window_ms: How long a predict() call waits for others to share
+            its batch request; 0 sends each call on its own
+        max_batch_size: Properties per coalesced batch request
+        max_retries: Retries after a 429/503 or connection error
+        backoff: First retry delay in seconds, doubled per attempt
+        max_backoff: Cap on a single retry delay in seconds
+        transport: Optional httpx transport (e.g. httpx.ASGITransport for an
+            in-process app)
+    """
+
+    def __init__(self, base_url: str, model_version: Optional[str] = None,
+                 tier: Optional[str] = None, max_connections: int = 20, timeout: float = 10.0,
+                 batch_window_ms: float = 5.0, max_batch_size: int = 256,
+                 max_retries: int = 4, backoff: float = 0.1, max_backoff: float = 5.0,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.model_version = model_version
+        self.tier = tier
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+        # (version, tier) -> pending [(features, future)], and its flush timer
+        self._pending = {}
+        self._timers = {}
+        self._flushes = set()
+        self.stats = {'calls': 0, 'requests': 0, 'retries': 0}
+
+    async def __aenter__(self) -> 'PredictionClient':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Send any pending coalesced calls, wait for them, and close the pool."""
+        for key in list(self._pending):
+            self._flush(key)
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+        await self._http.aclose()
+
+    # --- HTTP -------------------------------------------------------------
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None:
+            try:
+                return min(float(response.headers['retry-after']), self.max_backoff)
+            except (KeyError, ValueError):
+                pass
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    async def _request(self, method: str, path: str, version: Optional[str] = None,
+                       **kwargs) -> httpx.Response:
+        """Send one request, retrying 429/503 responses and connection errors."""
+        headers = {'X-Model-Version': version} if version else None
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                self.stats['requests'] += 1
+                response = await self._http.request(method, path, headers=headers, **kwargs)
+                if response.status_code not in RETRY_STATUSES:
+                    break
+                error = PredictionAPIError(response.status_code, _detail(response))
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError) as e:
+                error = PredictionAPIError(None, f"{type(e).__name__}: {e}")
+            if attempt == self.max_retries:
+                raise error
+            self.stats['retries'] += 1
+            await asyncio.sleep(self._retry_delay(attempt, response))
+
+        if response.status_code >= 400:
+            raise PredictionAPIError(response.status_code, _detail(response))
+        return response
+
+    async def predict_batch(self, properties: List[Mapping], model_version: Optional[str] = None,
+                            tier: Optional[str] = None) -> List[dict]:
+        """
+        Predict a list of properties with one /predict/batch request.
+
+        Returns:
+            One prediction dict per property, in order
+        """
+        if not properties:
+            return []
+        tier = tier or self.tier
+        response = await self._request(
+            'POST', '/predict/batch', version=model_version or self.model_version,
+            json={'properties': list(properties)}, params={'tier': tier} if tier else None,
+        )
+        return response.json()['predictions']
+
+    async def get(self, path: str, **params) -> dict:
+        """GET a JSON endpoint, e.g. client.get('/model/info')."""
+        response = await self._request('GET', path, params=params or None)
+        return response.json()
+
+    # --- coalescing ---------------------------------------------------------
+
+    async def predict(self, features: Mapping, model_version: Optional[str] = None,
+                      tier: Optional[str] = None) -> dict:
+        """
+        Predict one property. Concurrent calls are sent together as a batch.
+
+        Returns:
+            The property's prediction dict (predicted_price, confidence_range,
+            features_used)
+        """
+        self.stats['calls'] += 1
+        key = (model_version or self.model_version, tier or self.tier)
+        future = asyncio.get_running_loop().create_future()
+        pending = self._pending.setdefault(key, [])
+        pending.append((dict(features), future))
+
+        if len(pending) >= self.max_batch_size or self.batch_window <= 0:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = asyncio.get_running_loop().call_later(
+                self.batch_window, self._flush, key)
+        return await future
+
+    def _flush(self, key: tuple) -> None:
+        """Send the calls pending for key as one batch request."""
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        pending = self._pending.pop(key, None)
+        if not pending:
+            return
+        task = asyncio.ensure_future(self._send_batch(key, pending))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _send_batch(self, key: tuple, pending: list) -> None:
+        version, tier = key
+        try:
+            predictions = await self.predict_batch([features for features, _ in pending],
+                                                   model_version=version, tier=tier)
+        except PredictionAPIError as e:
+            if e.status_code != 422 or len(pending) == 1:
+                _fail(pending, e)
+                return
+            # One invalid property rejects the whole batch; resend each on its
+            # own so only its caller gets the validation error
+            await asyncio.gather(*(self._send_one(key, item) for item in pending))
+            return
+        except Exception as e:
+            _fail(pending, e)
+            return
+        for (_, future), prediction in zip(pending, predictions):
+            if not future.done():
+                future.set_result(prediction)
+
+    async def _send_one(self, key: tuple, item: tuple) -> None:
+        (version, tier), (features, future) = key, item
+        try:
+            response = await self._request('POST', '/predict', version=version, json=features,
+                                           params={'tier': tier} if tier else None)
+        except Exception as e:
+            _fail([item], e)
+            return
+        if not future.done():
+            future.set_result(response.json())
+
+    # --- bulk ---------------------------------------------------------------
+
+    async def predict_frame(self, df: pd.DataFrame, batch_size: int = 500, concurrency: int = 4,
+                            model_version: Optional[str] = None,
+                            tier: Optional[str] = None) -> pd.DataFrame:
+        """
+        Predict every row of a DataFrame through /predict/batch.
+
+        Rows are sent in chunks of batch_size by `concurrency` workers, so at
+        most that many requests (and their JSON bodies) exist at once. Only
+        FEATURE_FIELDS columns are sent; missing values are left out so the
+        API's defaults apply.
+
+        Returns:
+            DataFrame on df's index with predicted_price, price_low and
+            price_high columns
+        """
+        columns = [c for c in FEATURE_FIELDS if c in df.columns]
+        predicted = [None] * len(df)
+        starts = iter(range(0, len(df), batch_size))
+
+        async def worker():
+            for start in starts:
+                chunk = df.iloc[start:start + batch_size]
+                predictions = await self.predict_batch(
+                    _records(chunk[columns]), model_version=model_version, tier=tier)
+                predicted[start:start + len(chunk)] = predictions
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+        return pd.DataFrame({
+            'predicted_price': [p['predicted_price'] for p in predicted],
+            'price_low': [p['confidence_range']['low'] for p in predicted],
+            'price_high': [p['confidence_range']['high'] for p in predicted],
+        }, index=df.index)
+
+
+def _fail(pending: list, error: Exception) -> None:
+    for _, future in pending:
+        if not future.done():
+            future.set_exception(error)
+
+
+def _records(df: pd.DataFrame) -> List[dict]:
+    """JSON-ready row dicts, without missing values."""
+    return [{k: v for k, v in row.items() if pd.notna(v)} for row in df.to_dict('records')]
+
+
+def _detail(response: httpx.Response):
+    try:
+        payload = response.json()
+    except ValueError:
+        return response.text
+    return payload.get('detail', payload) if isinstance(payload, dict) else payload
@@ -2,17 +2,37 @@
 Memphis Housing Price Prediction API
 
 FastAPI application for serving the trained XGBoost model.
+
+Several model versions can be served at once (see registry.py). Requests
+pick one with the X-Model-Version header or the /models/{version}/...
+routes, by version id or alias; otherwise the 'default' alias is used.
+Aliases come from the startup configuration (MODEL_ALIASES) and cannot be
+changed over the API. State-changing endpoints (/drift/reset) are off
+unless ADMIN_TOKEN is set, and then need it in the X-Admin-Token header.
+
+Prediction endpoints take ?tier=compact to score with the bundle's compact
+latency tier; bundles without one serve the full model, and the tier used
+is returned in the X-Model-Tier header.
+
+Run from the MHD directory: uvicorn src.serving.app:app (as the Dockerfile
+does) or python -m src.serving.app.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-from typing import Optional, List
-import joblib
+from typing import Optional, List, Literal
+import asyncio
+import hmac
 import numpy as np
 from pathlib import Path
-import json
 import os
+import time
+
+from .capture import RequestCapture
+from .comparables import ComparablesIndex
+from .explain import APPROXIMATE, EXACT, ExplanationCache, explain_rows, format_explanation
+from .registry import DEFAULT_ALIAS, ModelRegistry, ModelVersion, UnknownModelVersion
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -30,10 +50,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global model and metadata
-model = None
-feature_info = None
-model_metadata = None
+# Global model registry, request capture, explanation cache and comparables index
+registry = None
+request_capture = None
+explanation_cache = None
+comparables_index = None
+
+# Exact contributions above this estimated per-row cost fall back to approximate
+EXPLAIN_ROW_COST_BUDGET = int(os.environ.get("EXPLAIN_ROW_COST_BUDGET", 1_000_000))
+EXPLAIN_MAX_ROWS = int(os.environ.get("EXPLAIN_MAX_ROWS", 1000))
+COMPARABLES_MAX_K = int(os.environ.get("COMPARABLES_MAX_K", 50))
+COMPARABLES_MAX_ROWS = int(os.environ.get("COMPARABLES_MAX_ROWS", 1000))
+
+# Token for the admin endpoints (sent as X-Admin-Token); unset disables them
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+# Latency tiers a request can ask for (?tier=)
+Tier = Literal["full", "compact"]
 
 
 class HousingFeatures(BaseModel):
@@ -91,6 +124,52 @@ class BatchPredictionResponse(BaseModel):
     predictions: List[PredictionResponse]
 
 
+class FeatureContribution(BaseModel):
+    """One feature's contribution to a predicted price."""
+    feature: str
+    contribution: float
+
+
+class ExplanationResponse(BaseModel):
+    """Per-feature contributions; base_value plus all contributions is the raw prediction."""
+    predicted_price: float
+    base_value: float
+    contributions: List[FeatureContribution]
+    other: Optional[float] = None
+    method: str
+
+
+class BatchExplanationResponse(BaseModel):
+    """Response for batch explanations."""
+    explanations: List[ExplanationResponse]
+
+
+class ComparableSale(BaseModel):
+    """One training sale similar to the requested property."""
+    sale_price: int
+    sale_date: str
+    neighborhood: str
+    property_type: str
+    sqft: int
+    beds: int
+    baths: float
+    year_built: int
+    lot_size_acres: float
+    distance: float
+
+
+class ComparablesResponse(BaseModel):
+    """Most similar sales, nearest first; neighborhood_matched is False when all
+    neighborhoods were searched because the requested one is not indexed."""
+    comparables: List[ComparableSale]
+    neighborhood_matched: bool
+
+
+class BatchComparablesResponse(BaseModel):
+    """Response for batch comparables."""
+    results: List[ComparablesResponse]
+
+
 class HealthResponse(BaseModel):
     """Health check response."""
     status: str
@@ -98,44 +177,98 @@ class HealthResponse(BaseModel):
     model_version: Optional[str] = None
 
 
-def load_model():
-    """Load the trained model and metadata."""
-    global model, feature_info, model_metadata
+def load_model(model_path: Optional[str] = None):
+    """
+    Build the model registry and load the default model.
+
+    The default alias points at the first bundle found at model_path or the
+    usual locations; MODEL_REGISTRY_DIR adds more bundles (*.bundle,
+    */model.bundle), MODEL_ALIASES ("name=version,...") names versions and
+    MODEL_MEMORY_BUDGET_MB bounds the loaded versions (default 1024).
+
+    The comparables index is read from COMPARABLES_PATH, or from
+    comparables.index next to the default bundle.
+    """
+    global registry, comparables_index
+
+    registry = ModelRegistry(
+        memory_budget_bytes=int(float(os.environ.get("MODEL_MEMORY_BUDGET_MB", 1024)) * 2**20)
+    )
+    discovered = []
+    if os.environ.get("MODEL_REGISTRY_DIR"):
+        discovered = registry.discover(os.environ["MODEL_REGISTRY_DIR"])
 
     # Try multiple model locations
-    model_paths = [
-        Path(__file__).parent.parent.parent / "models" / "model.joblib",
-        Path("/app/models/model.joblib"),
-        Path(os.environ.get("MODEL_PATH", "models/model.joblib")),
+    model_paths = [Path(model_path)] if model_path else []
+    model_paths += [
+        Path(__file__).parent.parent.parent / "models" / "model.bundle",
+        Path("/app/models/model.bundle"),
+        Path(os.environ.get("MODEL_PATH", "models/model.bundle")),
     ]
+    for path in model_paths:
+        if path.exists():
+            registry.register(path, aliases=[DEFAULT_ALIAS])
+            break
+    else:
+        if discovered:
+            registry.set_alias(DEFAULT_ALIAS, discovered[0])
 
-    for model_path in model_paths:
-        if model_path.exists():
-            model = joblib.load(model_path)
-            print(f"Model loaded from {model_path}")
-
-            # Load metadata
-            metadata_path = model_path.parent / "model_metadata.json"
-            if metadata_path.exists():
-                with open(metadata_path) as f:
-                    model_metadata = json.load(f)
+    for pair in filter(None, os.environ.get("MODEL_ALIASES", "").split(",")):
+        alias, version = pair.split("=", 1)
+        registry.set_alias(alias.strip(), version.strip())
 
-            # Load feature info
-            feature_info_path = model_path.parent.parent / "data" / "processed" / "feature_info.json"
-            if feature_info_path.exists():
-                with open(feature_info_path) as f:
-                    feature_info = json.load(f)
+    comparables_path = os.environ.get("COMPARABLES_PATH")
+    if not comparables_path and registry.has_default:
+        comparables_path = registry.path().parent / "comparables.index"
+    comparables_index = None
+    if comparables_path and Path(comparables_path).exists():
+        comparables_index = ComparablesIndex(comparables_path)
+        print(f"Comparables index loaded from {comparables_path} ({comparables_index.rows:,} sales)")
 
-            return True
+    if registry.has_default:
+        registry.get()  # load the default version before taking traffic
+        return True
 
     print("Warning: No model found, running in demo mode")
     return False
 
 
-def engineer_features(features: HousingFeatures) -> np.ndarray:
-    """Convert input features to model input format."""
+async def select_model(version: Optional[str] = None) -> Optional[ModelVersion]:
+    """
+    Model for a version or alias (None = default); None in demo mode.
+
+    A version that is not loaded yet is loaded in a worker thread, so the
+    event loop keeps serving requests for other versions meanwhile.
+    """
+    if registry is None or (version is None and not registry.has_default):
+        return None
+    try:
+        model = registry.resident(version)
+        if model is None:
+            model = await asyncio.to_thread(registry.get, version)
+    except UnknownModelVersion:
+        raise HTTPException(status_code=404, detail=f"Unknown model version '{version}'")
+    return model
+
+
+def _drift_monitor(version: Optional[str]):
+    if registry is None or (version is None and not registry.has_default):
+        return None
+    try:
+        return registry.drift_monitor(version)
+    except UnknownModelVersion:
+        raise HTTPException(status_code=404, detail=f"Unknown model version '{version}'")
+
+
+def engineer_features(features: HousingFeatures, model: Optional[ModelVersion] = None) -> np.ndarray:
+    """Convert input features to model input format (encoded with the model's vocabularies)."""
+    feature_spec = model.feature_spec if model else None
+    encoder_maps = model.encoder_maps if model else {}
+    drift_monitor = model.drift_monitor if model else None
+
     # Calculate derived features
-    age = 2024 - features.year_built
+    reference_year = feature_spec.get("reference_year", 2024) if feature_spec else 2024
+    age = reference_year - features.year_built
     bed_bath_ratio = features.beds / max(features.baths, 1)
     total_rooms = features.beds + features.baths
     sqft_per_bed = features.sqft / max(features.beds, 1)
@@ -144,21 +277,14 @@ def engineer_features(features: HousingFeatures) -> np.ndarray:
     neighborhood_quality = (10 - features.crime_index * 10 + features.school_rating) / 2
     location_score = 1 / (1 + features.distance_to_downtown / 10)
 
-    # Encode categoricals (simple mapping for common neighborhoods)
-    neighborhood_map = {
-        "Downtown": 0, "Midtown": 1, "East Memphis": 2, "Germantown": 3,
-        "Collierville": 4, "Bartlett": 5, "Cordova": 6, "Whitehaven": 7,
-        "Frayser": 8, "Raleigh": 9, "Orange Mound": 10, "Hickory Hill": 11,
-        "South Memphis": 12, "North Memphis": 13, "Berclair": 14,
-        "Cooper-Young": 15, "Harbor Town": 16, "Mud Island": 17,
-        "High Point Terrace": 18, "Parkway Village": 19
-    }
-    neighborhood_encoded = neighborhood_map.get(features.neighborhood, 0)
-
-    property_type_map = {
-        "Single Family": 0, "Townhouse": 1, "Condo": 2, "Multi-Family": 3
-    }
-    property_type_encoded = property_type_map.get(features.property_type, 0)
+    # Encode categoricals with the training vocabularies (-1 = unseen, as in prep)
+    neighborhood_encoded = encoder_maps.get("neighborhood", {}).get(features.neighborhood, -1)
+    property_type_encoded = encoder_maps.get("property_type", {}).get(features.property_type, -1)
+    if drift_monitor is not None:
+        if neighborhood_encoded == -1:
+            drift_monitor.record_unseen("neighborhood", features.neighborhood)
+        if property_type_encoded == -1:
+            drift_monitor.record_unseen("property_type", features.property_type)
 
     # Build feature array in correct order
     feature_array = np.array([
@@ -188,8 +314,18 @@ def engineer_features(features: HousingFeatures) -> np.ndarray:
 
 @app.on_event("startup")
 async def startup_event():
-    """Load model on startup."""
+    """Load model and start request capture (if CAPTURE_DIR is set) on startup."""
+    global request_capture, explanation_cache
     load_model()
+    request_capture = RequestCapture.from_env()
+    explanation_cache = ExplanationCache(int(os.environ.get("EXPLAIN_CACHE_SIZE", 10_000)))
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush captured requests."""
+    if request_capture is not None:
+        request_capture.close()
 
 
 @app.get("/", response_model=dict)
@@ -207,32 +343,83 @@ async def health_check():
     """Health check endpoint."""
     return HealthResponse(
         status="healthy",
-        model_loaded=model is not None,
-        model_version=model_metadata.get("xgboost_version") if model_metadata else None
+        model_loaded=registry is not None and registry.has_default,
+        model_version=registry.resolve() if registry is not None and registry.has_default else None
     )
 
 
-@app.post("/predict", response_model=PredictionResponse)
-async def predict(features: HousingFeatures):
-    """Predict housing price for given features."""
+def _require_admin(token: Optional[str]) -> None:
+    """Reject the request unless admin endpoints are enabled and the token matches."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled")
+    if token is None or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def _served(response: Response, model: Optional[ModelVersion], rows: int, started: float,
+            tier: Optional[str] = None) -> float:
+    """Record per-version metrics and tag the response; returns the latency in ms."""
+    latency_ms = (time.perf_counter() - started) * 1000
+    if model is not None:
+        registry.record(model.version, rows, latency_ms)
+        response.headers["X-Model-Version"] = model.version
+        response.headers["X-Model-Tier"] = tier or "full"
+    return latency_ms
+
+
+def _tier(model: Optional[ModelVersion], tier: Optional[str]) -> str:
+    """The requested tier if the model has it, otherwise 'full'."""
+    return tier if model is not None and tier in model.tiers else "full"
+
+
+def confidence_ranges(model: Optional[ModelVersion], X: Optional[np.ndarray], prices: list,
+                      tier: str = "full") -> list:
+    """
+    Confidence range per prediction.
+
+    Bundles with a quantile booster give the model's conformally corrected
+    interval between the outer quantiles, predicted for the whole batch in
+    one call and widened to include the point prediction when needed.
+    `level` (with the measured test `coverage`) is only reported when
+    training found the coverage close to it. Other bundles, demo mode and
+    the compact tier (which would pay for the interval model's full-size
+    trees) fall back to a fixed ±10%.
+    """
+    if model is None or X is None or not model.quantiles or tier != "full":
+        return [{"low": round(price * 0.90, -3), "high": round(price * 1.10, -3)}
+                for price in prices]
+
+    predicted = model.predict_quantiles(X)
+    low = np.minimum(predicted[:, 0], prices)
+    high = np.maximum(predicted[:, -1], prices)
+    interval = model.interval
+    calibration = ({"level": interval["level"], "coverage": round(interval["coverage"], 4)}
+                   if interval.get("calibrated") else {})
+    return [{"low": round(float(lo), -3), "high": round(float(hi), -3), **calibration}
+            for lo, hi in zip(low, high)]
+
+
+async def _predict(features: HousingFeatures, response: Response,
+                   version: Optional[str], tier: Optional[str] = None) -> PredictionResponse:
+    model = await select_model(version)
+    tier = _tier(model, tier)
+    started = time.perf_counter()
+    X = None
     if model is None:
         # Demo mode - simple estimation
         base_price = features.sqft * 120
         predicted_price = base_price * (1 + features.school_rating * 0.05)
     else:
         # Use trained model
-        X = engineer_features(features)
-        predicted_price = float(model.predict(X)[0])
+        X = engineer_features(features, model)
+        prediction = model.predict(X, tier)
+        predicted_price = float(prediction[0])
+        if model.drift_monitor is not None:
+            model.drift_monitor.update(X, prediction)
 
-    # Confidence range (±10% for demo)
-    confidence_range = {
-        "low": round(predicted_price * 0.90, -3),
-        "high": round(predicted_price * 1.10, -3),
-    }
-
-    return PredictionResponse(
+    result = PredictionResponse(
         predicted_price=round(predicted_price, -3),
-        confidence_range=confidence_range,
+        confidence_range=confidence_ranges(model, X, [predicted_price], tier)[0],
         features_used={
             "sqft": features.sqft,
             "beds": features.beds,
@@ -241,26 +428,36 @@ async def predict(features: HousingFeatures):
             "year_built": features.year_built,
         }
     )
-
-
-@app.post("/predict/batch", response_model=BatchPredictionResponse)
-async def predict_batch(request: BatchPredictionRequest):
-    """Batch prediction endpoint."""
+    latency_ms = _served(response, model, 1, started, tier)
+    if request_capture is not None:
+        request_capture.capture("/predict", [features], [predicted_price], latency_ms,
+                                model.version if model else None)
+    return result
+
+
+async def _predict_batch(request: BatchPredictionRequest, response: Response, version: Optional[str],
+                         tier: Optional[str] = None) -> BatchPredictionResponse:
+    model = await select_model(version)
+    tier = _tier(model, tier)
+    started = time.perf_counter()
     predictions = []
+    X = None
 
-    for property_features in request.properties:
-        if model is None:
-            base_price = property_features.sqft * 120
-            predicted_price = base_price * (1 + property_features.school_rating * 0.05)
-        else:
-            X = engineer_features(property_features)
-            predicted_price = float(model.predict(X)[0])
-
-        confidence_range = {
-            "low": round(predicted_price * 0.90, -3),
-            "high": round(predicted_price * 1.10, -3),
-        }
+    # Score the whole batch in one call (segmented bundles route rows per segment)
+    if model is None:
+        batch_prices = [p.sqft * 120 * (1 + p.school_rating * 0.05) for p in request.properties]
+    elif request.properties:
+        X = np.vstack([engineer_features(p, model) for p in request.properties])
+        prediction = model.predict(X, tier)
+        batch_prices = prediction.astype(float).tolist()
+        if model.drift_monitor is not None:
+            model.drift_monitor.update(X, prediction)
+    else:
+        batch_prices = []
 
+    ranges = confidence_ranges(model, X, batch_prices, tier)
+    for property_features, predicted_price, confidence_range in zip(request.properties, batch_prices,
+                                                                    ranges):
         predictions.append(PredictionResponse(
             predicted_price=round(predicted_price, -3),
             confidence_range=confidence_range,
@@ -271,23 +468,183 @@ async def predict_batch(request: BatchPredictionRequest):
             }
         ))
 
+    latency_ms = _served(response, model, len(request.properties), started, tier)
+    if request_capture is not None and request.properties:
+        request_capture.capture("/predict/batch", request.properties, batch_prices, latency_ms,
+                                model.version if model else None)
     return BatchPredictionResponse(predictions=predictions)
 
 
+@app.post("/predict", response_model=PredictionResponse)
+async def predict(features: HousingFeatures, response: Response,
+                  tier: Optional[Tier] = None,
+                  x_model_version: Optional[str] = Header(default=None)):
+    """Predict housing price for given features."""
+    return await _predict(features, response, x_model_version, tier)
+
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+async def predict_batch(request: BatchPredictionRequest, response: Response,
+                        tier: Optional[Tier] = None,
+                        x_model_version: Optional[str] = Header(default=None)):
+    """Batch prediction endpoint."""
+    return await _predict_batch(request, response, x_model_version, tier)
+
+
+@app.post("/models/{version}/predict", response_model=PredictionResponse)
+async def predict_version(version: str, features: HousingFeatures, response: Response,
+                          tier: Optional[Tier] = None):
+    """Predict with a specific model version or alias."""
+    return await _predict(features, response, version, tier)
+
+
+@app.post("/models/{version}/predict/batch", response_model=BatchPredictionResponse)
+async def predict_batch_version(version: str, request: BatchPredictionRequest, response: Response,
+                                tier: Optional[Tier] = None):
+    """Batch prediction with a specific model version or alias."""
+    return await _predict_batch(request, response, version, tier)
+
+
+def _explain_sync(model: ModelVersion, X: np.ndarray) -> tuple:
+    method = EXACT if model.path_costs[EXACT] <= EXPLAIN_ROW_COST_BUDGET else APPROXIMATE
+    return explain_rows(model, X, method, explanation_cache), method
+
+
+async def _explain(properties: List[HousingFeatures], response: Response,
+                   version: Optional[str], top_k: Optional[int]) -> List[ExplanationResponse]:
+    model = await select_model(version)
+    if model is None:
+        raise HTTPException(status_code=503, detail="Explanations need a trained model")
+    if len(properties) > EXPLAIN_MAX_ROWS:
+        raise HTTPException(status_code=413,
+                            detail=f"At most {EXPLAIN_MAX_ROWS} properties per explanation request")
+    if not properties:
+        return []
+
+    X = np.vstack([engineer_features(p, model) for p in properties])
+    # Off the event loop: exact contributions can take milliseconds per row
+    contributions, method = await asyncio.to_thread(_explain_sync, model, X)
+    response.headers["X-Model-Version"] = model.version
+    feature_columns = model.feature_spec["feature_columns"]
+    return [ExplanationResponse(**format_explanation(row, feature_columns, method, top_k))
+            for row in contributions]
+
+
+@app.post("/explain", response_model=ExplanationResponse)
+async def explain(features: HousingFeatures, response: Response,
+                  top_k: Optional[int] = Query(default=None, ge=1),
+                  x_model_version: Optional[str] = Header(default=None)):
+    """Per-feature contributions to one property's predicted price."""
+    return (await _explain([features], response, x_model_version, top_k))[0]
+
+
+@app.post("/explain/batch", response_model=BatchExplanationResponse)
+async def explain_batch(request: BatchPredictionRequest, response: Response,
+                        top_k: Optional[int] = Query(default=None, ge=1),
+                        x_model_version: Optional[str] = Header(default=None)):
+    """Per-feature contributions for a batch, computed in one call per booster."""
+    explanations = await _explain(request.properties, response, x_model_version, top_k)
+    return BatchExplanationResponse(explanations=explanations)
+
+
+@app.get("/explain/stats")
+async def explain_stats():
+    """Explanation cache counters and limits."""
+    return {
+        "cache": explanation_cache.snapshot() if explanation_cache is not None else None,
+        "row_cost_budget": EXPLAIN_ROW_COST_BUDGET,
+        "max_rows": EXPLAIN_MAX_ROWS,
+    }
+
+
+def _comparables(properties: List[HousingFeatures], k: int) -> List[ComparablesResponse]:
+    if comparables_index is None:
+        raise HTTPException(status_code=503, detail="No comparables index loaded")
+    if len(properties) > COMPARABLES_MAX_ROWS:
+        raise HTTPException(status_code=413,
+                            detail=f"At most {COMPARABLES_MAX_ROWS} properties per comparables request")
+    if not properties:
+        return []
+
+    neighbors, matched = comparables_index.query([p.model_dump() for p in properties], k)
+    return [
+        ComparablesResponse(
+            comparables=[comparables_index.sale(row, distance) for row, distance in rows],
+            neighborhood_matched=is_matched,
+        )
+        for rows, is_matched in zip(neighbors, matched)
+    ]
+
+
+@app.post("/comparables", response_model=ComparablesResponse)
+async def comparables(features: HousingFeatures,
+                      k: int = Query(default=5, ge=1, le=COMPARABLES_MAX_K)):
+    """The k most similar training sales in the property's neighborhood."""
+    return _comparables([features], k)[0]
+
+
+@app.post("/comparables/batch", response_model=BatchComparablesResponse)
+async def comparables_batch(request: BatchPredictionRequest,
+                            k: int = Query(default=5, ge=1, le=COMPARABLES_MAX_K)):
+    """Comparables for a batch, one index scan per neighborhood in the batch."""
+    return BatchComparablesResponse(results=_comparables(request.properties, k))
+
+
+@app.get("/models")
+async def list_models():
+    """Registered model versions: aliases, residency and per-version usage and latency."""
+    if registry is None:
+        return {"status": "No model registry"}
+    return registry.snapshot()
+
+
 @app.get("/model/info")
-async def model_info():
-    """Get model information."""
-    if model_metadata is None:
+async def model_info(version: Optional[str] = None):
+    """Get model information (default version unless one is given)."""
+    model = await select_model(version)
+    if model is None:
         return {"status": "No model metadata available"}
 
     return {
-        "model_type": model_metadata.get("model_type"),
-        "features": model_metadata.get("feature_columns"),
-        "metrics": model_metadata.get("metrics"),
-        "xgboost_version": model_metadata.get("xgboost_version"),
+        "model_type": model.metadata.get("model_type"),
+        "model_version": model.version,
+        "features": model.metadata.get("feature_columns"),
+        "metrics": model.metadata.get("metrics"),
+        "interval_quantiles": model.quantiles,
+        "tiers": model.tiers,
+        "xgboost_version": model.metadata.get("xgboost_version"),
     }
 
 
+@app.get("/drift")
+async def drift(min_observations: int = 100, version: Optional[str] = None):
+    """Compare live feature and prediction distributions with the training reference."""
+    monitor = _drift_monitor(version)
+    if monitor is None:
+        return {"status": "No drift reference available"}
+    return monitor.report(min_observations=min_observations)
+
+
+@app.post("/drift/reset")
+async def reset_drift(version: Optional[str] = None,
+                      x_admin_token: Optional[str] = Header(default=None)):
+    """Start a new drift observation window (needs the admin token)."""
+    _require_admin(x_admin_token)
+    monitor = _drift_monitor(version)
+    if monitor is None:
+        return {"status": "No drift reference available"}
+    monitor.reset()
+    return {"status": "reset", "since": monitor.since}
+
+
+@app.get("/capture/stats")
+async def capture_stats():
+    """Request capture counters (captured, dropped, written rows, segments)."""
+    if request_capture is None:
+        return {"status": "Capture disabled (set CAPTURE_DIR to enable)"}
+    return request_capture.snapshot()
+
+
 @app.get("/neighborhoods")
 async def list_neighborhoods():
     """List available Memphis neighborhoods."""
@@ -303,5 +660,7 @@ async def list_neighborhoods():
 
 
 if __name__ == "__main__":
+    # The serving modules import each other as a package: run from MHD with
+    # `python -m src.serving.app` (or `uvicorn src.serving.app:app`)
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
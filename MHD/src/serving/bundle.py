@@ -0,0 +1,235 @@
+"""
+Model bundle reader for the prediction service.
+
+Reads the single-file bundle written by src/training/bundle.py (layout is
+documented there; this reader must accept the same BUNDLE_FORMAT_VERSION).
+With use_mmap=True the file is memory-mapped: opening only parses the header,
+and each booster is checksummed and materialized on first use straight
+from the mapped pages, so cold start and reload do not read boosters the
+service never scores with.
+
+Bundles with a 'segments' routing table (src/training/segment_models.py)
+are scored per segment: rows are stably grouped by segment, each group is
+scored with one inplace_predict call, and results come back in input order.
+Per-feature contributions (for /explain) are routed the same way.
+
+Bundles may also carry latency tiers ('tiers' in the feature spec, from
+train_model.add_compact_booster): a smaller booster over a subset of the
+feature columns, scored on those columns of the same feature rows.
+"""
+
+import hashlib
+import json
+import mmap
+import struct
+import threading
+from pathlib import Path
+
+import numpy as np
+import xgboost as xgb
+
+BUNDLE_MAGIC = b'MHDBNDL\0'
+BUNDLE_FORMAT_VERSION = 1
+PREAMBLE = struct.Struct('<8sIIQ32s')
+ALIGNMENT = 64
+
+
+class BundleError(ValueError):
+    """Raised when a bundle is truncated, corrupt or of an unknown format version."""
+
+
+class ModelBundle:
+    """Header, feature spec and lazily loaded boosters of one model bundle."""
+
+    def __init__(self, path, use_mmap: bool = True, verify: bool = True):
+        self.path = Path(path)
+        self.verify = verify
+        self._boosters = {}
+        self._tier_column_cache = {}
+        self._lock = threading.Lock()
+
+        with open(self.path, 'rb') as f:
+            if use_mmap:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._data = f.read()
+
+        if len(self._data) < PREAMBLE.size:
+            raise BundleError(f"{self.path} is truncated")
+        magic, version, _, header_len, header_digest = PREAMBLE.unpack_from(self._data, 0)
+        if magic != BUNDLE_MAGIC:
+            raise BundleError(f"{self.path} is not a model bundle")
+        if version != BUNDLE_FORMAT_VERSION:
+            raise BundleError(f"{self.path} has unsupported bundle format version {version}")
+        header_bytes = self._data[PREAMBLE.size:PREAMBLE.size + header_len]
+        if hashlib.sha256(header_bytes).digest() != header_digest:
+            raise BundleError(f"{self.path} header checksum mismatch")
+
+        self.header = json.loads(header_bytes)
+        self._payload_start = -(-(PREAMBLE.size + header_len) // ALIGNMENT) * ALIGNMENT
+
+        # Segment routing: encoded category code -> index into _route_names
+        segments = self.feature_spec.get('segments')
+        if segments:
+            self._route_names = ['main'] + sorted(set(segments['routes']) - {'main'})
+            self._route_table = np.array(
+                [self._route_names.index(route) for route in segments['routes']], dtype=np.intp
+            )
+            self._route_column = self.feature_spec['feature_columns'].index(segments['feature'])
+        else:
+            self._route_names = None
+
+    @property
+    def model_version(self) -> str:
+        return self.header['model_version']
+
+    @property
+    def metadata(self) -> dict:
+        return self.header['metadata']
+
+    @property
+    def feature_spec(self) -> dict:
+        return self.header['feature_spec']
+
+    @property
+    def booster_names(self) -> list:
+        return list(self.header['boosters'])
+
+    def booster(self, name: str = 'main') -> xgb.Booster:
+        """Return the named booster, loading it on first use."""
+        booster = self._boosters.get(name)
+        if booster is not None:
+            return booster
+
+        with self._lock:
+            if name in self._boosters:
+                return self._boosters[name]
+            entry = self.header['boosters'].get(name)
+            if entry is None:
+                raise KeyError(f"No booster '{name}' in {self.path}")
+
+            start = self._payload_start + entry['offset']
+            raw = memoryview(self._data)[start:start + entry['size']]
+            try:
+                if len(raw) != entry['size']:
+                    raise BundleError(f"Booster '{name}' in {self.path} is truncated")
+                if self.verify and hashlib.sha256(raw).hexdigest() != entry['sha256']:
+                    raise BundleError(f"Booster '{name}' in {self.path} checksum mismatch")
+                booster = xgb.Booster()
+                booster.load_model(bytearray(raw))
+            finally:
+                raw.release()
+
+            self._boosters[name] = booster
+            return booster
+
+    def _route(self, X: np.ndarray):
+        """Yield (booster name, row indices) groups, one per segment present in X."""
+        if self._route_names is None:
+            yield 'main', slice(None)
+            return
+
+        codes = X[:, self._route_column].astype(np.intp)
+        valid = (codes >= 0) & (codes < len(self._route_table))
+        index = np.zeros(len(X), dtype=np.intp)
+        index[valid] = self._route_table[codes[valid]]
+
+        order = np.argsort(index, kind='stable')
+        counts = np.bincount(index, minlength=len(self._route_names))
+        start = 0
+        for name, count in zip(self._route_names, counts):
+            if count:
+                yield name, order[start:start + count]
+                start += count
+
+    @property
+    def tiers(self) -> list:
+        """Latency tiers this bundle can score with ('full' is the main model)."""
+        return ['full'] + sorted(self.feature_spec.get('tiers', {}))
+
+    def predict(self, X: np.ndarray, tier: str = None) -> np.ndarray:
+        """
+        Score a feature matrix, routing rows to segment boosters when the
+        bundle has them; tier picks a latency tier other than 'full'.
+        """
+        if tier and tier != 'full':
+            spec = self.feature_spec['tiers'][tier]
+            X = np.ascontiguousarray(X[:, self._tier_columns(tier)], dtype=np.float32)
+            return self.booster(spec['booster']).inplace_predict(X)
+
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if self._route_names is None:
+            return self.booster('main').inplace_predict(X)
+
+        predictions = np.empty(len(X), dtype=np.float32)
+        for name, rows in self._route(X):
+            predictions[rows] = self.booster(name).inplace_predict(X[rows])
+        return predictions
+
+    def _tier_columns(self, tier: str) -> np.ndarray:
+        """Positions of a tier's feature columns in the full feature row (computed once)."""
+        columns = self._tier_column_cache.get(tier)
+        if columns is None:
+            feature_columns = self.feature_spec['feature_columns']
+            columns = np.array([feature_columns.index(c)
+                                for c in self.feature_spec['tiers'][tier]['feature_columns']])
+            self._tier_column_cache[tier] = columns
+        return columns
+
+    @property
+    def quantiles(self) -> list:
+        """Quantiles of the bundled interval booster (None without one)."""
+        return self.feature_spec.get('quantiles')
+
+    @property
+    def interval(self) -> dict:
+        """
+        Calibration of the outer quantiles recorded at training (level,
+        conformal correction, test coverage, calibrated); empty for older
+        bundles.
+        """
+        return self.feature_spec.get('interval') or {}
+
+    def predict_quantiles(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predicted quantiles, shape (rows, len(quantiles)), from one call to the
+        'quantiles' booster. Rows are sorted so the quantiles never cross, and
+        the outer quantiles are widened by the interval's conformal correction.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        predicted = self.booster('quantiles').inplace_predict(X)
+        predicted = np.sort(predicted.reshape(len(X), len(self.quantiles)), axis=1)
+        correction = self.interval.get('correction')
+        if correction:
+            predicted[:, 0] -= correction
+            predicted[:, -1] += correction
+            predicted.sort(axis=1)
+        return predicted
+
+    def contributions(self, X: np.ndarray, approximate: bool = False) -> np.ndarray:
+        """
+        Per-feature contributions of each row's prediction, routed like predict.
+
+        Returns:
+            Array of shape (rows, features + 1): one column per feature
+            column, then the bias; each row sums to its prediction
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        contributions = np.empty((len(X), X.shape[1] + 1), dtype=np.float32)
+        for name, rows in self._route(X):
+            booster = self.booster(name)
+            matrix = xgb.DMatrix(X[rows], feature_names=booster.feature_names)
+            contributions[rows] = booster.predict(matrix, pred_contribs=True,
+                                                  approx_contribs=approximate)
+        return contributions
+
+    def load_all(self) -> 'ModelBundle':
+        """Materialize every booster now (e.g. before taking traffic)."""
+        for name in self.booster_names:
+            self.booster(name)
+        return self
+
+    def close(self) -> None:
+        """Release the mapping; boosters already loaded stay usable."""
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
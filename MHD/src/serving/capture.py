@@ -0,0 +1,216 @@
+"""
+Request/prediction capture for the prediction service.
+
+Handlers call RequestCapture.capture(), which only makes a sampling
+decision and appends one record to a bounded in-memory ring (a deque;
+append/popleft are atomic, so handlers never take a lock or wait on I/O).
+When the ring is full the record is dropped and counted rather than slowing
+the request down.
+
+A background writer drains the ring in batches into zstd-compressed parquet
+segments, one row per scored property:
+
+    capture-<UTC start time>-<sequence>.parquet
+
+The segment being written is named *.parquet.inprogress and renamed when it
+is rotated (by size or age) or on shutdown. When the directory exceeds its
+total size cap, the oldest finished segments are deleted.
+
+Configuration (environment variables read by from_env):
+
+    CAPTURE_DIR               segment directory; capture is off when unset
+    CAPTURE_SAMPLE_RATE       fraction of requests captured (default 0.1)
+    CAPTURE_RING_SIZE         records buffered in memory (default 10000)
+    CAPTURE_SEGMENT_MB        rotate a segment at this size (default 64)
+    CAPTURE_SEGMENT_SECONDS   rotate a segment at this age (default 300)
+    CAPTURE_MAX_MB            total size cap for the directory (default 1024)
+"""
+
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+SEGMENT_GLOB = 'capture-*.parquet'
+_INPROGRESS = '.inprogress'
+
+# Request fields flattened into one column each
+FEATURE_FIELDS = [
+    ('sqft', pa.int32()), ('beds', pa.int16()), ('baths', pa.float32()),
+    ('year_built', pa.int16()), ('lot_size_acres', pa.float32()), ('stories', pa.float32()),
+    ('garage_spaces', pa.int16()), ('has_pool', pa.bool_()), ('renovated', pa.bool_()),
+    ('neighborhood', pa.string()), ('distance_to_downtown', pa.float32()),
+    ('crime_index', pa.float32()), ('school_rating', pa.int16()), ('property_type', pa.string()),
+]
+
+SCHEMA = pa.schema([
+    ('timestamp', pa.timestamp('us', tz='UTC')),
+    ('request_id', pa.string()),
+    ('endpoint', pa.string()),
+    ('batch_size', pa.int32()),
+    ('row', pa.int32()),
+    ('latency_ms', pa.float32()),
+    ('model_version', pa.string()),
+    *FEATURE_FIELDS,
+    ('predicted_price', pa.float64()),
+])
+
+
+class RequestCapture:
+    """Sampled, bounded, off-hot-path capture of requests and predictions."""
+
+    def __init__(self, capture_dir, sample_rate: float = 0.1, ring_size: int = 10_000,
+                 segment_bytes: int = 64 * 2**20, segment_seconds: float = 300,
+                 max_total_bytes: int = 2**30, flush_interval: float = 1.0,
+                 batch_size: int = 1000):
+        self.capture_dir = Path(capture_dir)
+        self.capture_dir.mkdir(parents=True, exist_ok=True)
+        self.sample_rate = sample_rate
+        self.ring_size = ring_size
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.max_total_bytes = max_total_bytes
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._ring = deque()
+        self.stats = {'captured': 0, 'dropped': 0, 'written_rows': 0, 'segments': 0,
+                      'deleted_segments': 0, 'write_errors': 0}
+
+        self._writer = None
+        self._segment_path = None
+        self._segment_started = 0.0
+        self._sequence = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-capture', daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_env(cls):
+        """Build from CAPTURE_* environment variables; None when CAPTURE_DIR is unset."""
+        capture_dir = os.environ.get('CAPTURE_DIR')
+        if not capture_dir:
+            return None
+        return cls(
+            capture_dir,
+            sample_rate=float(os.environ.get('CAPTURE_SAMPLE_RATE', 0.1)),
+            ring_size=int(os.environ.get('CAPTURE_RING_SIZE', 10_000)),
+            segment_bytes=int(float(os.environ.get('CAPTURE_SEGMENT_MB', 64)) * 2**20),
+            segment_seconds=float(os.environ.get('CAPTURE_SEGMENT_SECONDS', 300)),
+            max_total_bytes=int(float(os.environ.get('CAPTURE_MAX_MB', 1024)) * 2**20),
+        )
+
+    # --- hot path -------------------------------------------------------
+
+    def capture(self, endpoint: str, properties: list, predictions: list,
+                latency_ms: float, model_version: str = None) -> bool:
+        """
+        Offer one request for capture (called by handlers).
+
+        Args:
+            properties: Request features, one HousingFeatures (or dict) per scored
+                property; serialized by the writer thread, not here
+            predictions: Predicted prices in the same order
+
+        Returns:
+            True if the request was queued for writing
+        """
+        if random.random() >= self.sample_rate:
+            return False
+        if len(self._ring) >= self.ring_size:
+            self.stats['dropped'] += 1
+            return False
+        self._ring.append((time.time(), endpoint, properties, predictions,
+                           latency_ms, model_version))
+        self.stats['captured'] += 1
+        return True
+
+    # --- background writer ----------------------------------------------
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self._drain()
+            if self._writer and time.time() - self._segment_started >= self.segment_seconds:
+                self._rotate()
+        self._drain()
+        self._rotate()
+
+    def _drain(self):
+        while self._ring:
+            records = []
+            while self._ring and len(records) < self.batch_size:
+                records.append(self._ring.popleft())
+            try:
+                self._write(records)
+            except Exception as e:  # never let a bad batch stop the writer
+                self.stats['write_errors'] += 1
+                print(f"Capture write failed: {e}")
+
+    def _write(self, records: list):
+        columns = {field.name: [] for field in SCHEMA}
+        for timestamp, endpoint, properties, predictions, latency_ms, model_version in records:
+            request_id = uuid.uuid4().hex
+            when = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+            for row, (features, prediction) in enumerate(zip(properties, predictions)):
+                if hasattr(features, 'model_dump'):
+                    features = features.model_dump()
+                columns['timestamp'].append(when)
+                columns['request_id'].append(request_id)
+                columns['endpoint'].append(endpoint)
+                columns['batch_size'].append(len(properties))
+                columns['row'].append(row)
+                columns['latency_ms'].append(latency_ms)
+                columns['model_version'].append(model_version)
+                for name, _ in FEATURE_FIELDS:
+                    columns[name].append(features.get(name))
+                columns['predicted_price'].append(float(prediction))
+
+        table = pa.Table.from_pydict(columns, schema=SCHEMA)
+        if self._writer is None:
+            self._open_segment()
+        self._writer.write_table(table)
+        self.stats['written_rows'] += len(table)
+
+        if self._segment_path.stat().st_size >= self.segment_bytes:
+            self._rotate()
+
+    def _open_segment(self):
+        self._sequence += 1
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+        self._segment_path = self.capture_dir / f'capture-{stamp}-{self._sequence:05d}.parquet{_INPROGRESS}'
+        self._writer = pq.ParquetWriter(self._segment_path, SCHEMA, compression='zstd')
+        self._segment_started = time.time()
+
+    def _rotate(self):
+        """Finish the current segment and enforce the directory size cap."""
+        if self._writer is None:
+            return
+        self._writer.close()
+        self._segment_path.rename(self._segment_path.with_suffix(''))
+        self._writer = None
+        self.stats['segments'] += 1
+
+        segments = sorted(self.capture_dir.glob(SEGMENT_GLOB))
+        total = sum(p.stat().st_size for p in segments)
+        for oldest in segments[:-1]:
+            if total <= self.max_total_bytes:
+                break
+            total -= oldest.stat().st_size
+            oldest.unlink()
+            self.stats['deleted_segments'] += 1
+
+    def snapshot(self) -> dict:
+        """Counters plus the current ring depth."""
+        return {**self.stats, 'queued': len(self._ring), 'sample_rate': self.sample_rate}
+
+    def close(self, timeout: float = 10.0):
+        """Flush queued records and finish the current segment."""
+        self._stop.set()
+        self._thread.join(timeout)
@@ -0,0 +1,138 @@
+"""
+Comparable-sales index reader for the prediction service.
+
+Reads the index written by src/training/comparables.py (layout is documented
+there; this reader must accept the same COMPARABLES_FORMAT_VERSION). The
+file is memory-mapped and its arrays are zero-copy views of the mapped
+pages, so opening it only parses the header.
+
+A batch is vectorized in one pass, grouped by neighborhood, and each group
+is scored against its neighborhood's partition with one matrix product;
+the k nearest come from argpartition. Requests for a neighborhood that is
+not in the index search every partition.
+"""
+
+import hashlib
+import json
+import mmap
+import struct
+from pathlib import Path
+
+import numpy as np
+
+COMPARABLES_MAGIC = b'MHDCOMP\0'
+COMPARABLES_FORMAT_VERSION = 1
+PREAMBLE = struct.Struct('<8sIIQ32s')
+ALIGNMENT = 64
+
+
+class ComparablesError(ValueError):
+    """Raised when an index is truncated, corrupt or of an unknown format version."""
+
+
+class ComparablesIndex:
+    """Memory-mapped nearest-neighbor index of training sales."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._data) < PREAMBLE.size:
+            raise ComparablesError(f"{self.path} is truncated")
+        magic, version, _, header_len, header_digest = PREAMBLE.unpack_from(self._data, 0)
+        if magic != COMPARABLES_MAGIC:
+            raise ComparablesError(f"{self.path} is not a comparables index")
+        if version != COMPARABLES_FORMAT_VERSION:
+            raise ComparablesError(f"{self.path} has unsupported index format version {version}")
+        header_bytes = self._data[PREAMBLE.size:PREAMBLE.size + header_len]
+        if hashlib.sha256(header_bytes).digest() != header_digest:
+            raise ComparablesError(f"{self.path} header checksum mismatch")
+
+        self.header = json.loads(header_bytes)
+        payload_start = -(-(PREAMBLE.size + header_len) // ALIGNMENT) * ALIGNMENT
+        self.arrays = {}
+        for name, entry in self.header['arrays'].items():
+            dtype = np.dtype(entry['dtype'])
+            count = int(np.prod(entry['shape']))
+            if payload_start + entry['offset'] + count * dtype.itemsize > len(self._data):
+                raise ComparablesError(f"{self.path} array '{name}' is truncated")
+            self.arrays[name] = np.frombuffer(
+                self._data, dtype=dtype, count=count, offset=payload_start + entry['offset']
+            ).reshape(entry['shape'])
+
+        features = self.header['features']
+        self.feature_columns = [f['column'] for f in features]
+        self._center = np.array([f['center'] for f in features], dtype=np.float32)
+        self._factor = np.array([f['weight'] / f['scale'] for f in features], dtype=np.float32)
+        self.property_types = self.header['property_types']
+        self._property_type_codes = {label: i for i, label in enumerate(self.property_types)}
+        self.neighborhoods = self.header['neighborhoods']
+        self._neighborhood_codes = {label: i for i, label in enumerate(self.neighborhoods)}
+        self._offsets = self.header['partition_offsets']
+
+    @property
+    def rows(self) -> int:
+        return self.header['rows']
+
+    def vectorize(self, records: list) -> np.ndarray:
+        """Query vectors for request records (dicts with the raw feature fields)."""
+        features = np.array([[r[c] for c in self.feature_columns] for r in records],
+                            dtype=np.float32).reshape(len(records), len(self.feature_columns))
+        one_hot = np.zeros((len(records), len(self.property_types)), dtype=np.float32)
+        for i, record in enumerate(records):
+            code = self._property_type_codes.get(record.get('property_type'))
+            if code is not None:
+                one_hot[i, code] = self.header['property_type_weight']
+        return np.hstack([(features - self._center) * self._factor, one_hot])
+
+    def query(self, records: list, k: int = 5) -> list:
+        """
+        The k most similar indexed sales for each record.
+
+        Returns:
+            One list per record of (row, distance) pairs, nearest first, and
+            a parallel list of whether the record's neighborhood was indexed
+        """
+        queries = self.vectorize(records)
+        codes = np.array([self._neighborhood_codes.get(r.get('neighborhood'), -1)
+                          for r in records], dtype=np.intp)
+        vectors, norms = self.arrays['vectors'], self.arrays['squared_norms']
+
+        results = [[] for _ in records]
+        for code in np.unique(codes):
+            members = np.flatnonzero(codes == code)
+            start, stop = ((0, self.rows) if code < 0
+                           else (self._offsets[code], self._offsets[code + 1]))
+            n = min(k, stop - start)
+            if n == 0:
+                continue
+            q = queries[members]
+            distances = (norms[start:stop][None, :] - 2 * q @ vectors[start:stop].T
+                         + np.einsum('ij,ij->i', q, q)[:, None])
+            nearest = np.argpartition(distances, n - 1, axis=1)[:, :n]
+            nearest_distances = np.take_along_axis(distances, nearest, axis=1)
+            order = np.argsort(nearest_distances, axis=1, kind='stable')
+            nearest = np.take_along_axis(nearest, order, axis=1)
+            nearest_distances = np.sqrt(np.maximum(
+                np.take_along_axis(nearest_distances, order, axis=1), 0))
+            for member, rows, dists in zip(members, nearest + start, nearest_distances):
+                results[member] = list(zip(rows.tolist(), dists.tolist()))
+        return results, (codes >= 0).tolist()
+
+    def sale(self, row: int, distance: float) -> dict:
+        """One indexed sale as a response record."""
+        a = self.arrays
+        partition = int(np.searchsorted(self._offsets, row, side='right')) - 1
+        return {
+            'sale_price': int(a['sale_price'][row]),
+            'sale_date': str(np.datetime64(int(a['sale_date'][row]), 'D')),
+            'neighborhood': self.neighborhoods[partition],
+            'property_type': self.property_types[a['property_type'][row]],
+            'sqft': int(a['sqft'][row]),
+            'beds': int(a['beds'][row]),
+            'baths': float(a['baths'][row]),
+            'year_built': int(a['year_built'][row]),
+            'lot_size_acres': round(float(a['lot_size_acres'][row]), 2),
+            'distance': round(distance, 4),
+        }
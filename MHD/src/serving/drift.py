@@ -0,0 +1,133 @@
+"""
+Online drift monitoring for the prediction service.
+
+Live feature rows and predictions are binned with the edges of the training
+reference (src/training/drift_reference.py, stored in the bundle's feature
+spec) into one fixed-size counts matrix, so memory does not grow with
+traffic and an update is a broadcast comparison plus a bincount. /drift
+compares the live distributions with the reference using the population
+stability index (PSI):
+
+    PSI = sum over bins of (live - ref) * ln(live / ref)
+
+< 0.1 is stable, 0.1-0.25 a moderate shift, > 0.25 a significant shift.
+Raw categorical values the model has never seen (e.g. new neighborhoods) are
+counted separately, keeping at most MAX_UNSEEN_VALUES distinct values per
+column.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+PREDICTION = 'prediction'
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+MAX_UNSEEN_VALUES = 100
+
+# Floor for empty bins so PSI stays finite
+_EPSILON = 1e-4
+
+
+def psi(reference: np.ndarray, live: np.ndarray) -> float:
+    """Population stability index between two proportion vectors."""
+    reference = np.maximum(reference, _EPSILON)
+    live = np.maximum(live, _EPSILON)
+    return float(np.sum((live - reference) * np.log(live / reference)))
+
+
+class DriftMonitor:
+    """Fixed-size binned counts of live features and predictions."""
+
+    def __init__(self, reference: dict, feature_columns: list):
+        self.reference = reference
+        self.columns = list(feature_columns) + [PREDICTION]
+        specs = [reference['columns'][c] for c in self.columns]
+
+        # Edges padded with +inf: a value's bin is the number of edges below it
+        width = max(len(spec['edges']) for spec in specs)
+        self._edges = np.full((len(specs), width), np.inf)
+        for i, spec in enumerate(specs):
+            self._edges[i, :len(spec['edges'])] = spec['edges']
+        self._n_bins = width + 1
+        self._offsets = np.arange(len(specs)) * self._n_bins
+        self._reference = [np.asarray(spec['proportions']) for spec in specs]
+
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Start a new observation window."""
+        with self._lock:
+            self._counts = np.zeros(len(self.columns) * self._n_bins, dtype=np.int64)
+            self._unseen = {}
+            self.observations = 0
+            self.since = time.time()
+
+    def update(self, X: np.ndarray, predictions: np.ndarray) -> None:
+        """Count a batch of feature rows (in feature_columns order) and their predictions."""
+        # Through float32 first, as the model and the training data see the values,
+        # so values sitting on a reference edge land in the same bin as in training
+        values = np.column_stack([np.asarray(X, dtype=np.float32),
+                                  np.asarray(predictions, dtype=np.float32)]).astype(np.float64)
+        bins = (values[:, :, None] > self._edges[None]).sum(axis=2)
+        flat = np.bincount((bins + self._offsets).ravel(), minlength=len(self._counts))
+        with self._lock:
+            self._counts += flat
+            self.observations += len(values)
+
+    def record_unseen(self, column: str, value: str) -> None:
+        """Count a raw categorical value that is not in the training vocabulary."""
+        with self._lock:
+            values = self._unseen.setdefault(column, {})
+            if value in values or len(values) < MAX_UNSEEN_VALUES:
+                values[value] = values.get(value, 0) + 1
+
+    def report(self, min_observations: int = 100) -> dict:
+        """PSI and status per feature and for predictions in the current window."""
+        with self._lock:
+            counts = self._counts.reshape(len(self.columns), self._n_bins).copy()
+            observations = self.observations
+            unseen = {c: dict(v) for c, v in self._unseen.items()}
+
+        columns = {}
+        for i, name in enumerate(self.columns):
+            spec = self.reference['columns'][name]
+            n_bins = len(spec['edges']) + 1
+            live = counts[i, :n_bins] / max(observations, 1)
+            value = psi(self._reference[i], live) if observations else None
+            result = {'psi': value, 'status': self._status(value, observations, min_observations)}
+            if spec['kind'] == 'categorical':
+                # First and last bins hold codes outside the training vocabulary
+                result['out_of_vocabulary_rate'] = float(live[0] + live[-1])
+                result['top_shifts'] = sorted(
+                    ({'category': label, 'reference': float(self._reference[i][k + 1]),
+                      'live': float(live[k + 1])}
+                     for k, label in enumerate(spec['labels'])),
+                    key=lambda s: -abs(s['live'] - s['reference'])
+                )[:3]
+            columns[name] = result
+
+        prediction = columns.pop(PREDICTION)
+        return {
+            'observations': observations,
+            'since': self.since,
+            'reference_rows': self.reference.get('rows'),
+            'drifted_features': [name for name, r in columns.items()
+                                 if r['status'] == 'significant'],
+            'features': columns,
+            'prediction': prediction,
+            'unseen_values': unseen,
+        }
+
+    @staticmethod
+    def _status(value, observations: int, min_observations: int) -> str:
+        # No observations (a new or reset window) gives no PSI, whatever min_observations is
+        if value is None or observations == 0 or observations < min_observations:
+            return 'insufficient_data'
+        if value >= PSI_SIGNIFICANT:
+            return 'significant'
+        if value >= PSI_MODERATE:
+            return 'moderate'
+        return 'stable'
@@ -0,0 +1,151 @@
+"""
+Per-prediction explanations for the prediction service.
+
+/explain returns each feature's contribution to a predicted price, from
+XGBoost's native contribution prediction (pred_contribs) over the whole
+batch in one call per booster. Contributions are named by the bundle's
+feature columns (get_feature_columns() in training) and, with the bias,
+sum to the raw prediction.
+
+Exact (TreeSHAP) contributions cost roughly leaves x depth^2 per tree for
+every row; the approximate method (Saabas: the change in expected value
+along each row's decision path) costs roughly depth per tree. path_costs
+estimates both from the tree shapes; when the exact per-row cost is over
+the configured budget the approximate method is used instead.
+
+Contribution rows are cached in ExplanationCache. The request asked to
+reuse the prediction cache's key, but the service has no prediction cache,
+so this module defines its own: cache_key(model version, encoded row). The
+row is the float32 row the model scores, so equal requests share an entry
+whatever their raw spelling, and versions never share entries. The method
+is fixed per version by the budget, so it is not part of the key.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+EXACT = 'exact'
+APPROXIMATE = 'approximate'
+
+
+def path_costs(bundle) -> dict:
+    """
+    Estimated per-row cost of exact and approximate contributions.
+
+    Rows are scored by one booster, so this is the maximum over the
+    bundle's full-tier boosters (not the interval or compact-tier boosters)
+    of the sum over trees of leaves * depth^2 (exact) and depth
+    (approximate).
+    """
+    skipped = {'quantiles'} | {tier['booster'] for tier in bundle.feature_spec.get('tiers', {}).values()}
+    costs = {EXACT: 0, APPROXIMATE: 0}
+    for name in bundle.booster_names:
+        if name in skipped:
+            continue
+        model = json.loads(bundle.booster(name).save_raw('json'))
+        exact = approximate = 0
+        for tree in model['learner']['gradient_booster']['model']['trees']:
+            left, right = tree['left_children'], tree['right_children']
+            depth = [0] * len(left)
+            # Children always have higher node ids than their parent
+            for node, child in enumerate(left):
+                if child != -1:
+                    depth[child] = depth[right[node]] = depth[node] + 1
+            leaves = left.count(-1)
+            exact += leaves * max(depth) ** 2
+            approximate += max(depth)
+        costs[EXACT] = max(costs[EXACT], exact)
+        costs[APPROXIMATE] = max(costs[APPROXIMATE], approximate)
+    return costs
+
+
+def cache_key(model_version: str, row: np.ndarray) -> tuple:
+    """
+    Cache key for one scored row of a model version.
+
+    The service has no prediction cache whose key could be reused, so the
+    key is defined here: the version plus the row's float32 bytes.
+    """
+    return model_version, np.asarray(row, dtype=np.float32).tobytes()
+
+
+class ExplanationCache:
+    """Bounded LRU cache of contribution rows."""
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return value
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {**self.stats, 'entries': len(self._entries), 'max_entries': self.max_entries}
+
+
+def explain_rows(model, X: np.ndarray, method: str, cache: ExplanationCache = None) -> np.ndarray:
+    """
+    Contribution rows (features + bias) for a batch, computing only cache misses.
+
+    Args:
+        model: ModelVersion to explain
+        X: Encoded feature rows
+        method: EXACT or APPROXIMATE
+        cache: Optional contribution cache
+    """
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    keys = [cache_key(model.version, row) for row in X] if cache is not None else None
+    cached = [cache.get(key) for key in keys] if keys else [None] * len(X)
+    missing = [i for i, value in enumerate(cached) if value is None]
+
+    contributions = np.empty((len(X), X.shape[1] + 1), dtype=np.float32)
+    if missing:
+        computed = model.bundle.contributions(X[missing], approximate=method == APPROXIMATE)
+        contributions[missing] = computed
+        if keys:
+            for i, row in zip(missing, computed):
+                cache.put(keys[i], row)
+    for i, value in enumerate(cached):
+        if value is not None:
+            contributions[i] = value
+    return contributions
+
+
+def format_explanation(contributions: np.ndarray, feature_columns: list, method: str,
+                       top_k: int = None) -> dict:
+    """
+    One row's contributions as a response: features by descending absolute
+    contribution, trimmed to top_k with the rest summed into 'other'.
+    """
+    values = contributions[:-1].astype(np.float64)
+    base_value = float(contributions[-1])
+    order = np.argsort(-np.abs(values), kind='stable')
+    kept = order[:top_k] if top_k else order
+    return {
+        'predicted_price': base_value + float(values.sum()),
+        'base_value': base_value,
+        'contributions': [{'feature': feature_columns[i], 'contribution': float(values[i])}
+                          for i in kept],
+        'other': float(values[order[len(kept):]].sum()) if top_k else None,
+        'method': method,
+    }
@@ -0,0 +1,245 @@
+"""
+Multi-version model registry for the prediction service.
+
+Several model bundles can be served side by side (A/B tests, clients pinned
+to an older version). Bundles are registered by path; only their header is
+read then. A version is loaded on first use and kept resident in LRU order
+while the resident versions fit the memory budget; the least recently used
+versions are evicted beyond it and reloaded lazily when asked for again.
+Resident size is estimated from the serialized booster sizes in the bundle
+header.
+
+Aliases name versions ('default' is used when a request does not pick
+one). Loading happens outside the registry lock, with one lock per version,
+so a slow load only holds up requests for that version.
+
+Usage, latency and load/eviction counts, and each version's drift monitor,
+are kept per version and survive eviction.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+
+import numpy as np
+
+from .bundle import ModelBundle
+from .drift import DriftMonitor
+from .explain import path_costs
+
+DEFAULT_ALIAS = 'default'
+
+
+class UnknownModelVersion(KeyError):
+    """Raised when a version or alias is not registered."""
+
+
+class ModelVersion:
+    """One loaded model version: bundle, encoders and drift monitor."""
+
+    def __init__(self, path, drift_monitor: DriftMonitor = None):
+        self.path = Path(path)
+        self.bundle = ModelBundle(self.path)
+        self.bundle.booster('main')  # segment boosters load on first use
+        if self.bundle.quantiles:
+            self.bundle.booster('quantiles')
+        for tier in self.bundle.feature_spec.get('tiers', {}).values():
+            self.bundle.booster(tier['booster'])
+        self.version = self.bundle.model_version
+        self.feature_spec = self.bundle.feature_spec
+        self.metadata = {**self.bundle.metadata, 'model_version': self.version}
+        self.encoder_maps = {
+            column: {value: code for code, value in enumerate(categories)}
+            for column, categories in self.feature_spec.get('encoders', {}).items()
+        }
+        reference = self.feature_spec.get('drift_reference')
+        if drift_monitor is None and reference:
+            drift_monitor = DriftMonitor(reference, self.feature_spec['feature_columns'])
+        self.drift_monitor = drift_monitor
+        self.resident_bytes = bundle_resident_bytes(self.bundle)
+        self.loaded_at = time.time()
+        self._path_costs = None
+
+    def predict(self, X: np.ndarray, tier: str = None) -> np.ndarray:
+        return self.bundle.predict(X, tier)
+
+    @property
+    def tiers(self) -> list:
+        return self.bundle.tiers
+
+    @property
+    def quantiles(self) -> list:
+        return self.bundle.quantiles
+
+    @property
+    def interval(self) -> dict:
+        return self.bundle.interval
+
+    def predict_quantiles(self, X: np.ndarray) -> np.ndarray:
+        return self.bundle.predict_quantiles(X)
+
+    @property
+    def path_costs(self) -> dict:
+        """Estimated per-row cost of exact and approximate contributions (computed once)."""
+        if self._path_costs is None:
+            self._path_costs = path_costs(self.bundle)
+        return self._path_costs
+
+
+def bundle_resident_bytes(bundle: ModelBundle) -> int:
+    """Estimated memory of a bundle's boosters once loaded."""
+    return sum(entry['size'] for entry in bundle.header['boosters'].values())
+
+
+class ModelRegistry:
+    """Registered model versions, aliases and the LRU set of loaded versions."""
+
+    def __init__(self, memory_budget_bytes: int = 1024 * 2**20, latency_window: int = 1000):
+        self.memory_budget_bytes = memory_budget_bytes
+        self.latency_window = latency_window
+        self._paths = {}
+        self._sizes = {}
+        self._aliases = {}
+        self._resident = OrderedDict()
+        self._load_locks = {}
+        self._drift_monitors = {}
+        self._lock = threading.Lock()
+        self.stats = {}
+
+    def register(self, path, aliases: list = ()) -> str:
+        """Register a bundle by path (reads its header only); returns its version."""
+        bundle = ModelBundle(path)
+        version = bundle.model_version
+        size = bundle_resident_bytes(bundle)
+        bundle.close()
+
+        with self._lock:
+            self._paths[version] = Path(path)
+            self._sizes[version] = size
+            self.stats.setdefault(version, {
+                'requests': 0, 'rows': 0, 'loads': 0, 'evictions': 0,
+                'last_used': None, 'latencies_ms': deque(maxlen=self.latency_window),
+            })
+            for alias in aliases:
+                self._aliases[alias] = version
+        return version
+
+    def discover(self, directory) -> list:
+        """Register every *.bundle and */model.bundle in a directory."""
+        directory = Path(directory)
+        paths = sorted(directory.glob('*.bundle')) + sorted(directory.glob('*/model.bundle'))
+        return [self.register(path) for path in paths]
+
+    def set_alias(self, alias: str, version: str) -> None:
+        with self._lock:
+            if version not in self._paths:
+                raise UnknownModelVersion(version)
+            self._aliases[alias] = version
+
+    def resolve(self, name: str = None) -> str:
+        """Version id for a version or alias (None = the default alias)."""
+        name = name or DEFAULT_ALIAS
+        with self._lock:
+            version = self._aliases.get(name, name)
+            if version not in self._paths:
+                raise UnknownModelVersion(name)
+            return version
+
+    def path(self, name: str = None) -> Path:
+        """Bundle path of a version or alias."""
+        version = self.resolve(name)
+        with self._lock:
+            return self._paths[version]
+
+    @property
+    def has_default(self) -> bool:
+        return DEFAULT_ALIAS in self._aliases
+
+    def resident(self, name: str = None):
+        """The loaded ModelVersion, or None if it would have to be loaded first."""
+        version = self.resolve(name)
+        with self._lock:
+            model = self._resident.get(version)
+            if model is not None:
+                self._resident.move_to_end(version)
+            return model
+
+    def get(self, name: str = None) -> ModelVersion:
+        """The ModelVersion for a version or alias, loading it if needed (may block)."""
+        model = self.resident(name)
+        if model is not None:
+            return model
+
+        version = self.resolve(name)
+        with self._lock:
+            load_lock = self._load_locks.setdefault(version, threading.Lock())
+        with load_lock:
+            with self._lock:
+                model = self._resident.get(version)
+            if model is not None:
+                return model
+
+            model = ModelVersion(self._paths[version], self._drift_monitors.get(version))
+            print(f"Model {version} loaded from {model.path}")
+            with self._lock:
+                self._resident[version] = model
+                self._drift_monitors[version] = model.drift_monitor
+                self.stats[version]['loads'] += 1
+                self._evict(keep=version)
+            return model
+
+    def _evict(self, keep: str) -> None:
+        """Drop least recently used versions until the budget fits (caller holds the lock)."""
+        total = sum(m.resident_bytes for m in self._resident.values())
+        for version in list(self._resident):
+            if total <= self.memory_budget_bytes:
+                break
+            if version == keep:
+                continue
+            # In-flight requests keep their reference; the mapping is released with it
+            total -= self._resident.pop(version).resident_bytes
+            self.stats[version]['evictions'] += 1
+            print(f"Model {version} evicted (resident {total / 2**20:.1f} MiB)")
+
+    def drift_monitor(self, name: str = None):
+        """A version's drift monitor, kept across eviction (None before its first load)."""
+        version = self.resolve(name)
+        with self._lock:
+            return self._drift_monitors.get(version)
+
+    def record(self, version: str, rows: int, latency_ms: float) -> None:
+        """Count one request served by a version."""
+        stats = self.stats[version]
+        stats['requests'] += 1
+        stats['rows'] += rows
+        stats['last_used'] = time.time()
+        stats['latencies_ms'].append(latency_ms)
+
+    def snapshot(self) -> dict:
+        """Versions with residency, aliases and usage/latency metrics."""
+        with self._lock:
+            resident = list(self._resident)
+            aliases = dict(self._aliases)
+            versions = {}
+            for version, path in self._paths.items():
+                stats = dict(self.stats[version])
+                latencies = np.array(stats.pop('latencies_ms'))
+                if len(latencies):
+                    stats['latency_ms'] = {
+                        f'p{q}': float(np.percentile(latencies, q)) for q in (50, 95, 99)
+                    }
+                versions[version] = {
+                    'path': str(path),
+                    'resident': version in self._resident,
+                    'estimated_bytes': self._sizes[version],
+                    'aliases': sorted(a for a, v in aliases.items() if v == version),
+                    **stats,
+                }
+        return {
+            'aliases': aliases,
+            'resident': resident,
+            'resident_bytes': sum(versions[v]['estimated_bytes'] for v in resident),
+            'memory_budget_bytes': self.memory_budget_bytes,
+            'versions': versions,
+        }
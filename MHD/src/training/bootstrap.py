@@ -0,0 +1,177 @@
+"""
+Bootstrap Confidence Intervals for Memphis Housing Evaluation Metrics
+
+Resamples (actual, predicted) pairs with replacement and reports percentile
+intervals for every metric in evaluate.calculate_metrics.
+
+Resampling is batched: a batch of index matrices is drawn at once and turned
+into per-resample row counts with a single bincount. Every mean-type metric
+(RMSE, MAE, MAPE, R², within-X%) is then a weighted sum, so a whole batch is
+one matrix product. Rows are pre-sorted by absolute error, so a resample's
+k-th smallest error is the row where its cumulative count passes k (found
+from per-block count sums, then within one block) and its max error is the
+largest index drawn; no resample is ever sorted.
+Batches are spread over a process pool with independent random streams.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Same names and order as evaluate.calculate_metrics
+METRIC_NAMES = ['rmse', 'mae', 'r2', 'mape', 'median_ae', 'max_error',
+                'within_5pct', 'within_10pct', 'within_20pct']
+
+# Columns of the per-row statistics matrix; every metric except median/max
+# is a function of their weighted sums
+_STAT_COLUMNS = ['sq_error', 'abs_error', 'pct_error', 'y', 'y_sq',
+                 'within_5pct', 'within_10pct', 'within_20pct']
+
+# Index + weight elements per batch (~128 MB each)
+_BATCH_ELEMENTS = 2**24
+
+# Rows per block when locating order statistics from counts
+_BLOCK = 1024
+
+_WORKER = {}
+
+
+def _row_statistics(y_true, y_pred) -> tuple:
+    """
+    Return (abs errors sorted ascending, per-row statistics in the same order).
+
+    Both are padded to a multiple of _BLOCK rows; padding rows are never drawn.
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    y_pred = np.asarray(y_pred, dtype=np.float64)
+    abs_errors = np.abs(y_pred - y_true)
+    order = np.argsort(abs_errors, kind='stable')
+    y_true, abs_errors = y_true[order], abs_errors[order]
+    pct_errors = abs_errors / y_true * 100
+
+    stats = np.column_stack([
+        abs_errors ** 2, abs_errors, pct_errors, y_true, y_true ** 2,
+        pct_errors <= 5, pct_errors <= 10, pct_errors <= 20,
+    ]).astype(np.float64)
+
+    padding = -len(abs_errors) % _BLOCK
+    abs_errors = np.concatenate([abs_errors, np.full(padding, np.inf)])
+    stats = np.vstack([stats, np.zeros((padding, stats.shape[1]))])
+    return abs_errors, stats
+
+
+def _order_statistic(weights: np.ndarray, block_cumulative: np.ndarray, k: int) -> np.ndarray:
+    """Row index of each resample's k-th smallest value (0-based)."""
+    rows = np.arange(len(weights))
+    block = np.argmax(block_cumulative > k, axis=1)
+    before = np.where(block > 0, block_cumulative[rows, block - 1], 0)
+    within = weights.reshape(len(weights), -1, _BLOCK)[rows, block]
+    offset = np.argmax(np.cumsum(within, axis=1) + before[:, None] > k, axis=1)
+    return block * _BLOCK + offset
+
+
+def _metrics_from_weights(weights: np.ndarray, last_drawn: np.ndarray, n: int,
+                          abs_sorted: np.ndarray, stats: np.ndarray) -> np.ndarray:
+    """
+    Metrics for a batch of resamples given their row counts.
+
+    Args:
+        weights: (batch, padded rows) times each row was drawn, in abs-error order
+        last_drawn: (batch,) largest row index drawn by each resample
+        n: Rows per resample
+
+    Returns:
+        (batch, len(METRIC_NAMES)) array
+    """
+    sums = dict(zip(_STAT_COLUMNS, (weights @ stats).T / n))
+
+    # k-th smallest absolute error = first sorted row whose cumulative count exceeds k
+    block_cumulative = np.cumsum(weights.reshape(len(weights), -1, _BLOCK).sum(axis=2), axis=1)
+    lower = abs_sorted[_order_statistic(weights, block_cumulative, (n - 1) // 2)]
+    upper = abs_sorted[_order_statistic(weights, block_cumulative, n // 2)]
+
+    ss_tot = sums['y_sq'] - sums['y'] ** 2
+    return np.column_stack([
+        np.sqrt(sums['sq_error']),
+        sums['abs_error'],
+        1 - sums['sq_error'] / ss_tot,
+        sums['pct_error'],
+        (lower + upper) / 2,
+        abs_sorted[last_drawn],
+        sums['within_5pct'] * 100,
+        sums['within_10pct'] * 100,
+        sums['within_20pct'] * 100,
+    ])
+
+
+def _init_worker(abs_sorted: np.ndarray, stats: np.ndarray, n: int):
+    _WORKER.update(abs_sorted=abs_sorted, stats=stats, n=n)
+
+
+def _resample_task(task: tuple) -> np.ndarray:
+    """Compute metrics for n_resamples resamples drawn from seed."""
+    n_resamples, seed = task
+    abs_sorted, stats, n = _WORKER['abs_sorted'], _WORKER['stats'], _WORKER['n']
+    rng = np.random.default_rng(seed)
+    batch = max(1, _BATCH_ELEMENTS // len(abs_sorted))
+    weights = np.empty((batch, len(abs_sorted)))
+
+    results = []
+    for start in range(0, n_resamples, batch):
+        size = min(batch, n_resamples - start)
+        indices = rng.integers(0, n, size=(size, n))
+        for i in range(size):
+            weights[i] = np.bincount(indices[i], minlength=len(abs_sorted))
+        results.append(_metrics_from_weights(weights[:size], indices.max(axis=1), n,
+                                             abs_sorted, stats))
+    return np.vstack(results)
+
+
+def bootstrap_metrics(
+    y_true,
+    y_pred,
+    n_resamples: int = 1000,
+    confidence: float = 0.95,
+    n_jobs: int = None,
+    seed: int = 42
+) -> dict:
+    """
+    Percentile bootstrap confidence intervals for evaluation metrics.
+
+    Args:
+        y_true: Actual prices
+        y_pred: Predicted prices
+        n_resamples: Number of bootstrap resamples
+        confidence: Interval coverage (0.95 -> 2.5th to 97.5th percentile)
+        n_jobs: Worker processes (default: all cores)
+        seed: Seed for reproducible intervals
+
+    Returns:
+        Dictionary of metric -> {'lower', 'upper', 'std'}
+    """
+    n = len(y_true)
+    abs_sorted, stats = _row_statistics(y_true, y_pred)
+    n_jobs = min(n_jobs or os.cpu_count(), n_resamples)
+
+    # One independent random stream per worker task
+    sizes = [len(part) for part in np.array_split(np.arange(n_resamples), n_jobs)]
+    seeds = np.random.SeedSequence(seed).spawn(n_jobs)
+    tasks = list(zip(sizes, seeds))
+
+    if n_jobs == 1:
+        _init_worker(abs_sorted, stats, n)
+        samples = _resample_task(tasks[0])
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                 initargs=(abs_sorted, stats, n)) as pool:
+            samples = np.vstack(list(pool.map(_resample_task, tasks)))
+
+    alpha = (1 - confidence) / 2
+    lower = np.quantile(samples, alpha, axis=0)
+    upper = np.quantile(samples, 1 - alpha, axis=0)
+    spread = samples.std(axis=0)
+    return {
+        name: {'lower': float(lower[i]), 'upper': float(upper[i]), 'std': float(spread[i])}
+        for i, name in enumerate(METRIC_NAMES)
+    }
@@ -0,0 +1,174 @@
+"""
+Model Bundle Format for Memphis Housing Price Prediction
+
+A bundle is one file holding everything needed to score: the booster(s) in
+XGBoost's UBJSON format, the feature and encoder spec, and the model
+metadata, with checksums. Layout (little-endian):
+
+    0   8s    magic b'MHDBNDL\\0'
+    8   I     format version
+    12  I     reserved (0)
+    16  Q     header length in bytes
+    24  32s   sha256 of the header
+    56        header (UTF-8 JSON)
+    P         booster payloads, P = 56 + header length rounded up to 64,
+              each booster starting on a 64-byte boundary
+
+The header records each booster's offset (relative to P), size and sha256,
+so a reader can memory-map the file and materialize only the boosters it
+uses. The serving app has its own reader (src/serving/bundle.py); keep the
+two in step when changing the layout and bump BUNDLE_FORMAT_VERSION.
+"""
+
+import hashlib
+import json
+import struct
+from datetime import datetime, timezone
+from pathlib import Path
+
+import xgboost as xgb
+
+BUNDLE_MAGIC = b'MHDBNDL\0'
+BUNDLE_FORMAT_VERSION = 1
+BUNDLE_FILENAME = 'model.bundle'
+PREAMBLE = struct.Struct('<8sIIQ32s')
+ALIGNMENT = 64
+
+# Year used for the 'age' feature (see prep_data.engineer_features)
+REFERENCE_YEAR = 2024
+
+# Metadata the serving app reports as part of the model (the rest, such as
+# metrics and tracking run keys, does not change what is served)
+VERSIONED_METADATA = ('model_type', 'feature_columns')
+
+
+class BundleError(ValueError):
+    """Raised when a bundle is truncated, corrupt or of an unknown format version."""
+
+
+def feature_spec_from_info(feature_info: dict) -> dict:
+    """Build the bundle's feature spec from prep_data's feature_info.json."""
+    return {
+        'feature_columns': feature_info['feature_columns'],
+        'target_column': feature_info['target_column'],
+        'encoders': feature_info.get('encoders', {}),
+        'reference_year': REFERENCE_YEAR,
+        'drift_reference': feature_info.get('drift_reference'),
+    }
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def bundle_version(digests: dict, feature_spec: dict, metadata: dict) -> str:
+    """
+    Model version: a hash of everything that determines what the bundle serves.
+
+    Covers each booster's name and digest, the whole feature spec (columns
+    and their order, encoders, tiers, interval calibration, ...) and the
+    VERSIONED_METADATA fields, so two bundles with the same boosters but a
+    different encoding get different versions, while re-saving a model with
+    new metrics keeps its version.
+    """
+    h = hashlib.sha256()
+    for name in sorted(digests):
+        h.update(f'{name}:{digests[name]}\n'.encode())
+    h.update(json.dumps(feature_spec, sort_keys=True, default=float).encode())
+    h.update(json.dumps({key: metadata.get(key) for key in VERSIONED_METADATA},
+                        sort_keys=True, default=float).encode())
+    return h.hexdigest()[:12]
+
+
+def write_bundle(path, boosters: dict, feature_spec: dict, metadata: dict) -> dict:
+    """
+    Write boosters, feature spec and metadata to a single bundle file.
+
+    Args:
+        path: Bundle file path
+        boosters: Name -> xgb.Booster ('main' is the default model)
+        feature_spec: Output of feature_spec_from_info
+        metadata: Model metadata (metrics, params, ...)
+
+    Returns:
+        The bundle header that was written
+    """
+    payloads = {name: bytes(booster.save_raw('ubj')) for name, booster in boosters.items()}
+    digests = {name: hashlib.sha256(raw).hexdigest() for name, raw in payloads.items()}
+    model_version = bundle_version(digests, feature_spec, metadata)
+
+    offsets, cursor = {}, 0
+    for name, raw in payloads.items():
+        offsets[name] = cursor
+        cursor = _aligned(cursor + len(raw))
+
+    header = {
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'model_version': model_version,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'xgboost_version': xgb.__version__,
+        'feature_spec': feature_spec,
+        'metadata': metadata,
+        'boosters': {
+            name: {'offset': offsets[name], 'size': len(payloads[name]),
+                   'format': 'ubj', 'sha256': digests[name]}
+            for name in payloads
+        },
+    }
+    header_bytes = json.dumps(header, default=float).encode()
+    payload_start = _aligned(PREAMBLE.size + len(header_bytes))
+
+    path = Path(path)
+    with open(path, 'wb') as f:
+        f.write(PREAMBLE.pack(BUNDLE_MAGIC, BUNDLE_FORMAT_VERSION, 0, len(header_bytes),
+                              hashlib.sha256(header_bytes).digest()))
+        f.write(header_bytes)
+        for name, raw in payloads.items():
+            f.write(b'\0' * (payload_start + offsets[name] - f.tell()))
+            f.write(raw)
+    return header
+
+
+def read_bundle_header(data) -> tuple:
+    """
+    Parse and verify the preamble and header from the start of a bundle buffer.
+
+    Returns:
+        Tuple of (header, payload_start)
+    """
+    if len(data) < PREAMBLE.size:
+        raise BundleError("Bundle is truncated")
+    magic, version, _, header_len, header_digest = PREAMBLE.unpack_from(data, 0)
+    if magic != BUNDLE_MAGIC:
+        raise BundleError("Not a model bundle")
+    if version != BUNDLE_FORMAT_VERSION:
+        raise BundleError(f"Unsupported bundle format version {version}")
+    header_bytes = bytes(data[PREAMBLE.size:PREAMBLE.size + header_len])
+    if hashlib.sha256(header_bytes).digest() != header_digest:
+        raise BundleError("Bundle header checksum mismatch")
+    return json.loads(header_bytes), _aligned(PREAMBLE.size + header_len)
+
+
+def load_bundle(path, verify: bool = True) -> dict:
+    """
+    Read a bundle and materialize all of its boosters.
+
+    Returns:
+        The header dictionary with 'boosters' replaced by name -> xgb.Booster
+    """
+    data = Path(path).read_bytes()
+    header, payload_start = read_bundle_header(data)
+
+    boosters = {}
+    for name, entry in header['boosters'].items():
+        start = payload_start + entry['offset']
+        raw = memoryview(data)[start:start + entry['size']]
+        if len(raw) != entry['size']:
+            raise BundleError(f"Booster '{name}' is truncated")
+        if verify and hashlib.sha256(raw).hexdigest() != entry['sha256']:
+            raise BundleError(f"Booster '{name}' checksum mismatch")
+        booster = xgb.Booster()
+        booster.load_model(bytearray(raw))
+        boosters[name] = booster
+
+    return {**header, 'boosters': boosters}
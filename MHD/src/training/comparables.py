@@ -0,0 +1,194 @@
+"""
+Comparable-Sales Index for Memphis Housing Price Prediction
+
+A compact nearest-neighbor index over the training sales, written by
+prep_data.py, copied next to the model bundle by train_model.py and
+memory-mapped by the serving app (src/serving/comparables.py) for
+/comparables.
+
+Each sale is a vector of the raw request fields (COMPARABLE_FEATURES),
+standardized with the indexed rows' mean and standard deviation and
+weighted, plus a one-hot property type block. Rows are grouped into one
+contiguous partition per neighborhood (most recent sales first, at most
+max_per_neighborhood of them), so a query only scans the sales in its own
+neighborhood. Squared vector norms are stored for the
+|q|^2 - 2 q.v + |v|^2 distance.
+
+Layout (little-endian), like model.bundle:
+
+    0   8s    magic b'MHDCOMP\\0'
+    8   I     format version
+    12  I     reserved (0)
+    16  Q     header length in bytes
+    24  32s   sha256 of the header
+    56        header (UTF-8 JSON): features, labels, partitions and arrays
+    P         arrays, P = 56 + header length rounded up to 64, each array
+              starting on a 64-byte boundary
+
+The header records each array's offset (relative to P), dtype and shape.
+Keep the serving reader in step when changing the layout and bump
+COMPARABLES_FORMAT_VERSION.
+"""
+
+import hashlib
+import json
+import shutil
+import struct
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+COMPARABLES_MAGIC = b'MHDCOMP\0'
+COMPARABLES_FORMAT_VERSION = 1
+COMPARABLES_FILENAME = 'comparables.index'
+PREAMBLE = struct.Struct('<8sIIQ32s')
+ALIGNMENT = 64
+
+# Raw fields compared (same names as the API's HousingFeatures) -> weight
+COMPARABLE_FEATURES = {
+    'sqft': 2.0,
+    'beds': 1.0,
+    'baths': 1.0,
+    'year_built': 1.0,
+    'lot_size_acres': 0.5,
+    'stories': 0.5,
+    'garage_spaces': 0.5,
+    'has_pool': 0.5,
+    'renovated': 0.5,
+    'distance_to_downtown': 0.5,
+}
+PROPERTY_TYPE_WEIGHT = 2.0
+
+# Raw columns prep must keep for the index
+INDEX_COLUMNS = list(COMPARABLE_FEATURES) + ['neighborhood', 'property_type', 'sale_date',
+                                             'sale_price']
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+class ComparablesBuilder:
+    """
+    Accumulates training sales and writes the comparables index.
+
+    add() can be called once with all training rows or once per chunk
+    (streaming prep); rows beyond max_per_neighborhood most recent sales
+    per neighborhood are pruned as they accumulate, so memory stays bounded.
+    """
+
+    def __init__(self, max_per_neighborhood: int = 20_000):
+        self.max_per_neighborhood = max_per_neighborhood
+        self._parts = []
+        self._rows = 0
+        self._prune_above = 4 * max_per_neighborhood
+
+    def add(self, df: pd.DataFrame) -> None:
+        """Add sales (raw INDEX_COLUMNS) to the index."""
+        if not len(df):
+            return
+        part = pd.DataFrame({
+            column: df[column].to_numpy(dtype=np.float32) for column in COMPARABLE_FEATURES
+        })
+        part['neighborhood'] = df['neighborhood'].astype(str).to_numpy()
+        part['property_type'] = df['property_type'].astype(str).to_numpy()
+        part['sale_date'] = (pd.to_datetime(df['sale_date'].astype(str)).to_numpy()
+                             .astype('datetime64[D]').astype(np.int32))
+        part['sale_price'] = df['sale_price'].to_numpy(dtype=np.int32)
+        self._parts.append(part)
+        self._rows += len(part)
+        if self._rows > self._prune_above:
+            self._prune()
+            self._prune_above = max(2 * self._rows, 4 * self.max_per_neighborhood)
+
+    def _prune(self) -> pd.DataFrame:
+        """Keep the most recent sales per neighborhood, sorted by neighborhood."""
+        df = pd.concat(self._parts, ignore_index=True) if self._parts else pd.DataFrame()
+        if len(df):
+            df = (df.sort_values(['neighborhood', 'sale_date'], ascending=[True, False],
+                                 kind='stable')
+                  .groupby('neighborhood', sort=False).head(self.max_per_neighborhood)
+                  .reset_index(drop=True))
+        self._parts = [df]
+        self._rows = len(df)
+        return df
+
+    def write(self, path) -> dict:
+        """
+        Write the index file.
+
+        Returns:
+            The header that was written
+        """
+        df = self._prune()
+        if not len(df):
+            raise ValueError("No sales to index")
+
+        features = df[list(COMPARABLE_FEATURES)].to_numpy(dtype=np.float64)
+        center = features.mean(axis=0)
+        scale = features.std(axis=0)
+        scale[scale == 0] = 1.0
+        weights = np.array(list(COMPARABLE_FEATURES.values()))
+
+        property_types = sorted(df['property_type'].unique())
+        type_codes = pd.Categorical(df['property_type'], categories=property_types).codes
+        one_hot = np.zeros((len(df), len(property_types)))
+        one_hot[np.arange(len(df)), type_codes] = PROPERTY_TYPE_WEIGHT
+        vectors = np.hstack([(features - center) / scale * weights, one_hot]).astype(np.float32)
+
+        neighborhoods = sorted(df['neighborhood'].unique())
+        counts = df['neighborhood'].value_counts().reindex(neighborhoods).to_numpy()
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+
+        arrays = {
+            'vectors': vectors,
+            'squared_norms': np.einsum('ij,ij->i', vectors, vectors).astype(np.float32),
+            'sale_price': df['sale_price'].to_numpy(dtype=np.int32),
+            'sale_date': df['sale_date'].to_numpy(dtype=np.int32),
+            'property_type': type_codes.astype(np.int16),
+            **{column: df[column].to_numpy(dtype=np.float32)
+               for column in ('sqft', 'beds', 'baths', 'year_built', 'lot_size_acres')},
+        }
+        entries, cursor = {}, 0
+        for name, array in arrays.items():
+            entries[name] = {'offset': cursor, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+            cursor = _aligned(cursor + array.nbytes)
+
+        header = {
+            'format_version': COMPARABLES_FORMAT_VERSION,
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'rows': len(df),
+            'features': [
+                {'column': column, 'center': float(c), 'scale': float(s), 'weight': float(w)}
+                for column, c, s, w in zip(COMPARABLE_FEATURES, center, scale, weights)
+            ],
+            'property_types': property_types,
+            'property_type_weight': PROPERTY_TYPE_WEIGHT,
+            'neighborhoods': neighborhoods,
+            'partition_offsets': offsets.tolist(),
+            'max_per_neighborhood': self.max_per_neighborhood,
+            'arrays': entries,
+        }
+        header_bytes = json.dumps(header).encode()
+        payload_start = _aligned(PREAMBLE.size + len(header_bytes))
+
+        path = Path(path)
+        with open(path, 'wb') as f:
+            f.write(PREAMBLE.pack(COMPARABLES_MAGIC, COMPARABLES_FORMAT_VERSION, 0,
+                                  len(header_bytes), hashlib.sha256(header_bytes).digest()))
+            f.write(header_bytes)
+            for name, array in arrays.items():
+                f.write(b'\0' * (payload_start + entries[name]['offset'] - f.tell()))
+                f.write(np.ascontiguousarray(array).tobytes())
+        return header
+
+
+def copy_index(data_dir, output_dir) -> bool:
+    """Copy prep's comparables index next to a model bundle; False if prep wrote none."""
+    source = Path(data_dir) / COMPARABLES_FILENAME
+    if not source.exists():
+        return False
+    shutil.copy2(source, Path(output_dir) / COMPARABLES_FILENAME)
+    return True
@@ -0,0 +1,384 @@
+"""
+Champion vs Challenger Comparison for Memphis Housing Price Prediction
+
+Loads the test set once, scores the current (champion) model and any number
+of candidate (challenger) models against it in parallel, and compares each
+challenger to the champion on the same rows:
+
+- overall metric deltas (evaluate.calculate_metrics)
+- paired absolute-error differences with a confidence interval and win rate
+- per price range deltas (evaluate.analyze_by_price_range)
+
+and returns a promotion verdict from configurable thresholds. Only rows
+held out from every compared model are scored: a bundle trained on the
+current data's hash split is scored on the whole test set, one trained on
+another split only on sales after its train_watermark. If no model can be
+scored fairly, compare_models raises IncompatibleModels (exit status
+INCOMPATIBLE_EXIT_CODE) instead of returning a verdict. Use as a gate after
+training:
+
+    python compare_models.py --champion ../../champion --challengers ../../models --fail-on-reject
+"""
+
+import argparse
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from bundle import BUNDLE_FILENAME, load_bundle
+from evaluate import analyze_by_price_range, calculate_metrics, load_feature_columns
+from schema import SALE_DAY_COLUMN, read_processed_kwargs
+from segment_models import load_segmented_model
+from train_model import load_split_metadata, split_mismatch
+
+# --fail-on-reject exit status when the champion is kept; distinct from 1
+# (uncaught exception) and 2 (argparse usage error), so CI can tell a
+# rejection from a crash
+REJECTED_EXIT_CODE = 3
+# Exit status when the test set is not held out from a compared model
+INCOMPATIBLE_EXIT_CODE = 4
+
+# Fewest held-out test rows a comparison is run on
+MIN_HELD_OUT_ROWS = 100
+
+DEFAULT_THRESHOLDS = {
+    # Challenger MAE must be at least this % below the champion's
+    'min_mae_improvement_pct': 0.0,
+    # Challenger RMSE may be at most this % above the champion's
+    'max_rmse_regression_pct': 1.0,
+    # No price range's MAPE may get worse by more than this many percentage points
+    'max_range_mape_regression': 0.5,
+    # Price ranges with fewer test rows are too noisy for the range check
+    'min_range_rows': 100,
+    # The paired absolute-error difference must be significantly below zero
+    'require_significant': True,
+}
+
+# Metrics where a higher value is better; all others are errors
+HIGHER_IS_BETTER = {'r2', 'within_5pct', 'within_10pct', 'within_20pct'}
+
+
+class IncompatibleModels(ValueError):
+    """Raised when too few test rows are held out from every compared model."""
+
+
+def held_out_rows(model_dirs: list, split: dict, sale_day) -> tuple:
+    """
+    Test rows none of the models was trained on.
+
+    A model trained on the data's own hash split (split_mismatch finds
+    nothing) has never seen a test row. Any other model is limited to sales
+    after its bundle's train_watermark; without one (or without sale days
+    in test.csv) it cannot be scored fairly.
+
+    Returns:
+        Tuple of (boolean row mask or None for all rows, model dir -> note
+        on how its rows were limited)
+
+    Raises:
+        IncompatibleModels: If a model has no usable watermark
+    """
+    mask, notes = None, {}
+    for model_dir in model_dirs:
+        metadata = load_bundle(Path(model_dir) / BUNDLE_FILENAME)['metadata']
+        mismatch = split_mismatch(metadata, split)
+        if not mismatch:
+            continue
+        watermark = metadata.get('train_watermark')
+        if watermark is None or sale_day is None:
+            raise IncompatibleModels(
+                f"{model_dir} may have been trained on test rows: {mismatch}, and "
+                f"{'it records no train_watermark' if watermark is None else 'test.csv has no sale days'}"
+                " to select later sales from; re-run prep_data.py and compare on a shared split"
+            )
+        after = np.asarray(sale_day) > watermark
+        mask = after if mask is None else mask & after
+        notes[model_dir] = f"{mismatch}; scored on sales after day {watermark}"
+    return mask, notes
+
+
+def score_models(model_dirs: list, X: pd.DataFrame, n_jobs: int = None) -> dict:
+    """
+    Load and score several models against the same feature matrix in parallel.
+
+    XGBoost releases the GIL while predicting, so threads share X without copies.
+
+    Returns:
+        Dictionary of model dir -> predictions
+    """
+    def score(model_dir):
+        return model_dir, load_segmented_model(model_dir).predict(X)
+
+    with ThreadPoolExecutor(max_workers=n_jobs or len(model_dirs)) as pool:
+        return dict(pool.map(score, model_dirs))
+
+
+def paired_statistics(y_true, champion_pred, challenger_pred, confidence: float = 0.95) -> dict:
+    """
+    Compare per-row absolute errors of two models on the same rows.
+
+    Negative differences mean the challenger is closer to the actual price.
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    champion_abs = np.abs(np.asarray(champion_pred, dtype=np.float64) - y_true)
+    challenger_abs = np.abs(np.asarray(challenger_pred, dtype=np.float64) - y_true)
+    diff = challenger_abs - champion_abs
+    pct_diff = diff / y_true * 100
+
+    n = len(diff)
+    stderr = diff.std(ddof=1) / np.sqrt(n)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    t_stat = diff.mean() / stderr if stderr > 0 else 0.0
+
+    return {
+        'mean_abs_error_diff': float(diff.mean()),
+        'median_abs_error_diff': float(np.median(diff)),
+        'abs_error_diff_ci': [float(diff.mean() - z * stderr), float(diff.mean() + z * stderr)],
+        'mean_pct_error_diff': float(pct_diff.mean()),
+        't_stat': float(t_stat),
+        'p_value': float(2 * (1 - NormalDist().cdf(abs(t_stat)))),
+        'challenger_win_rate': float((diff < 0).mean() * 100),
+        'challenger_loss_rate': float((diff > 0).mean() * 100),
+    }
+
+
+def price_range_deltas(y_true, champion_pred, challenger_pred) -> pd.DataFrame:
+    """Challenger minus champion for each price range's error statistics."""
+    champion = analyze_by_price_range(y_true, champion_pred)
+    challenger = analyze_by_price_range(y_true, challenger_pred)
+    error_columns = ['mae', 'median_ae', 'mape', 'median_pct_error']
+    deltas = (challenger[error_columns] - champion[error_columns]).round(2)
+    deltas.insert(0, 'count', champion['count'])
+    return deltas
+
+
+def promotion_verdict(champion_metrics: dict, challenger_metrics: dict, paired: dict,
+                      range_deltas: pd.DataFrame, thresholds: dict) -> dict:
+    """Apply promotion thresholds; the challenger is promoted only if every check passes."""
+    mae_improvement = (1 - challenger_metrics['mae'] / champion_metrics['mae']) * 100
+    rmse_regression = (challenger_metrics['rmse'] / champion_metrics['rmse'] - 1) * 100
+    ranges = range_deltas[range_deltas['count'] >= thresholds['min_range_rows']]['mape']
+    worst_range = ranges.max() if len(ranges) else 0.0
+
+    checks = {
+        'mae_improvement_pct': {
+            'value': mae_improvement,
+            'threshold': thresholds['min_mae_improvement_pct'],
+            'passed': mae_improvement >= thresholds['min_mae_improvement_pct'],
+        },
+        'rmse_regression_pct': {
+            'value': rmse_regression,
+            'threshold': thresholds['max_rmse_regression_pct'],
+            'passed': rmse_regression <= thresholds['max_rmse_regression_pct'],
+        },
+        'worst_range_mape_regression': {
+            'value': float(worst_range),
+            'range': ranges.idxmax() if len(ranges) else None,
+            'threshold': thresholds['max_range_mape_regression'],
+            'passed': worst_range <= thresholds['max_range_mape_regression'],
+        },
+    }
+    if thresholds['require_significant']:
+        checks['significant_improvement'] = {
+            'value': paired['abs_error_diff_ci'][1],
+            'threshold': 0.0,
+            'passed': paired['abs_error_diff_ci'][1] < 0,
+        }
+
+    return {
+        'promote': all(check['passed'] for check in checks.values()),
+        'checks': checks,
+    }
+
+
+def compare_models(
+    champion_dir: str,
+    challenger_dirs: list,
+    data_dir: str,
+    output_dir: str = None,
+    thresholds: dict = None,
+    confidence: float = 0.95,
+    n_jobs: int = None
+) -> dict:
+    """
+    Score champion and challengers on one load of the test set and compare them.
+
+    Args:
+        champion_dir: Directory with the current model's bundle (None: no champion yet)
+        challenger_dirs: Directories with candidate model bundles
+        data_dir: Directory containing processed test data
+        output_dir: Optional directory to save comparison.json
+        thresholds: Overrides for DEFAULT_THRESHOLDS
+        confidence: Confidence level for the paired difference interval
+        n_jobs: Models scored concurrently (default: all of them)
+
+    Returns:
+        Comparison report with per-challenger results and the promoted model
+
+    Raises:
+        IncompatibleModels: If fewer than MIN_HELD_OUT_ROWS test rows are
+            held out from every model (held_out_rows)
+    """
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    feature_cols, target_col, _ = load_feature_columns(data_dir)
+    test_path = Path(data_dir) / 'test.csv'
+    # Data prepared before sale days were kept in test.csv has none
+    day_cols = [SALE_DAY_COLUMN] if SALE_DAY_COLUMN in pd.read_csv(test_path, nrows=0).columns else []
+    test_df = pd.read_csv(test_path, **read_processed_kwargs(feature_cols + [target_col] + day_cols))
+
+    model_dirs = ([champion_dir] if champion_dir else []) + list(challenger_dirs)
+    split = load_split_metadata(data_dir)['split']
+    held_out, notes = held_out_rows(model_dirs, split,
+                                    test_df[SALE_DAY_COLUMN] if day_cols else None)
+    if held_out is not None:
+        test_df = test_df[held_out]
+        if len(test_df) < MIN_HELD_OUT_ROWS:
+            raise IncompatibleModels(
+                f"Only {len(test_df)} test rows are held out from every model "
+                f"(need {MIN_HELD_OUT_ROWS}): " + "; ".join(f"{d}: {n}" for d, n in notes.items())
+            )
+    X_test, y_test = test_df[feature_cols], test_df[target_col]
+
+    predictions = score_models(model_dirs, X_test, n_jobs)
+    metrics = {model_dir: calculate_metrics(y_test, y_pred)
+               for model_dir, y_pred in predictions.items()}
+
+    print("=" * 60)
+    print("Memphis Housing Price Model - Champion vs Challenger")
+    print("=" * 60)
+    print(f"Test samples: {len(y_test):,}")
+    for model_dir, note in notes.items():
+        print(f"  {model_dir}: {note}")
+
+    report = {
+        'champion': champion_dir,
+        'test_samples': len(y_test),
+        'held_out': notes,
+        'thresholds': thresholds,
+        'champion_metrics': metrics.get(champion_dir),
+        'challengers': {},
+    }
+
+    for challenger_dir in challenger_dirs:
+        result = {'metrics': metrics[challenger_dir]}
+        print(f"\nChallenger: {challenger_dir}")
+        print("-" * 40)
+
+        if not champion_dir:
+            result['verdict'] = {'promote': True, 'checks': {}, 'reason': 'no champion'}
+            report['challengers'][challenger_dir] = result
+            print("  No champion: promote")
+            continue
+
+        champion_pred, challenger_pred = predictions[champion_dir], predictions[challenger_dir]
+        result['metric_deltas'] = {
+            name: challenger_value - metrics[champion_dir][name]
+            for name, challenger_value in metrics[challenger_dir].items()
+        }
+        result['paired'] = paired_statistics(y_test, champion_pred, challenger_pred, confidence)
+        deltas = price_range_deltas(y_test, champion_pred, challenger_pred)
+        result['price_range_deltas'] = deltas.to_dict()
+        result['verdict'] = promotion_verdict(metrics[champion_dir], metrics[challenger_dir],
+                                              result['paired'], deltas, thresholds)
+        report['challengers'][challenger_dir] = result
+
+        for name, delta in result['metric_deltas'].items():
+            better = delta > 0 if name in HIGHER_IS_BETTER else delta < 0
+            print(f"  {name:<13} {metrics[champion_dir][name]:>14,.4f} -> "
+                  f"{metrics[challenger_dir][name]:>14,.4f}  ({delta:+,.4f}{' ✓' if better else ''})")
+        paired = result['paired']
+        print(f"\n  Paired |error| diff: {paired['mean_abs_error_diff']:+,.0f} "
+              f"({confidence:.0%} CI {paired['abs_error_diff_ci'][0]:+,.0f} to "
+              f"{paired['abs_error_diff_ci'][1]:+,.0f}, p={paired['p_value']:.3g})")
+        print(f"  Challenger closer on {paired['challenger_win_rate']:.1f}% of rows, "
+              f"further on {paired['challenger_loss_rate']:.1f}%")
+        print("\n  Price range deltas (challenger - champion):")
+        print("  " + deltas.to_string().replace("\n", "\n  "))
+        print("\n  Checks:")
+        for name, check in result['verdict']['checks'].items():
+            print(f"    {'PASS' if check['passed'] else 'FAIL'}  {name}: "
+                  f"{check['value']:.4g} (threshold {check['threshold']})")
+        print(f"  Verdict: {'PROMOTE' if result['verdict']['promote'] else 'REJECT'}")
+
+    # Best promoted challenger by MAE
+    promoted = [d for d, r in report['challengers'].items() if r['verdict']['promote']]
+    report['promoted'] = min(promoted, key=lambda d: metrics[d]['mae']) if promoted else None
+    print(f"\nPromoted: {report['promoted'] or 'none (keep champion)'}")
+    print("=" * 60)
+
+    if output_dir:
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        with open(output_dir / 'comparison.json', 'w') as f:
+            json.dump(report, f, indent=2, default=lambda o: o.item() if hasattr(o, 'item') else str(o))
+        print(f"Comparison saved to {output_dir / 'comparison.json'}")
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare challenger models against the champion')
+    parser.add_argument('--champion', type=str, default=None,
+                        help='Directory with the current model bundle (omit if there is none)')
+    parser.add_argument('--challengers', type=str, nargs='+', default=['../../models'],
+                        help='Directories with candidate model bundles')
+    parser.add_argument('--data-dir', type=str, default='../../data/processed',
+                        help='Directory with processed test data')
+    parser.add_argument('--output-dir', type=str, default='../../reports',
+                        help='Output directory for comparison.json')
+    parser.add_argument('--min-mae-improvement-pct', type=float,
+                        default=DEFAULT_THRESHOLDS['min_mae_improvement_pct'],
+                        help='Required MAE improvement over the champion, in percent')
+    parser.add_argument('--max-rmse-regression-pct', type=float,
+                        default=DEFAULT_THRESHOLDS['max_rmse_regression_pct'],
+                        help='Allowed RMSE increase over the champion, in percent')
+    parser.add_argument('--max-range-mape-regression', type=float,
+                        default=DEFAULT_THRESHOLDS['max_range_mape_regression'],
+                        help='Allowed MAPE increase in any price range, in percentage points')
+    parser.add_argument('--min-range-rows', type=int,
+                        default=DEFAULT_THRESHOLDS['min_range_rows'],
+                        help='Ignore price ranges with fewer test rows in the range check')
+    parser.add_argument('--no-significance', action='store_true',
+                        help='Do not require a significant paired error improvement')
+    parser.add_argument('--confidence', type=float, default=0.95,
+                        help='Confidence level for the paired difference interval')
+    parser.add_argument('--n-jobs', type=int, default=None,
+                        help='Models scored concurrently (default: all)')
+    parser.add_argument('--fail-on-reject', action='store_true',
+                        help=f'Exit with status {REJECTED_EXIT_CODE} when no challenger is '
+                             f'promoted, or {INCOMPATIBLE_EXIT_CODE} when the test set is not '
+                             'held out from every model (errors exit with other non-zero statuses)')
+
+    args = parser.parse_args()
+
+    try:
+        report = compare_models(
+            champion_dir=args.champion,
+            challenger_dirs=args.challengers,
+            data_dir=args.data_dir,
+            output_dir=args.output_dir,
+            thresholds={
+                'min_mae_improvement_pct': args.min_mae_improvement_pct,
+                'max_rmse_regression_pct': args.max_rmse_regression_pct,
+                'max_range_mape_regression': args.max_range_mape_regression,
+                'min_range_rows': args.min_range_rows,
+                'require_significant': not args.no_significance,
+            },
+            confidence=args.confidence,
+            n_jobs=args.n_jobs
+        )
+    except IncompatibleModels as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(INCOMPATIBLE_EXIT_CODE)
+
+    if args.fail_on_reject and report['promoted'] is None:
+        sys.exit(REJECTED_EXIT_CODE)
+
+
+if __name__ == '__main__':
+    main()
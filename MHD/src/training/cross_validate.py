@@ -0,0 +1,169 @@
+"""
+K-Fold Cross-Validation for Memphis Housing Price Prediction
+
+Quantizes the training set once: the histogram cut points are sketched a
+single time on the full matrix and every fold's matrix is binned against
+them (QuantileDMatrix cannot be sliced, but ref= reuses its cuts). Folds
+then train concurrently in threads, since XGBoost releases the GIL, within
+a fixed core budget. Reports mean and std of the train_xgboost metric set.
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import xgboost as xgb
+from sklearn.model_selection import KFold
+
+from train_model import DEFAULT_PARAMS, load_training_data, native_params, regression_metrics
+
+
+def _fit_fold(fold: int, X: np.ndarray, y: np.ndarray, train_idx: np.ndarray,
+              val_idx: np.ndarray, reference: xgb.QuantileDMatrix, params: dict,
+              nthread: int, max_bin: int) -> dict:
+    """Train and score one fold against the shared quantization."""
+    start = time.perf_counter()
+    booster_params, num_boost_round = native_params(params, 'hist', nthread)
+    booster_params['max_bin'] = max_bin
+
+    dfold = xgb.QuantileDMatrix(X[train_idx], y[train_idx], ref=reference)
+    booster = xgb.train(booster_params, dfold, num_boost_round=num_boost_round)
+    y_pred = booster.inplace_predict(X[val_idx])
+
+    metrics = regression_metrics(y[val_idx], y_pred)
+    metrics['fold'] = fold
+    metrics['seconds'] = time.perf_counter() - start
+    return metrics
+
+
+def cross_validate(X_train, y_train, params: dict = None, n_folds: int = 5,
+                   n_jobs: int = None, max_bin: int = 256, seed: int = 42) -> dict:
+    """
+    Run k-fold cross-validation with folds trained concurrently.
+
+    Args:
+        X_train, y_train: Training data
+        params: XGBoost hyperparameters (default DEFAULT_PARAMS)
+        n_folds: Number of folds
+        n_jobs: Total cores to use (default: all); split evenly between folds
+        max_bin: Histogram bins per feature
+        seed: Seed for fold assignment
+
+    Returns:
+        Dictionary with per-fold metrics, mean/std summary and wall time
+    """
+    params = params or DEFAULT_PARAMS
+    n_jobs = n_jobs or os.cpu_count()
+    concurrent_folds = min(n_folds, n_jobs)
+    threads_per_fold = max(1, n_jobs // concurrent_folds)
+
+    start = time.perf_counter()
+    X = np.ascontiguousarray(X_train.to_numpy(dtype=np.float32))
+    y = y_train.to_numpy(dtype=np.float32)
+
+    # Sketch cut points once over the full training set
+    reference = xgb.QuantileDMatrix(X, y, max_bin=max_bin, nthread=n_jobs)
+    quantize_time = time.perf_counter() - start
+
+    folds = KFold(n_splits=n_folds, shuffle=True, random_state=seed).split(X)
+    with ThreadPoolExecutor(max_workers=concurrent_folds) as pool:
+        futures = [
+            pool.submit(_fit_fold, fold, X, y, train_idx, val_idx, reference,
+                        params, threads_per_fold, max_bin)
+            for fold, (train_idx, val_idx) in enumerate(folds)
+        ]
+        fold_metrics = [future.result() for future in futures]
+    wall_time = time.perf_counter() - start
+
+    summary = {}
+    for name in ('rmse', 'mae', 'r2', 'mape'):
+        values = np.array([m[name] for m in fold_metrics])
+        summary[f'{name}_mean'] = float(values.mean())
+        summary[f'{name}_std'] = float(values.std(ddof=1)) if len(values) > 1 else 0.0
+
+    return {
+        'n_folds': n_folds,
+        'concurrent_folds': concurrent_folds,
+        'threads_per_fold': threads_per_fold,
+        'folds': fold_metrics,
+        'summary': summary,
+        'quantize_time_s': quantize_time,
+        'wall_time_s': wall_time,
+        'fold_time_sum_s': float(sum(m['seconds'] for m in fold_metrics)),
+    }
+
+
+def sequential_baseline(X_train, y_train, params: dict = None, n_folds: int = 5,
+                        max_bin: int = 256, seed: int = 42) -> float:
+    """Wall time of k independent fits, each quantizing its own fold from scratch."""
+    params = params or DEFAULT_PARAMS
+    booster_params, num_boost_round = native_params(params, 'hist')
+    booster_params['max_bin'] = max_bin
+
+    start = time.perf_counter()
+    for train_idx, val_idx in KFold(n_splits=n_folds, shuffle=True, random_state=seed).split(X_train):
+        dtrain = xgb.QuantileDMatrix(X_train.iloc[train_idx], y_train.iloc[train_idx],
+                                     max_bin=max_bin)
+        booster = xgb.train(booster_params, dtrain, num_boost_round=num_boost_round)
+        booster.inplace_predict(X_train.iloc[val_idx])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cross-validate Memphis housing price model')
+    parser.add_argument('--data-dir', type=str, default='../../data/processed',
+                        help='Directory with processed data')
+    parser.add_argument('--output-dir', type=str, default='../../reports',
+                        help='Output directory for the CV report')
+    parser.add_argument('--folds', type=int, default=5,
+                        help='Number of folds')
+    parser.add_argument('--n-jobs', type=int, default=None,
+                        help='Total cores to use (default: all)')
+    parser.add_argument('--max-bin', type=int, default=256,
+                        help='Histogram bins per feature')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='Random seed for fold assignment')
+    parser.add_argument('--compare-sequential', action='store_true',
+                        help='Also time k separate fits for comparison')
+
+    args = parser.parse_args()
+
+    X_train, _, y_train, _, _ = load_training_data(args.data_dir)
+
+    report = cross_validate(X_train, y_train, n_folds=args.folds, n_jobs=args.n_jobs,
+                            max_bin=args.max_bin, seed=args.seed)
+    if args.compare_sequential:
+        report['sequential_wall_time_s'] = sequential_baseline(
+            X_train, y_train, n_folds=args.folds, max_bin=args.max_bin, seed=args.seed
+        )
+
+    summary = report['summary']
+    print("\n" + "="*50)
+    print(f"{args.folds}-Fold Cross-Validation")
+    print("="*50)
+    print(f"  RMSE:  ${summary['rmse_mean']:,.0f} ± ${summary['rmse_std']:,.0f}")
+    print(f"  MAE:   ${summary['mae_mean']:,.0f} ± ${summary['mae_std']:,.0f}")
+    print(f"  R²:    {summary['r2_mean']:.4f} ± {summary['r2_std']:.4f}")
+    print(f"  MAPE:  {summary['mape_mean']:.2f}% ± {summary['mape_std']:.2f}%")
+    print(f"\n  {report['concurrent_folds']} concurrent folds x "
+          f"{report['threads_per_fold']} threads")
+    print(f"  Wall time: {report['wall_time_s']:.2f}s "
+          f"(quantize {report['quantize_time_s']:.2f}s, "
+          f"sum of folds {report['fold_time_sum_s']:.2f}s)")
+    if 'sequential_wall_time_s' in report:
+        print(f"  Sequential k fits: {report['sequential_wall_time_s']:.2f}s "
+              f"({report['sequential_wall_time_s'] / report['wall_time_s']:.1f}x slower)")
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with open(output_dir / 'cv_report.json', 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport saved to {output_dir / 'cv_report.json'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Drift Reference Distributions for Memphis Housing Price Prediction
+
+Summarizes the training rows as binned distributions, one per model feature
+plus one for the target (the reference for served predictions). The serving
+app (src/serving/drift.py) bins live traffic with the same edges and
+compares the two.
+
+Bins are defined by sorted edges e_1..e_k and the rule "bin = number of edges
+below the value", i.e. (-inf, e_1], (e_1, e_2], ..., (e_k, inf):
+
+- numeric columns: edges at the training deciles
+- categorical codes 0..K-1: edges at -0.5, 0.5, ..., K-0.5, so each code has
+  its own bin and the first and last bins hold out-of-vocabulary codes
+  (e.g. -1 for a neighborhood that was not in training)
+
+Counts are additive, so the streaming prep path can accumulate them chunk
+by chunk with edges taken from its first chunk.
+"""
+
+import numpy as np
+import pandas as pd
+
+N_BINS = 10
+
+# Reference key for served predictions (binned like the target)
+PREDICTION = 'prediction'
+
+
+def reference_edges(df: pd.DataFrame, feature_cols: list, target_col: str,
+                    categories: dict, n_bins: int = N_BINS) -> dict:
+    """
+    Choose bin edges for every feature and the target.
+
+    Args:
+        df: Training rows
+        feature_cols: Model feature columns
+        target_col: Target column (binned under the PREDICTION key)
+        categories: Categorical column -> list of category labels, for columns
+            holding codes 0..K-1
+
+    Returns:
+        Dictionary of column -> {'kind', 'edges'[, 'labels']}
+    """
+    quantiles = np.linspace(0, 1, n_bins + 1)[1:-1]
+    edges = {}
+    for column in feature_cols + [target_col]:
+        name = PREDICTION if column == target_col else column
+        if column in categories:
+            labels = [str(label) for label in categories[column]]
+            edges[name] = {
+                'kind': 'categorical',
+                'edges': (np.arange(len(labels) + 1) - 0.5).tolist(),
+                'labels': labels,
+            }
+        else:
+            values = df[column].to_numpy(dtype=np.float64)
+            edges[name] = {
+                'kind': 'numeric',
+                'edges': np.unique(np.quantile(values, quantiles)).tolist(),
+            }
+    return edges
+
+
+def bin_counts(df: pd.DataFrame, edges: dict, target_col: str) -> dict:
+    """Count rows per bin for every column in edges."""
+    counts = {}
+    for name, spec in edges.items():
+        column = target_col if name == PREDICTION else name
+        bins = np.searchsorted(spec['edges'], df[column].to_numpy(dtype=np.float64), side='left')
+        counts[name] = np.bincount(bins, minlength=len(spec['edges']) + 1)
+    return counts
+
+
+def add_counts(total: dict, counts: dict) -> dict:
+    """Accumulate bin counts across chunks."""
+    if not total:
+        return {name: c.copy() for name, c in counts.items()}
+    for name, c in counts.items():
+        total[name] += c
+    return total
+
+
+def build_reference(edges: dict, counts: dict) -> dict:
+    """
+    Combine edges and counts into the reference stored in feature_info.json.
+
+    Returns:
+        Dictionary with 'rows' and 'columns': column -> {'kind', 'edges',
+        'proportions'[, 'labels']}
+    """
+    rows = int(next(iter(counts.values())).sum()) if counts else 0
+    columns = {}
+    for name, spec in edges.items():
+        proportions = counts[name] / max(rows, 1)
+        columns[name] = {**spec, 'proportions': [round(float(p), 6) for p in proportions]}
+    return {'rows': rows, 'columns': columns}
@@ -0,0 +1,111 @@
+"""
+Segment Error Cube for Memphis Housing Price Prediction
+
+Error statistics for every combination of segment dimensions (neighborhood,
+property type, zip code, price range), like SQL's GROUP BY CUBE.
+
+Rows are aggregated once, into additive sums per finest cell (one row per
+observed combination of all dimensions). Every coarser grouping is then a
+sum over those cells, so the row data is only grouped once, and cells from
+different chunks or shards merge by adding them (see streaming_eval.py).
+"""
+
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CUBE_FILENAME = 'segment_error_cube.parquet'
+
+# Additive per-cell sums; the cube's statistics are ratios of these
+_SUM_COLUMNS = ['count', 'sum_error', 'sum_abs_error', 'sum_pct_error']
+
+
+def segment_cells(segments: pd.DataFrame, y_true, y_pred, price_bins: list,
+                  price_labels: list) -> pd.DataFrame:
+    """
+    Aggregate rows into additive error sums per finest segment cell.
+
+    Args:
+        segments: Segment key columns, aligned with y_true/y_pred
+        y_true, y_pred: Actual and predicted prices
+        price_bins, price_labels: Price ranges added as a dimension
+
+    Returns:
+        DataFrame indexed by every segment dimension with _SUM_COLUMNS
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    errors = np.asarray(y_pred, dtype=np.float64) - y_true
+    abs_errors = np.abs(errors)
+
+    frame = segments.reset_index(drop=True).astype(str).assign(
+        price_range=pd.cut(y_true, bins=price_bins, labels=price_labels).astype(str),
+        count=1,
+        sum_error=errors,
+        sum_abs_error=abs_errors,
+        sum_pct_error=abs_errors / y_true * 100,
+    )
+    dimensions = list(segments.columns) + ['price_range']
+    return frame.groupby(dimensions, sort=False)[_SUM_COLUMNS].sum()
+
+
+def merge_cells(*cells: pd.DataFrame) -> pd.DataFrame:
+    """Combine cell sums from several chunks or shards."""
+    cells = [c for c in cells if c is not None]
+    if not cells:
+        return None
+    if len(cells) == 1:
+        return cells[0]
+    combined = pd.concat(cells)
+    return combined.groupby(level=list(combined.index.names), sort=False).sum()
+
+
+def error_cube(cells: pd.DataFrame) -> pd.DataFrame:
+    """
+    Roll finest cells up to every grouping of the segment dimensions.
+
+    Returns:
+        One row per (grouping, segment): a 'grouping' column naming the
+        dimensions grouped by ('ALL' for the total), one column per
+        dimension (null where rolled up), count, mae, mape and bias
+    """
+    dimensions = list(cells.index.names)
+    parts = []
+    for size in range(len(dimensions) + 1):
+        for grouping in combinations(dimensions, size):
+            if grouping:
+                rolled = cells.groupby(level=list(grouping), sort=True).sum().reset_index()
+            else:
+                rolled = cells.sum().to_frame().T
+            rolled.insert(0, 'grouping', ','.join(grouping) or 'ALL')
+            parts.append(rolled)
+
+    cube = pd.concat(parts, ignore_index=True)[['grouping'] + dimensions + _SUM_COLUMNS]
+    cube['count'] = cube['count'].astype('int64')
+    cube['mae'] = cube['sum_abs_error'] / cube['count']
+    cube['mape'] = cube['sum_pct_error'] / cube['count']
+    cube['bias'] = cube['sum_error'] / cube['count']
+    return cube.drop(columns=_SUM_COLUMNS[1:])
+
+
+def write_cube(cube: pd.DataFrame, output_dir) -> Path:
+    """Write the cube as parquet (query it with pandas, DuckDB, Spark, ...)."""
+    path = Path(output_dir) / CUBE_FILENAME
+    cube.to_parquet(path, index=False)
+    return path
+
+
+def worst_segments(cube: pd.DataFrame, min_count: int = 30, n: int = 5) -> pd.DataFrame:
+    """Single-dimension segments with the highest MAPE among those with enough rows."""
+    single = cube[~cube['grouping'].str.contains(',') & (cube['grouping'] != 'ALL')]
+    single = single[single['count'] >= min_count]
+    worst = single.nlargest(n, 'mape')
+    return pd.DataFrame({
+        'dimension': worst['grouping'],
+        'segment': [row[row['grouping']] for _, row in worst.iterrows()],
+        'count': worst['count'],
+        'mae': worst['mae'].round(0),
+        'mape': worst['mape'].round(2),
+        'bias': worst['bias'].round(0),
+    }).reset_index(drop=True)
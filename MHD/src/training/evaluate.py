@@ -4,7 +4,13 @@ Model Evaluation for Memphis Housing Price Prediction
 Comprehensive evaluation of the trained model including:
 - Performance metrics
 - Error analysis
-- Predictions by segment
+- Predictions by segment (error cube over neighborhood, property type,
+  zip code and price range, written to segment_error_cube.parquet)
+- Accuracy versus latency of each latency tier in the bundle
+
+With --streaming, the holdout is evaluated in parallel shards and bounded
+memory (see streaming_eval.py); the report has the same structure, with
+medians from quantile sketches.
 """
 
 import pandas as pd
@@ -12,27 +18,46 @@ import numpy as np
 from pathlib import Path
 import argparse
 import json
-import joblib
+import time
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 
+from bootstrap import bootstrap_metrics
+from bundle import BUNDLE_FILENAME, load_bundle
+from error_cube import error_cube, segment_cells, worst_segments, write_cube
+from profiling import NULL_PROFILER, StageProfiler
+from schema import read_processed_kwargs
+from segment_models import SegmentedModel, load_segmented_model
+from streaming_eval import evaluate_streaming
+from tracking import MLFLOW_AVAILABLE, BackgroundTracker
+
+# Price ranges for the per-range breakdown (right-inclusive, as pd.cut)
+PRICE_BINS = [0, 100000, 200000, 300000, 500000, float('inf')]
+PRICE_LABELS = ['<$100K', '$100K-$200K', '$200K-$300K', '$300K-$500K', '>$500K']
+
+
+def load_feature_columns(data_dir: str) -> tuple:
+    """Return (feature_cols, target_col, segment_cols) from feature_info.json."""
+    with open(Path(data_dir) / 'feature_info.json', 'r') as f:
+        feature_info = json.load(f)
+    # Data prepared before segment keys were kept in test.csv has none
+    return (feature_info['feature_columns'], feature_info['target_column'],
+            feature_info.get('segment_columns', []))
+
 
 def load_model_and_data(model_dir: str, data_dir: str) -> tuple:
     """Load trained model and test data."""
     model_dir = Path(model_dir)
     data_dir = Path(data_dir)
 
-    # Load model
-    model = joblib.load(model_dir / 'model.joblib')
-
-    # Load test data
-    test_df = pd.read_csv(data_dir / 'test.csv')
+    # Load model (segmented bundles route each row to its segment's booster)
+    model = load_segmented_model(model_dir)
 
     # Load feature info
-    with open(data_dir / 'feature_info.json', 'r') as f:
-        feature_info = json.load(f)
+    feature_cols, target_col, segment_cols = load_feature_columns(data_dir)
 
-    feature_cols = feature_info['feature_columns']
-    target_col = feature_info['target_column']
+    # Load test data
+    test_df = pd.read_csv(data_dir / 'test.csv',
+                          **read_processed_kwargs(feature_cols + [target_col] + segment_cols))
 
     X_test = test_df[feature_cols]
     y_test = test_df[target_col]
@@ -60,6 +85,63 @@ def calculate_metrics(y_true, y_pred) -> dict:
     return metrics
 
 
+def _median_seconds(fn, calls) -> float:
+    times = []
+    for args in calls:
+        start = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def evaluate_tiers(model, model_dir: str, X_test: pd.DataFrame, y_test,
+                   repeats: int = 200, batch_size: int = 1000) -> list:
+    """
+    Accuracy versus latency of each model tier in the bundle.
+
+    'full' is the evaluated model; the others are the bundle's latency tiers
+    (a booster over a subset of the feature columns). Latency is measured as
+    served, on float32 feature rows: the median of repeats single-row
+    predictions, and the per-row time of batch_size-row predictions.
+    """
+    bundle = load_bundle(Path(model_dir) / BUNDLE_FILENAME)
+    feature_cols = bundle['feature_spec']['feature_columns']
+    X = np.ascontiguousarray(X_test[feature_cols], dtype=np.float32)
+    y_true = np.asarray(y_test, dtype=np.float64)
+
+    full = model.get_booster()
+    tiers = {'full': (model.predict if isinstance(model, SegmentedModel) else full.inplace_predict,
+                      full, feature_cols)}
+    for name, spec in bundle['feature_spec'].get('tiers', {}).items():
+        booster = bundle['boosters'][spec['booster']]
+        positions = [feature_cols.index(c) for c in spec['feature_columns']]
+        tiers[name] = (
+            lambda A, booster=booster, positions=positions:
+                booster.inplace_predict(np.ascontiguousarray(A[:, positions])),
+            booster, spec['feature_columns']
+        )
+
+    results = []
+    batch = X[:batch_size]
+    for name, (predict, booster, columns) in tiers.items():
+        metrics = calculate_metrics(y_true, np.asarray(predict(X), dtype=np.float64))
+        predict(X[:1])
+        single = _median_seconds(predict, [(X[i % len(X)][None, :],) for i in range(repeats)])
+        batched = _median_seconds(predict, [(batch,)] * 5)
+        results.append({
+            'tier': name,
+            'trees': booster.num_boosted_rounds(),
+            'features': len(columns),
+            **{k: float(metrics[k]) for k in ('rmse', 'mae', 'mape', 'r2', 'within_10pct')},
+            'single_row_us': single * 1e6,
+            'batch_us_per_row': batched / len(batch) * 1e6,
+        })
+    for result in results:
+        result['single_row_speedup'] = results[0]['single_row_us'] / result['single_row_us']
+        result['batch_speedup'] = results[0]['batch_us_per_row'] / result['batch_us_per_row']
+    return results
+
+
 def analyze_by_price_range(y_true, y_pred) -> pd.DataFrame:
     """Analyze model performance by price range."""
     df = pd.DataFrame({
@@ -71,9 +153,7 @@ def analyze_by_price_range(y_true, y_pred) -> pd.DataFrame:
     })
 
     # Define price ranges
-    bins = [0, 100000, 200000, 300000, 500000, float('inf')]
-    labels = ['<$100K', '$100K-$200K', '$200K-$300K', '$300K-$500K', '>$500K']
-    df['price_range'] = pd.cut(df['actual'], bins=bins, labels=labels)
+    df['price_range'] = pd.cut(df['actual'], bins=PRICE_BINS, labels=PRICE_LABELS)
 
     # Aggregate by price range
     summary = df.groupby('price_range', observed=True).agg({
@@ -119,7 +199,14 @@ def analyze_errors(y_true, y_pred, threshold_pct: float = 25) -> dict:
 def generate_evaluation_report(
     model_dir: str,
     data_dir: str,
-    output_dir: str = None
+    output_dir: str = None,
+    profiler: StageProfiler = None,
+    streaming: bool = False,
+    data_paths: list = None,
+    n_jobs: int = None,
+    n_shards: int = None,
+    bootstrap_resamples: int = 0,
+    confidence: float = 0.95
 ) -> dict:
     """
     Generate comprehensive evaluation report.
@@ -128,108 +215,190 @@ def generate_evaluation_report(
         model_dir: Directory containing trained model
         data_dir: Directory containing processed test data
         output_dir: Optional directory to save report
+        profiler: Records the load, predict, analyze and save stages
+        streaming: Evaluate in shards with bounded memory (no predictions.csv)
+        data_paths: CSV/parquet files to evaluate in streaming mode
+            (default: data_dir/test.csv)
+        n_jobs: Streaming/bootstrap worker processes (default: all cores)
+        n_shards: Streaming work units (default: 4 per worker)
+        bootstrap_resamples: Bootstrap resamples for metric confidence
+            intervals (0 = none; needs row-level predictions, so not streaming)
+        confidence: Bootstrap interval coverage
 
     Returns:
         Dictionary with evaluation results
     """
-    # Load model and data
-    model, X_test, y_test, test_df, feature_cols = load_model_and_data(model_dir, data_dir)
+    profiler = profiler or NULL_PROFILER
+
+    if streaming:
+        with profiler.stage('load'):
+            model = load_segmented_model(model_dir)
+            feature_cols, target_col, segment_cols = load_feature_columns(data_dir)
+    else:
+        # Load model and data
+        with profiler.stage('load') as stage:
+            model, X_test, y_test, test_df, feature_cols = load_model_and_data(model_dir, data_dir)
+            segment_cols = load_feature_columns(data_dir)[2]
+            stage['rows'] = len(X_test)
 
     print("="*60)
     print("Memphis Housing Price Model - Evaluation Report")
     print("="*60)
 
-    # Make predictions
-    y_pred = model.predict(X_test)
+    if streaming:
+        # Reading, predicting and accumulating happen together in the shard workers
+        with profiler.stage('predict') as stage:
+            accumulator = evaluate_streaming(
+                model_dir, data_paths or [Path(data_dir) / 'test.csv'], feature_cols,
+                target_col, PRICE_BINS, PRICE_LABELS, segment_cols=segment_cols,
+                n_shards=n_shards, n_jobs=n_jobs
+            )
+            n_samples = stage['rows'] = accumulator.count
+    else:
+        # Make predictions
+        with profiler.stage('predict') as stage:
+            y_pred = model.predict(X_test)
+            n_samples = stage['rows'] = len(X_test)
 
     # Calculate metrics
-    metrics = calculate_metrics(y_test, y_pred)
-
-    print("\n1. OVERALL PERFORMANCE")
-    print("-"*40)
-    print(f"  RMSE:         ${metrics['rmse']:,.0f}")
-    print(f"  MAE:          ${metrics['mae']:,.0f}")
-    print(f"  Median AE:    ${metrics['median_ae']:,.0f}")
-    print(f"  R² Score:     {metrics['r2']:.4f}")
-    print(f"  MAPE:         {metrics['mape']:.2f}%")
-    print(f"  Max Error:    ${metrics['max_error']:,.0f}")
-
-    print("\n  Prediction Accuracy:")
-    print(f"    Within 5%:  {metrics['within_5pct']:.1f}%")
-    print(f"    Within 10%: {metrics['within_10pct']:.1f}%")
-    print(f"    Within 20%: {metrics['within_20pct']:.1f}%")
-
-    # Analyze by price range
-    print("\n2. PERFORMANCE BY PRICE RANGE")
-    print("-"*40)
-    price_analysis = analyze_by_price_range(y_test, y_pred)
-    print(price_analysis.to_string())
-
-    # Error analysis
-    print("\n3. ERROR ANALYSIS")
-    print("-"*40)
-    error_analysis = analyze_errors(y_test, y_pred)
-    print(f"  Mean Error (Bias): ${error_analysis['mean_error']:,.0f}")
-    print(f"  Std of Errors:     ${error_analysis['std_error']:,.0f}")
-    print(f"  Overpredict Rate:  {error_analysis['overpredict_rate']:.1f}%")
-    print(f"  Underpredict Rate: {error_analysis['underpredict_rate']:.1f}%")
-    print(f"  Large Errors (>25%): {error_analysis['large_error_rate']:.1f}%")
-
-    print("\n  Worst Predictions:")
-    for i, wp in enumerate(error_analysis['worst_predictions'][:3], 1):
-        print(f"    {i}. Actual: ${wp['actual']:,.0f}, Predicted: ${wp['predicted']:,.0f} "
-              f"(Error: {wp['pct_error']:.1f}%)")
-
-    # Feature importance
-    print("\n4. FEATURE IMPORTANCE")
-    print("-"*40)
-    importance = model.feature_importances_
-    importance_df = pd.DataFrame({
-        'feature': feature_cols,
-        'importance': importance
-    }).sort_values('importance', ascending=False)
-
-    for _, row in importance_df.head(10).iterrows():
-        bar = "█" * int(row['importance'] * 50)
-        print(f"  {row['feature']:<25} {row['importance']:.4f} {bar}")
+    with profiler.stage('analyze') as stage:
+        stage['rows'] = n_samples
+        if streaming:
+            metrics = accumulator.metrics()
+            price_analysis = accumulator.price_range_analysis()
+            error_analysis = accumulator.error_analysis()
+            cells = accumulator.cells
+        else:
+            metrics = calculate_metrics(y_test, y_pred)
+            price_analysis = analyze_by_price_range(y_test, y_pred)
+            error_analysis = analyze_errors(y_test, y_pred)
+            cells = (segment_cells(test_df[segment_cols], y_test, y_pred, PRICE_BINS, PRICE_LABELS)
+                     if segment_cols else None)
+        cube = error_cube(cells) if cells is not None else None
+
+        intervals = None
+        if bootstrap_resamples and not streaming:
+            intervals = bootstrap_metrics(y_test, y_pred, n_resamples=bootstrap_resamples,
+                                          confidence=confidence, n_jobs=n_jobs)
+
+        print("\n1. OVERALL PERFORMANCE")
+        print("-"*40)
+        print(f"  RMSE:         ${metrics['rmse']:,.0f}")
+        print(f"  MAE:          ${metrics['mae']:,.0f}")
+        print(f"  Median AE:    ${metrics['median_ae']:,.0f}")
+        print(f"  R² Score:     {metrics['r2']:.4f}")
+        print(f"  MAPE:         {metrics['mape']:.2f}%")
+        print(f"  Max Error:    ${metrics['max_error']:,.0f}")
+
+        print("\n  Prediction Accuracy:")
+        print(f"    Within 5%:  {metrics['within_5pct']:.1f}%")
+        print(f"    Within 10%: {metrics['within_10pct']:.1f}%")
+        print(f"    Within 20%: {metrics['within_20pct']:.1f}%")
+
+        if intervals:
+            print(f"\n  {confidence:.0%} Bootstrap Intervals ({bootstrap_resamples} resamples):")
+            for name, ci in intervals.items():
+                print(f"    {name:<13} [{ci['lower']:.6g}, {ci['upper']:.6g}]")
+
+        # Analyze by price range
+        print("\n2. PERFORMANCE BY PRICE RANGE")
+        print("-"*40)
+        print(price_analysis.to_string())
+
+        # Error analysis
+        print("\n3. ERROR ANALYSIS")
+        print("-"*40)
+        print(f"  Mean Error (Bias): ${error_analysis['mean_error']:,.0f}")
+        print(f"  Std of Errors:     ${error_analysis['std_error']:,.0f}")
+        print(f"  Overpredict Rate:  {error_analysis['overpredict_rate']:.1f}%")
+        print(f"  Underpredict Rate: {error_analysis['underpredict_rate']:.1f}%")
+        print(f"  Large Errors (>25%): {error_analysis['large_error_rate']:.1f}%")
+
+        print("\n  Worst Predictions:")
+        for i, wp in enumerate(error_analysis['worst_predictions'][:3], 1):
+            print(f"    {i}. Actual: ${wp['actual']:,.0f}, Predicted: ${wp['predicted']:,.0f} "
+                  f"(Error: {wp['pct_error']:.1f}%)")
+
+        # Feature importance
+        print("\n4. FEATURE IMPORTANCE")
+        print("-"*40)
+        importance = model.feature_importances_
+        importance_df = pd.DataFrame({
+            'feature': feature_cols,
+            'importance': importance
+        }).sort_values('importance', ascending=False)
+
+        for _, row in importance_df.head(10).iterrows():
+            bar = "█" * int(row['importance'] * 50)
+            print(f"  {row['feature']:<25} {row['importance']:.4f} {bar}")
+
+        if cube is not None:
+            print("\n5. WORST SEGMENTS (by MAPE)")
+            print("-"*40)
+            worst = worst_segments(cube)
+            print(worst.to_string(index=False))
+
+    # Latency tiers (needs the test rows in memory)
+    tiers = None
+    if not streaming:
+        with profiler.stage('tiers') as stage:
+            tiers = evaluate_tiers(model, model_dir, X_test, y_test)
+            stage['rows'] = len(X_test) * len(tiers)
+
+        print("\n6. ACCURACY VS LATENCY BY TIER")
+        print("-"*40)
+        print(f"  {'tier':<8} {'trees':>5} {'features':>8} {'MAPE':>7} {'RMSE':>9} "
+              f"{'1 row':>9} {'per row':>9} {'speedup':>13}")
+        for t in tiers:
+            print(f"  {t['tier']:<8} {t['trees']:>5} {t['features']:>8} {t['mape']:>6.2f}% "
+                  f"{'$' + format(t['rmse'], ',.0f'):>9} {t['single_row_us']:>7.0f}us {t['batch_us_per_row']:>7.1f}us "
+                  f"{t['single_row_speedup']:>5.1f}x/{t['batch_speedup']:.1f}x")
 
     # Compile report
     report = {
         'metrics': metrics,
+        'metric_intervals': intervals,
         'price_range_analysis': price_analysis.to_dict(),
         'error_analysis': error_analysis,
         'feature_importance': importance_df.to_dict('records'),
-        'test_samples': len(y_test),
+        'test_samples': n_samples,
+        'worst_segments': worst.to_dict('records') if cube is not None else None,
+        'tiers': tiers,
     }
 
     # Save report if output directory specified
     if output_dir:
-        output_dir = Path(output_dir)
-        output_dir.mkdir(parents=True, exist_ok=True)
-
-        with open(output_dir / 'evaluation_report.json', 'w') as f:
-            # Convert numpy types for JSON serialization
-            def convert(o):
-                if isinstance(o, np.integer):
-                    return int(o)
-                if isinstance(o, np.floating):
-                    return float(o)
-                if isinstance(o, np.ndarray):
-                    return o.tolist()
-                return o
-
-            json.dump(report, f, indent=2, default=convert)
-
-        # Save predictions
-        predictions_df = pd.DataFrame({
-            'actual': y_test,
-            'predicted': y_pred,
-            'error': y_pred - y_test,
-            'pct_error': np.abs(y_pred - y_test) / y_test * 100
-        })
-        predictions_df.to_csv(output_dir / 'predictions.csv', index=False)
-
-        print(f"\nReports saved to {output_dir}")
+        with profiler.stage('save'):
+            output_dir = Path(output_dir)
+            output_dir.mkdir(parents=True, exist_ok=True)
+
+            with open(output_dir / 'evaluation_report.json', 'w') as f:
+                # Convert numpy types for JSON serialization
+                def convert(o):
+                    if isinstance(o, np.integer):
+                        return int(o)
+                    if isinstance(o, np.floating):
+                        return float(o)
+                    if isinstance(o, np.ndarray):
+                        return o.tolist()
+                    return o
+
+                json.dump(report, f, indent=2, default=convert)
+
+            if cube is not None:
+                write_cube(cube, output_dir)
+
+            # Save predictions (row-level output is unbounded in streaming mode)
+            if not streaming:
+                predictions_df = pd.DataFrame({
+                    'actual': y_test,
+                    'predicted': y_pred,
+                    'error': y_pred - y_test,
+                    'pct_error': np.abs(y_pred - y_test) / y_test * 100
+                })
+                predictions_df.to_csv(output_dir / 'predictions.csv', index=False)
+
+            print(f"\nReports saved to {output_dir}")
 
     print("\n" + "="*60)
 
@@ -244,15 +413,57 @@ def main():
                         help='Directory with processed test data')
     parser.add_argument('--output-dir', type=str, default='../../reports',
                         help='Output directory for evaluation report')
+    parser.add_argument('--streaming', action='store_true',
+                        help='Evaluate in parallel shards with bounded memory')
+    parser.add_argument('--data', type=str, nargs='+', default=None,
+                        help='CSV/parquet files to evaluate with --streaming (default: test.csv)')
+    parser.add_argument('--n-jobs', type=int, default=None,
+                        help='Streaming worker processes (default: all cores)')
+    parser.add_argument('--shards', type=int, default=None,
+                        help='Streaming work units (default: 4 per worker)')
+    parser.add_argument('--bootstrap', type=int, default=0,
+                        help='Bootstrap resamples for metric confidence intervals (0 = off)')
+    parser.add_argument('--confidence', type=float, default=0.95,
+                        help='Bootstrap interval coverage')
+    parser.add_argument('--sample-profile', action='store_true',
+                        help='Sample stacks of the slowest stage into a .folded file')
+    parser.add_argument('--tracking-store', type=str, default=None,
+                        help='Local store that buffers tracking events (default: MHD/.tracking)')
+    parser.add_argument('--tracking-timeout', type=float, default=30.0,
+                        help='Seconds to wait for buffered tracking uploads before exiting')
 
     args = parser.parse_args()
+    if args.bootstrap and args.streaming:
+        parser.error('--bootstrap needs row-level predictions and cannot be used with --streaming')
 
+    profiler = StageProfiler('evaluate', sample=args.sample_profile)
     generate_evaluation_report(
         model_dir=args.model_dir,
         data_dir=args.data_dir,
-        output_dir=args.output_dir
+        output_dir=args.output_dir,
+        profiler=profiler,
+        streaming=args.streaming,
+        data_paths=args.data,
+        n_jobs=args.n_jobs,
+        n_shards=args.shards,
+        bootstrap_resamples=args.bootstrap,
+        confidence=args.confidence
     )
 
+    profiler.print_summary()
+    profiler.write(args.output_dir)
+
+    # Attach the evaluation profile to the run that produced the model
+    with open(Path(args.model_dir) / 'model_metadata.json') as f:
+        metadata = json.load(f)
+    if MLFLOW_AVAILABLE and metadata.get('tracking_run_key'):
+        tracker = BackgroundTracker(store_dir=args.tracking_store)
+        try:
+            tracker.resume_run(metadata['tracking_run_key']).log_metrics(profiler.metrics())
+        except FileNotFoundError as e:
+            print(f"Profile not logged: {e}")
+        tracker.close(timeout=args.tracking_timeout)
+
 
 if __name__ == '__main__':
     main()
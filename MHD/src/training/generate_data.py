@@ -8,6 +8,7 @@ Based on actual Memphis housing market characteristics.
 import pandas as pd
 import numpy as np
 from pathlib import Path
+import argparse
 
 # Memphis neighborhoods with their characteristics
 # (neighborhood, median_price_factor, avg_sqft, crime_index, school_rating)
@@ -209,16 +210,23 @@ def generate_memphis_housing_data(n_samples: int = 5000, seed: int = 42) -> pd.D
 
 def main():
     """Generate and save Memphis housing data."""
-    print("Generating Memphis Housing Data...")
+    default_output = Path(__file__).parent.parent.parent / "data" / "raw" / "memphis_housing.csv"
+
+    parser = argparse.ArgumentParser(description='Generate synthetic Memphis housing data')
+    parser.add_argument('--n-samples', type=int, default=5000,
+                        help='Number of records to generate')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='Random seed')
+    parser.add_argument('--output', type=str, default=str(default_output),
+                        help='Output CSV path')
+    args = parser.parse_args()
 
-    # Generate 5000 records
-    df = generate_memphis_housing_data(n_samples=5000, seed=42)
+    print("Generating Memphis Housing Data...")
 
-    # Save to data/raw directory
-    output_dir = Path(__file__).parent.parent.parent / "data" / "raw"
-    output_dir.mkdir(parents=True, exist_ok=True)
+    df = generate_memphis_housing_data(n_samples=args.n_samples, seed=args.seed)
 
-    output_path = output_dir / "memphis_housing.csv"
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
     df.to_csv(output_path, index=False)
 
     print(f"Generated {len(df)} records")
@@ -0,0 +1,358 @@
+"""
+Pipeline Runner for Memphis Housing Model
+
+Runs generate -> prep -> train -> evaluate as a DAG of stages. Each stage's
+inputs (code, parameters and upstream artifacts) are content-hashed; a stage
+is skipped when its recorded hash matches and its outputs are unchanged.
+Per-stage wall time is reported.
+
+The scheduler launches every stage whose dependencies have finished, up to
+--jobs at once. The four stages form a strict chain today, so they run one
+after another; the concurrency only pays off once stages that do not
+depend on each other are added.
+"""
+
+import ast
+import argparse
+import hashlib
+import json
+import shlex
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+
+TRAINING_DIR = Path(__file__).resolve().parent
+
+# Bump to invalidate every cached stage (e.g. after changing the hashing scheme)
+CACHE_VERSION = 1
+
+
+def hash_file(path: Path, h=None):
+    """Feed a file's contents into a hash object (sha256 by default)."""
+    h = h or hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h
+
+
+def hash_path(path: Path, stat_cache: dict = None) -> str:
+    """
+    Content hash of a file or directory tree.
+
+    If stat_cache maps a file path to a previous (size, mtime_ns, digest)
+    record, the digest is reused when size and mtime are unchanged.
+    """
+    path = Path(path)
+    if not path.exists():
+        return 'missing'
+
+    files = [path] if path.is_file() else sorted(p for p in path.rglob('*') if p.is_file())
+    h = hashlib.sha256()
+    for file in files:
+        stat = file.stat()
+        cached = (stat_cache or {}).get(str(file))
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            digest = cached[2]
+        else:
+            digest = hash_file(file).hexdigest()
+            if stat_cache is not None:
+                stat_cache[str(file)] = (stat.st_size, stat.st_mtime_ns, digest)
+        h.update(str(file.relative_to(path) if path.is_dir() else file.name).encode())
+        h.update(digest.encode())
+    return h.hexdigest()
+
+
+def local_modules(script: str) -> list:
+    """Return script plus every module in the training directory it imports, recursively."""
+    seen = []
+    pending = [script]
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.append(name)
+        tree = ast.parse((TRAINING_DIR / name).read_text())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                modules = [node.module]
+            else:
+                continue
+            for module in modules:
+                candidate = f"{module.split('.')[0]}.py"
+                if (TRAINING_DIR / candidate).exists():
+                    pending.append(candidate)
+    return sorted(seen)
+
+
+def option_value(arguments: list, option: str):
+    """Value of the last `option VALUE` or `option=VALUE` in an argument list (None if absent)."""
+    value = None
+    for i, argument in enumerate(arguments):
+        if argument == option and i + 1 < len(arguments):
+            value = arguments[i + 1]
+        elif argument.startswith(option + '='):
+            value = argument.split('=', 1)[1]
+    return value
+
+
+def build_stages(args) -> dict:
+    """Define the pipeline stages and their dependencies."""
+    data_root = Path(args.data_root).resolve()
+    raw_csv = data_root / 'raw' / 'memphis_housing.csv'
+    processed = data_root / 'processed'
+    model_dir = Path(args.model_dir).resolve()
+    reports_dir = Path(args.reports_dir).resolve()
+
+    prep_extra = shlex.split(args.prep_args)
+    if args.chunksize:
+        prep_extra += ['--chunksize', str(args.chunksize)]
+    prep_outputs = [processed / 'train.csv', processed / 'test.csv',
+                    processed / 'feature_info.json']
+    # Prep writes no comparables index with --comparables-per-neighborhood 0
+    if int(option_value(prep_extra, '--comparables-per-neighborhood') or 1):
+        prep_outputs.append(processed / 'comparables.index')
+    if '--partitions' in prep_extra:
+        prep_outputs.append(processed / 'train_parts')
+
+    return {
+        'generate': {
+            'script': 'generate_data.py',
+            'args': ['--n-samples', str(args.n_samples), '--seed', str(args.seed),
+                     '--output', str(raw_csv)],
+            'deps': [],
+            'inputs': [],
+            'outputs': [raw_csv],
+        },
+        'prep': {
+            'script': 'prep_data.py',
+            'args': ['--input', str(raw_csv), '--output', str(processed),
+                     '--test-size', str(args.test_size), '--seed', str(args.seed)] + prep_extra,
+            'deps': ['generate'],
+            'inputs': [raw_csv],
+            'outputs': prep_outputs,
+        },
+        'train': {
+            'script': 'train_model.py',
+            'args': ['--data-dir', str(processed), '--output-dir', str(model_dir)]
+                    + shlex.split(args.train_args),
+            'deps': ['prep'],
+            'inputs': prep_outputs,
+            'outputs': [model_dir],
+        },
+        'evaluate': {
+            'script': 'evaluate.py',
+            'args': ['--model-dir', str(model_dir), '--data-dir', str(processed),
+                     '--output-dir', str(reports_dir)] + shlex.split(args.evaluate_args),
+            'deps': ['train'],
+            'inputs': [model_dir, processed / 'test.csv', processed / 'feature_info.json'],
+            'outputs': [reports_dir],
+        },
+    }
+
+
+class StageCache:
+    """Per-stage records of input hashes and output hashes, stored as JSON files."""
+
+    def __init__(self, state_dir: str):
+        self.state_dir = Path(state_dir)
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.stat_path = self.state_dir / 'file_hashes.json'
+        self.stat_cache = {}
+        if self.stat_path.exists():
+            self.stat_cache = json.loads(self.stat_path.read_text())
+
+    def _record_path(self, name: str) -> Path:
+        return self.state_dir / f'{name}.json'
+
+    def input_key(self, stage: dict) -> str:
+        """Hash of the stage's code, parameters and upstream artifacts."""
+        h = hashlib.sha256()
+        h.update(f'v{CACHE_VERSION}'.encode())
+        for module in local_modules(stage['script']):
+            h.update(module.encode())
+            hash_file(TRAINING_DIR / module, h)
+        h.update(json.dumps(stage['args']).encode())
+        for path in stage['inputs']:
+            h.update(str(path).encode())
+            h.update(hash_path(path, self.stat_cache).encode())
+        return h.hexdigest()
+
+    def output_hashes(self, stage: dict) -> dict:
+        return {str(path): hash_path(path, self.stat_cache) for path in stage['outputs']}
+
+    def is_valid(self, name: str, stage: dict, key: str) -> bool:
+        """True if the stage ran with this input key and its outputs are untouched since."""
+        record_path = self._record_path(name)
+        if not record_path.exists():
+            return False
+        record = json.loads(record_path.read_text())
+        if record.get('key') != key:
+            return False
+        current = self.output_hashes(stage)
+        if 'missing' in current.values():
+            return False
+        return record.get('outputs') == current
+
+    def store(self, name: str, stage: dict, key: str, wall_time: float):
+        record = {
+            'key': key,
+            'outputs': self.output_hashes(stage),
+            'wall_time_s': wall_time,
+            'completed_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        self._record_path(name).write_text(json.dumps(record, indent=2))
+
+    def save(self):
+        self.stat_path.write_text(json.dumps(self.stat_cache))
+
+
+def run_stage(name: str, stage: dict, cache: StageCache, force: bool) -> dict:
+    """Run one stage unless its cached outputs are still valid."""
+    start = time.perf_counter()
+    key = cache.input_key(stage)
+
+    if not force and cache.is_valid(name, stage, key):
+        return {'stage': name, 'status': 'cached', 'wall_time_s': time.perf_counter() - start}
+
+    command = [sys.executable, stage['script']] + stage['args']
+    print(f"[{name}] {' '.join(command)}")
+    result = subprocess.run(command, cwd=TRAINING_DIR, capture_output=True, text=True)
+    wall_time = time.perf_counter() - start
+
+    # Prefix the stage's output so concurrent stages stay readable
+    for line in (result.stdout + result.stderr).splitlines():
+        print(f"[{name}] {line}")
+
+    if result.returncode != 0:
+        return {'stage': name, 'status': 'failed', 'wall_time_s': wall_time,
+                'returncode': result.returncode}
+
+    cache.store(name, stage, key, wall_time)
+    return {'stage': name, 'status': 'ran', 'wall_time_s': wall_time}
+
+
+def run_pipeline(stages: dict, state_dir: str, selected: list = None,
+                 force: bool = False, max_workers: int = 2) -> list:
+    """
+    Run the stage DAG, launching each stage once its dependencies finish.
+
+    Args:
+        stages: Stage definitions from build_stages
+        state_dir: Directory for cache records
+        selected: Stage names to run (default all); unselected dependencies
+            are treated as already satisfied
+        force: Re-run stages even if their cache is valid
+        max_workers: Maximum number of stages running at once
+
+    Returns:
+        List of per-stage result dictionaries, in completion order
+    """
+    selected = selected or list(stages)
+    cache = StageCache(state_dir)
+
+    remaining = {name: [d for d in stages[name]['deps'] if d in selected] for name in selected}
+    results = []
+    failed = set()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        running = {}
+        while remaining or running:
+            for name in [n for n, deps in remaining.items() if not deps]:
+                del remaining[name]
+                running[pool.submit(run_stage, name, stages[name], cache, force)] = name
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                result = future.result()
+                results.append(result)
+                print(f"[{name}] {result['status']} in {result['wall_time_s']:.2f}s")
+
+                if result['status'] == 'failed':
+                    failed.add(name)
+                for deps in remaining.values():
+                    if name in deps:
+                        deps.remove(name)
+
+            # Drop stages downstream of a failure
+            blocked = True
+            while blocked:
+                blocked = [n for n in remaining
+                           if set(stages[n]['deps']) & failed]
+                for name in blocked:
+                    del remaining[name]
+                    failed.add(name)
+                    results.append({'stage': name, 'status': 'skipped', 'wall_time_s': 0.0})
+
+    cache.save()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the Memphis housing training pipeline')
+    parser.add_argument('--data-root', type=str, default='../../data',
+                        help='Root directory for raw and processed data')
+    parser.add_argument('--model-dir', type=str, default='../../models',
+                        help='Output directory for model')
+    parser.add_argument('--reports-dir', type=str, default='../../reports',
+                        help='Output directory for evaluation reports')
+    parser.add_argument('--state-dir', type=str, default='../../.pipeline',
+                        help='Directory for stage cache records')
+    parser.add_argument('--n-samples', type=int, default=5000,
+                        help='Number of records to generate')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='Random seed')
+    parser.add_argument('--test-size', type=float, default=0.2,
+                        help='Test set size fraction')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='Run prep in streaming mode with this chunk size')
+    parser.add_argument('--prep-args', type=str, default='',
+                        help='Extra arguments for prep_data.py')
+    parser.add_argument('--train-args', type=str, default='',
+                        help='Extra arguments for train_model.py')
+    parser.add_argument('--evaluate-args', type=str, default='',
+                        help='Extra arguments for evaluate.py')
+    parser.add_argument('--stages', nargs='+', default=None,
+                        help='Only run these stages (default: all)')
+    parser.add_argument('--force', action='store_true',
+                        help='Ignore cached results and re-run every stage')
+    parser.add_argument('--jobs', type=int, default=2,
+                        help='Maximum number of independent stages to run concurrently '
+                             '(the built-in stages form a chain)')
+
+    args = parser.parse_args()
+
+    stages = build_stages(args)
+    unknown = set(args.stages or []) - set(stages)
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+
+    start = time.perf_counter()
+    results = run_pipeline(stages, args.state_dir, selected=args.stages,
+                           force=args.force, max_workers=args.jobs)
+    total = time.perf_counter() - start
+
+    print("\n" + "="*50)
+    print("Pipeline Summary")
+    print("="*50)
+    for result in results:
+        print(f"  {result['stage']:<10} {result['status']:<8} {result['wall_time_s']:>8.2f}s")
+    print(f"  {'total':<10} {'':<8} {total:>8.2f}s")
+
+    report_path = Path(args.state_dir) / 'pipeline_report.json'
+    report_path.write_text(json.dumps({'stages': results, 'total_wall_time_s': total}, indent=2))
+
+    if any(r['status'] in ('failed', 'skipped') for r in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
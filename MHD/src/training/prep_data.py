@@ -2,6 +2,11 @@
 Data Preparation for Memphis Housing Model
 
 Loads raw data, performs feature engineering, and splits into train/test sets.
+
+The default split hashes each sale's key columns (hash_split_mask), so a sale
+stays on the same side when rows are added to the raw data and the in-memory
+and streaming paths produce the same split; incremental training relies on
+both. --split random keeps the shuffled train_test_split.
 """
 
 import pandas as pd
@@ -12,28 +17,51 @@ from sklearn.preprocessing import LabelEncoder
 import argparse
 import json
 
+from comparables import COMPARABLES_FILENAME, INDEX_COLUMNS, ComparablesBuilder
+from drift_reference import add_counts, bin_counts, build_reference, reference_edges
+from profiling import NULL_PROFILER, StageProfiler
+from schema import (SALE_DAY_COLUMN, SEGMENT_DTYPES, MemoryReport, apply_feature_dtypes,
+                    read_raw_kwargs)
+
+CATEGORICAL_COLUMNS = ['neighborhood', 'zip_code', 'property_type']
+
+# Raw segment keys written to test.csv (not train.csv) for error analysis
+SEGMENT_COLUMNS = list(SEGMENT_DTYPES)
+
+# Columns that identify a sale; hashed for the train/test split
+SPLIT_KEY_COLUMNS = [
+    'sale_date',
+    'zip_code',
+    'neighborhood',
+    'property_type',
+    'sqft',
+    'year_built',
+    'lot_size_acres',
+    'sale_price',
+]
+
 
 def load_data(data_path: str) -> pd.DataFrame:
-    """Load the raw Memphis housing data."""
-    df = pd.read_csv(data_path)
+    """Load the raw Memphis housing data with the schema dtypes, dropping unused columns."""
+    df = pd.read_csv(data_path, **read_raw_kwargs())
     print(f"Loaded {len(df)} records from {data_path}")
     return df
 
 
-def engineer_features(df: pd.DataFrame) -> pd.DataFrame:
+def engineer_features(df: pd.DataFrame, copy: bool = True) -> pd.DataFrame:
     """
     Perform feature engineering on the housing data.
 
     Creates derived features that may improve model performance.
+    Pass copy=False to add the columns in place (used by the streaming
+    pipeline, where each chunk is already a private frame).
     """
-    df = df.copy()
+    if copy:
+        df = df.copy()
 
     # Age of the house
     df['age'] = 2024 - df['year_built']
 
-    # Price per sqft (for analysis, not as a feature for prediction)
-    df['price_per_sqft'] = df['sale_price'] / df['sqft']
-
     # Rooms ratio
     df['bed_bath_ratio'] = df['beds'] / df['baths'].replace(0, 1)
 
@@ -54,10 +82,11 @@ def engineer_features(df: pd.DataFrame) -> pd.DataFrame:
     # Location score (inverse of distance to downtown, capped)
     df['location_score'] = 1 / (1 + df['distance_to_downtown'] / 10)
 
-    return df
+    return apply_feature_dtypes(df)
 
 
-def encode_categoricals(df: pd.DataFrame, fit: bool = True, encoders: dict = None) -> tuple:
+def encode_categoricals(df: pd.DataFrame, fit: bool = True, encoders: dict = None,
+                        copy: bool = True) -> tuple:
     """
     Encode categorical variables.
 
@@ -65,30 +94,98 @@ def encode_categoricals(df: pd.DataFrame, fit: bool = True, encoders: dict = Non
         df: DataFrame with categorical columns
         fit: Whether to fit new encoders or use existing ones
         encoders: Dict of pre-fitted encoders (if fit=False)
+        copy: Whether to encode a copy of df rather than df itself
 
     Returns:
         Tuple of (encoded DataFrame, encoders dict)
     """
-    df = df.copy()
-
-    categorical_cols = ['neighborhood', 'zip_code', 'property_type']
+    if copy:
+        df = df.copy()
 
     if encoders is None:
         encoders = {}
 
-    for col in categorical_cols:
+    for col in CATEGORICAL_COLUMNS:
         if fit:
             le = LabelEncoder()
             df[f'{col}_encoded'] = le.fit_transform(df[col].astype(str))
             encoders[col] = le
         else:
             le = encoders[col]
-            # Handle unseen categories
-            df[f'{col}_encoded'] = df[col].astype(str).apply(
-                lambda x: le.transform([x])[0] if x in le.classes_ else -1
-            )
+            # Unseen categories get code -1 (classes_ is sorted, as pd.Categorical expects)
+            df[f'{col}_encoded'] = pd.Categorical(
+                df[col].astype(str), categories=le.classes_
+            ).codes
+
+    return apply_feature_dtypes(df), encoders
+
+
+def encoders_from_vocabularies(vocabularies: dict) -> dict:
+    """Build pre-fitted LabelEncoders from sorted category vocabularies."""
+    encoders = {}
+    for col, classes in vocabularies.items():
+        le = LabelEncoder()
+        le.classes_ = np.array(classes, dtype=object)
+        encoders[col] = le
+    return encoders
+
+
+def collect_vocabularies(input_path: str, chunksize: int) -> dict:
+    """
+    First, light pass over the raw CSV: read only the categorical columns
+    and collect the vocabulary of each one.
+
+    Vocabularies are sorted, matching LabelEncoder.fit, so streaming and
+    in-memory preparation produce the same codes.
+    """
+    vocabularies = {col: set() for col in CATEGORICAL_COLUMNS}
+
+    reader = pd.read_csv(input_path, usecols=CATEGORICAL_COLUMNS,
+                         dtype='category', chunksize=chunksize)
+    for chunk in reader:
+        for col in CATEGORICAL_COLUMNS:
+            vocabularies[col].update(chunk[col].astype(str).unique())
+
+    return {col: sorted(values) for col, values in vocabularies.items()}
 
-    return df, encoders
+
+def hash_split_mask(df: pd.DataFrame, test_size: float, seed: int = 42,
+                    key_columns: list = None) -> np.ndarray:
+    """
+    Assign rows to the test set from a stable hash of their key columns.
+
+    Each row's assignment depends only on its own key and the seed, so the
+    split is identical however the data is chunked and needs no shuffle.
+
+    Returns:
+        Boolean array, True for test rows
+    """
+    key_columns = key_columns or SPLIT_KEY_COLUMNS
+    hash_key = f"{seed:016d}"[-16:]
+    hashes = pd.util.hash_pandas_object(df[key_columns], index=False, hash_key=hash_key)
+    # Map the 64-bit hash uniformly onto [0, 1)
+    return (hashes.to_numpy() / 2.0**64) < test_size
+
+
+def sale_days(df: pd.DataFrame) -> np.ndarray:
+    """Sale dates as int32 days since 1970-01-01."""
+    return (pd.to_datetime(df['sale_date'].astype(str)).to_numpy()
+            .astype('datetime64[D]').astype(np.int32))
+
+
+def split_info(method: str, test_size: float, seed: int) -> dict:
+    """How the rows were split, recorded in feature_info.json."""
+    info = {'method': method, 'test_fraction': test_size, 'seed': seed}
+    if method == 'hash':
+        info['key_columns'] = SPLIT_KEY_COLUMNS
+    return info
+
+
+def drift_categories(vocabularies: dict) -> dict:
+    """Categorical feature columns (codes 0..K-1) and their labels, for the drift reference."""
+    categories = {f'{col}_encoded': vocabularies[col] for col in ('neighborhood', 'property_type')}
+    categories.update({'has_pool_num': ['no', 'yes'], 'renovated_num': ['no', 'yes']})
+    return categories
 
 
 def get_feature_columns() -> list:
@@ -116,7 +213,9 @@ def get_feature_columns() -> list:
     ]
 
 
-def prepare_data(input_path: str, output_dir: str, test_size: float = 0.2, seed: int = 42):
+def prepare_data(input_path: str, output_dir: str, test_size: float = 0.2, seed: int = 42,
+                 split: str = 'hash', comparables_per_neighborhood: int = 20_000,
+                 profiler: StageProfiler = None):
     """
     Main data preparation function.
 
@@ -125,54 +224,105 @@ def prepare_data(input_path: str, output_dir: str, test_size: float = 0.2, seed:
         output_dir: Directory to save processed data
         test_size: Fraction of data for testing
         seed: Random seed for reproducibility
+        split: 'hash' (stable per sale, see hash_split_mask) or 'random'
+            (shuffled train_test_split)
+        comparables_per_neighborhood: Most recent training sales per
+            neighborhood kept in the comparables index (0: no index)
+        profiler: Records the load, engineer, encode, split, comparables and
+            save stages
     """
+    if split not in ('hash', 'random'):
+        raise ValueError(f"Unknown split method '{split}'")
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
+    memory = MemoryReport('prep')
+    profiler = profiler or NULL_PROFILER
 
     # Load data
-    df = load_data(input_path)
+    with profiler.stage('load') as stage:
+        df = load_data(input_path)
+        df[SALE_DAY_COLUMN] = sale_days(df)
+        stage['rows'] = len(df)
+    memory.record('load', df)
 
-    # Feature engineering
+    # Feature engineering (df is ours, so no defensive copies)
     print("Performing feature engineering...")
-    df = engineer_features(df)
+    with profiler.stage('engineer') as stage:
+        df = engineer_features(df, copy=False)
+        stage['rows'] = len(df)
+    memory.record('engineer', df)
 
     # Encode categoricals
     print("Encoding categorical variables...")
-    df, encoders = encode_categoricals(df, fit=True)
+    with profiler.stage('encode') as stage:
+        df, encoders = encode_categoricals(df, fit=True, copy=False)
+        stage['rows'] = len(df)
 
     # Get feature columns
     feature_cols = get_feature_columns()
     target_col = 'sale_price'
 
-    # Prepare X and y
-    X = df[feature_cols]
-    y = df[target_col]
-
-    # Split data
-    print(f"Splitting data (test_size={test_size})...")
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=test_size, random_state=seed
-    )
+    # Keep only what gets written out (or indexed), releasing the other raw columns
+    output_cols = feature_cols + [target_col] + SEGMENT_COLUMNS
+    kept_cols = output_cols + [SALE_DAY_COLUMN]
+    df = df[kept_cols + [c for c in INDEX_COLUMNS if c not in kept_cols]]
+    memory.record('select', df)
+
+    # Split data (splitting row positions shuffles exactly as splitting X, y would)
+    print(f"Splitting data (test_size={test_size}, {split})...")
+    with profiler.stage('split') as stage:
+        if split == 'hash':
+            is_test = hash_split_mask(df, test_size, seed)
+            train_idx, test_idx = np.flatnonzero(~is_test), np.flatnonzero(is_test)
+        else:
+            train_idx, test_idx = train_test_split(
+                np.arange(len(df)), test_size=test_size, random_state=seed
+            )
+        train_df = df.iloc[train_idx][feature_cols + [target_col, SALE_DAY_COLUMN]]
+        test_df = df.iloc[test_idx][output_cols + [SALE_DAY_COLUMN]]
+        stage['rows'] = len(df)
+
+    # Nearest-neighbor index of the training sales for /comparables
+    if comparables_per_neighborhood:
+        with profiler.stage('comparables') as stage:
+            comparables = ComparablesBuilder(comparables_per_neighborhood)
+            comparables.add(df.iloc[train_idx])
+            header = comparables.write(output_dir / COMPARABLES_FILENAME)
+            stage['rows'] = header['rows']
+    del df
+    memory.record('split', train_df, test_df)
+
+    X_train, y_train = train_df[feature_cols], train_df[target_col]
+    X_test, y_test = test_df[feature_cols], test_df[target_col]
+
+    # Training distributions the serving app compares live traffic against
+    vocabularies = {col: list(le.classes_) for col, le in encoders.items()}
+    drift_edges = reference_edges(train_df, feature_cols, target_col,
+                                  drift_categories(vocabularies))
+    drift_reference = build_reference(drift_edges,
+                                      bin_counts(train_df, drift_edges, target_col))
 
     # Save processed data
     print(f"Saving processed data to {output_dir}...")
 
     # Save train/test sets
-    train_df = X_train.copy()
-    train_df['sale_price'] = y_train
-    train_df.to_csv(output_dir / 'train.csv', index=False)
-
-    test_df = X_test.copy()
-    test_df['sale_price'] = y_test
-    test_df.to_csv(output_dir / 'test.csv', index=False)
+    with profiler.stage('save') as stage:
+        train_df.to_csv(output_dir / 'train.csv', index=False)
+        test_df.to_csv(output_dir / 'test.csv', index=False)
+        stage['rows'] = len(train_df) + len(test_df)
+    memory.write(output_dir / 'memory_report.json')
 
     # Save feature info
     feature_info = {
         'feature_columns': feature_cols,
         'target_column': target_col,
-        'encoders': {col: list(le.classes_) for col, le in encoders.items()},
+        'encoders': vocabularies,
+        'segment_columns': SEGMENT_COLUMNS,
+        'drift_reference': drift_reference,
         'train_size': len(X_train),
         'test_size': len(X_test),
+        'split': split_info(split, test_size, seed),
+        'train_watermark': int(train_df[SALE_DAY_COLUMN].max()) if len(train_df) else None,
     }
 
     with open(output_dir / 'feature_info.json', 'w') as f:
@@ -192,10 +342,164 @@ def prepare_data(input_path: str, output_dir: str, test_size: float = 0.2, seed:
     print(f"  - {output_dir / 'train.csv'}")
     print(f"  - {output_dir / 'test.csv'}")
     print(f"  - {output_dir / 'feature_info.json'}")
+    if comparables_per_neighborhood:
+        print(f"  - {output_dir / COMPARABLES_FILENAME}")
+    memory.print_summary()
 
     return X_train, X_test, y_train, y_test
 
 
+def prepare_data_streaming(input_path: str, output_dir: str, test_size: float = 0.2,
+                           seed: int = 42, chunksize: int = 100_000,
+                           partitions: bool = False, comparables_per_neighborhood: int = 20_000,
+                           profiler: StageProfiler = None) -> dict:
+    """
+    Out-of-core variant of prepare_data.
+
+    Makes a light first pass to collect category vocabularies, then streams
+    the raw CSV in chunks: each chunk is feature-engineered, encoded, split
+    by row hash and appended to train.csv/test.csv. Peak memory is bounded
+    by the chunk size rather than the dataset size.
+
+    Args:
+        input_path: Path to raw data CSV
+        output_dir: Directory to save processed data
+        test_size: Fraction of data for testing
+        seed: Seed for the split hash
+        chunksize: Rows per chunk
+        partitions: Also write each chunk's training rows as a parquet
+            partition under train_parts/, for external-memory training
+        comparables_per_neighborhood: Most recent training sales per
+            neighborhood kept in the comparables index (0: no index)
+        profiler: Records the vocabulary and stream passes
+
+    Returns:
+        Feature info dictionary (also written to feature_info.json)
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    profiler = profiler or NULL_PROFILER
+
+    print(f"Collecting category vocabularies from {input_path}...")
+    with profiler.stage('vocabulary'):
+        vocabularies = collect_vocabularies(input_path, chunksize)
+    encoders = encoders_from_vocabularies(vocabularies)
+
+    feature_cols = get_feature_columns()
+    target_col = 'sale_price'
+    output_cols = {
+        'train': feature_cols + [target_col, SALE_DAY_COLUMN],
+        'test': feature_cols + [target_col] + SEGMENT_COLUMNS + [SALE_DAY_COLUMN],
+    }
+
+    counts = {'train': 0, 'test': 0}
+    train_watermark = None
+    drift_edges, drift_counts = None, {}
+    target_sums = {'train': 0.0, 'test': 0.0}
+    memory = MemoryReport('prep-streaming')
+
+    comparables = None
+    if comparables_per_neighborhood:
+        comparables = ComparablesBuilder(comparables_per_neighborhood)
+
+    partition_dir = output_dir / 'train_parts'
+    if partitions:
+        partition_dir.mkdir(exist_ok=True)
+        for stale in partition_dir.glob('*.parquet'):
+            stale.unlink()
+
+    print(f"Streaming {input_path} in chunks of {chunksize:,} rows...")
+    with profiler.stage('stream') as stage:
+        with open(output_dir / 'train.csv', 'w', newline='') as train_file, \
+                open(output_dir / 'test.csv', 'w', newline='') as test_file:
+            files = {'train': train_file, 'test': test_file}
+
+            reader = pd.read_csv(input_path, chunksize=chunksize, **read_raw_kwargs())
+            for chunk_number, chunk in enumerate(reader):
+                is_test = hash_split_mask(chunk, test_size, seed)
+                chunk[SALE_DAY_COLUMN] = sale_days(chunk)
+
+                engineer_features(chunk, copy=False)
+                encode_categoricals(chunk, fit=False, encoders=encoders, copy=False)
+
+                if comparables is not None:
+                    comparables.add(chunk.loc[~is_test, INDEX_COLUMNS])
+
+                for split, mask in (('train', ~is_test), ('test', is_test)):
+                    part = chunk.loc[mask, output_cols[split]]
+                    part.to_csv(files[split], header=counts[split] == 0, index=False)
+                    counts[split] += len(part)
+                    target_sums[split] += float(part[target_col].sum())
+
+                    if split == 'train' and len(part):
+                        latest = int(part[SALE_DAY_COLUMN].max())
+                        train_watermark = max(train_watermark or latest, latest)
+                        # Drift bins from the first training rows, counts over all of them
+                        if drift_edges is None:
+                            drift_edges = reference_edges(part, feature_cols, target_col,
+                                                          drift_categories(vocabularies))
+                        drift_counts = add_counts(drift_counts,
+                                                  bin_counts(part, drift_edges, target_col))
+
+                    if partitions and split == 'train' and len(part):
+                        part.to_parquet(partition_dir / f'part-{chunk_number:05d}.parquet',
+                                        index=False)
+
+                if chunk_number == 0:
+                    memory.record('chunk', chunk)
+        stage['rows'] = counts['train'] + counts['test']
+
+    if comparables is not None and counts['train']:
+        with profiler.stage('comparables') as stage:
+            stage['rows'] = comparables.write(output_dir / COMPARABLES_FILENAME)['rows']
+
+    # Write headers for splits that received no rows
+    for split in ('train', 'test'):
+        if counts[split] == 0:
+            pd.DataFrame(columns=output_cols[split]).to_csv(output_dir / f'{split}.csv', index=False)
+
+    feature_info = {
+        'feature_columns': feature_cols,
+        'target_column': target_col,
+        'encoders': vocabularies,
+        'segment_columns': SEGMENT_COLUMNS,
+        'drift_reference': build_reference(drift_edges, drift_counts) if drift_edges else None,
+        'train_size': counts['train'],
+        'test_size': counts['test'],
+        'split': split_info('hash', test_size, seed),
+        'train_watermark': train_watermark,
+    }
+
+    with open(output_dir / 'feature_info.json', 'w') as f:
+        json.dump(feature_info, f, indent=2)
+
+    memory.record('done')
+    memory.write(output_dir / 'memory_report.json')
+
+    print("\n" + "="*50)
+    print("Data Preparation Complete (streaming)")
+    print("="*50)
+    print(f"Training samples: {counts['train']}")
+    print(f"Test samples: {counts['test']}")
+    print(f"Features: {len(feature_cols)}")
+    print(f"\nTarget (sale_price) statistics:")
+    for split in ('train', 'test'):
+        mean = target_sums[split] / counts[split] if counts[split] else float('nan')
+        print(f"  {split.capitalize():<5} - Mean: ${mean:,.0f}")
+    print(f"\nOutput files:")
+    print(f"  - {output_dir / 'train.csv'}")
+    print(f"  - {output_dir / 'test.csv'}")
+    print(f"  - {output_dir / 'feature_info.json'}")
+    if partitions:
+        print(f"  - {partition_dir / 'part-*.parquet'}")
+    if comparables is not None and counts['train']:
+        print(f"  - {output_dir / COMPARABLES_FILENAME}")
+    memory.print_summary()
+
+    return feature_info
+
+
 def main():
     parser = argparse.ArgumentParser(description='Prepare Memphis housing data for training')
     parser.add_argument('--input', type=str, default='../../data/raw/memphis_housing.csv',
@@ -206,15 +510,52 @@ def main():
                         help='Test set size fraction')
     parser.add_argument('--seed', type=int, default=42,
                         help='Random seed')
+    parser.add_argument('--split', type=str, default='hash', choices=['hash', 'random'],
+                        help='Train/test split: stable per-sale hash, or a shuffled random '
+                             'split (incremental training needs hash; --chunksize always '
+                             'uses hash)')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='Stream the input in chunks of this many rows '
+                             '(hash-based split, bounded memory)')
+    parser.add_argument('--partitions', action='store_true',
+                        help='With --chunksize, also write parquet training partitions '
+                             'for external-memory training')
+    parser.add_argument('--comparables-per-neighborhood', type=int, default=20_000,
+                        help='Most recent training sales per neighborhood in the comparables '
+                             'index (0: no index)')
+    parser.add_argument('--sample-profile', action='store_true',
+                        help='Capture stack samples and write the slowest stage as folded stacks')
 
     args = parser.parse_args()
-
-    prepare_data(
-        input_path=args.input,
-        output_dir=args.output,
-        test_size=args.test_size,
-        seed=args.seed
-    )
+    profiler = StageProfiler('prep', sample=args.sample_profile)
+
+    if args.chunksize and args.split != 'hash':
+        parser.error("--chunksize always uses the hash split")
+
+    if args.chunksize:
+        prepare_data_streaming(
+            input_path=args.input,
+            output_dir=args.output,
+            test_size=args.test_size,
+            seed=args.seed,
+            chunksize=args.chunksize,
+            partitions=args.partitions,
+            comparables_per_neighborhood=args.comparables_per_neighborhood,
+            profiler=profiler
+        )
+    else:
+        prepare_data(
+            input_path=args.input,
+            output_dir=args.output,
+            test_size=args.test_size,
+            seed=args.seed,
+            split=args.split,
+            comparables_per_neighborhood=args.comparables_per_neighborhood,
+            profiler=profiler
+        )
+
+    profiler.write(args.output)
+    profiler.print_summary()
 
 
 if __name__ == '__main__':
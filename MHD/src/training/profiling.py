@@ -0,0 +1,173 @@
+"""
+Stage Profiling for the Memphis Housing Pipeline
+
+StageProfiler records wall time, CPU time, peak RSS and rows/sec for named
+stages. A monitor thread polls RSS while a stage runs (ru_maxrss is only a
+process-lifetime peak), and can also take stack samples of the profiled
+thread; the samples of the slowest stage are written in folded-stack
+format for flamegraph.pl or speedscope.
+"""
+
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss_bytes() -> int:
+    """Current resident set size, or the lifetime peak where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return int(peak) if sys.platform == 'darwin' else int(peak) * 1024
+
+
+def _folded_stack(frame) -> str:
+    """Render a frame chain as a root-first, semicolon-separated stack."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class _Monitor(threading.Thread):
+    """Polls RSS and, optionally, stack samples of one thread until stopped."""
+
+    def __init__(self, thread_id: int, interval: float, sample_stacks: bool):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.sample_stacks = sample_stacks
+        self.peak_rss = current_rss_bytes()
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, current_rss_bytes())
+            if self.sample_stacks:
+                frame = sys._current_frames().get(self.thread_id)
+                if frame is not None:
+                    self.stacks[_folded_stack(frame)] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.peak_rss = max(self.peak_rss, current_rss_bytes())
+
+
+class StageProfiler:
+    """
+    Collects per-stage timings and memory for one pipeline step.
+
+    Usage:
+        profiler = StageProfiler('train', sample=True)
+        with profiler.stage('fit') as stage:
+            ...
+            stage['rows'] = len(X_train)
+        profiler.write(output_dir)
+    """
+
+    def __init__(self, name: str, sample: bool = False, interval: float = 0.01,
+                 enabled: bool = True):
+        self.name = name
+        self.sample = sample
+        self.interval = interval
+        self.enabled = enabled
+        self.stages = []
+        self._stacks = {}
+
+    @contextmanager
+    def stage(self, stage_name: str):
+        """Profile the enclosed block; set ['rows'] on the yielded dict for rows/sec."""
+        info = {'rows': None}
+        if not self.enabled:
+            yield info
+            return
+
+        monitor = _Monitor(threading.get_ident(), self.interval, self.sample)
+        monitor.start()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield info
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            monitor.stop()
+
+            entry = {
+                'stage': stage_name,
+                'wall_s': wall,
+                'cpu_s': cpu,
+                'peak_rss_mb': monitor.peak_rss / 2**20,
+                'rows': info['rows'],
+                'rows_per_s': info['rows'] / wall if info['rows'] and wall > 0 else None,
+            }
+            self.stages.append(entry)
+            if self.sample:
+                self._stacks[stage_name] = monitor.stacks
+
+    def slowest_stage(self) -> dict:
+        return max(self.stages, key=lambda s: s['wall_s']) if self.stages else None
+
+    def metrics(self) -> dict:
+        """Flatten the profile into '<profile>.<stage>.<measure>' metric names."""
+        metrics = {}
+        for entry in self.stages:
+            prefix = f"profile.{self.name}.{entry['stage']}"
+            for key in ('wall_s', 'cpu_s', 'peak_rss_mb', 'rows_per_s'):
+                if entry[key] is not None:
+                    metrics[f'{prefix}.{key}'] = entry[key]
+        return metrics
+
+    def write(self, output_dir) -> Path:
+        """Write profile_<name>.json (and the slowest stage's folded stacks) to output_dir."""
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        profile = {'name': self.name, 'stages': self.stages}
+        slowest = self.slowest_stage()
+        if self.sample and slowest and self._stacks.get(slowest['stage']):
+            folded_path = output_dir / f"profile_{self.name}_{slowest['stage']}.folded"
+            with open(folded_path, 'w') as f:
+                for stack, count in self._stacks[slowest['stage']].most_common():
+                    f.write(f"{stack} {count}\n")
+            profile['sampled_stage'] = slowest['stage']
+            profile['sample_file'] = folded_path.name
+
+        path = output_dir / f'profile_{self.name}.json'
+        with open(path, 'w') as f:
+            json.dump(profile, f, indent=2)
+        return path
+
+    def print_summary(self) -> None:
+        print(f"\nProfile ({self.name}):")
+        for entry in self.stages:
+            rate = f"{entry['rows_per_s']:>12,.0f} rows/s" if entry['rows_per_s'] else ''
+            print(f"  {entry['stage']:<14} wall {entry['wall_s']:>8.2f}s  "
+                  f"cpu {entry['cpu_s']:>8.2f}s  peak RSS {entry['peak_rss_mb']:>8.1f} MiB  {rate}")
+
+
+# Profiler that records nothing, for callers that were not given one
+NULL_PROFILER = StageProfiler('null', enabled=False)
+
+
+def load_profile_metrics(path) -> dict:
+    """Read a profile_<name>.json written by StageProfiler.write back into metric form."""
+    with open(path) as f:
+        profile = json.load(f)
+    restored = StageProfiler(profile['name'])
+    restored.stages = profile['stages']
+    return restored.metrics()
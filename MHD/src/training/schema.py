@@ -0,0 +1,161 @@
+"""
+Dtype Schema for the Memphis Housing Pipeline
+
+One explicit, memory-compact dtype plan shared by prep, training and
+evaluation: categories for repeated strings, the narrowest integer widths
+that hold the generator's ranges, float32 for continuous features (XGBoost
+works in float32 internally, so nothing is lost), and no columns the model
+never uses.
+"""
+
+import json
+import resource
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Raw columns kept on load; anything else (city, state, ...) is dropped at read time
+RAW_DTYPES = {
+    'sale_price': 'int32',
+    'sqft': 'int16',
+    'beds': 'int8',
+    'baths': 'float32',
+    'year_built': 'int16',
+    'lot_size_acres': 'float32',
+    'stories': 'float32',
+    'garage_spaces': 'int8',
+    'has_pool': 'bool',
+    'renovated': 'bool',
+    'neighborhood': 'category',
+    'zip_code': 'category',
+    'distance_to_downtown': 'float32',
+    'crime_index': 'float32',
+    'school_rating': 'int8',
+    'property_type': 'category',
+    'sale_date': 'category',
+}
+
+# Model features and target as written to train.csv/test.csv
+FEATURE_DTYPES = {
+    'sqft': 'int16',
+    'beds': 'int8',
+    'baths': 'float32',
+    'age': 'int16',
+    'lot_size_acres': 'float32',
+    'stories': 'float32',
+    'garage_spaces': 'int8',
+    'has_pool_num': 'int8',
+    'renovated_num': 'int8',
+    'distance_to_downtown': 'float32',
+    'crime_index': 'float32',
+    'school_rating': 'int8',
+    'neighborhood_quality': 'float32',
+    'location_score': 'float32',
+    'bed_bath_ratio': 'float32',
+    'total_rooms': 'float32',
+    'sqft_per_bed': 'float32',
+    'neighborhood_encoded': 'int16',
+    'property_type_encoded': 'int16',
+}
+
+TARGET_DTYPES = {'sale_price': 'int32'}
+
+# Sale date of each training row, as days since 1970-01-01 (train.csv only);
+# incremental training tells new sales from ones the previous model saw by it
+SALE_DAY_COLUMN = 'sale_day'
+SALE_DAY_DTYPES = {SALE_DAY_COLUMN: 'int32'}
+
+# Raw segment keys kept in test.csv for per-segment error analysis
+SEGMENT_DTYPES = {
+    'neighborhood': 'category',
+    'property_type': 'category',
+    'zip_code': 'category',
+}
+
+
+def read_raw_kwargs() -> dict:
+    """pd.read_csv keyword arguments that apply the raw schema."""
+    return {'usecols': list(RAW_DTYPES), 'dtype': RAW_DTYPES}
+
+
+def read_processed_kwargs(columns: list) -> dict:
+    """pd.read_csv keyword arguments for reading the given processed columns."""
+    dtypes = {**FEATURE_DTYPES, **TARGET_DTYPES, **SALE_DAY_DTYPES, **SEGMENT_DTYPES}
+    return {'usecols': columns, 'dtype': {c: dtypes[c] for c in columns if c in dtypes}}
+
+
+def read_processed_csv(path, columns: list, rows: int = None,
+                       chunksize: int = 250_000) -> pd.DataFrame:
+    """
+    Read processed columns with the schema dtypes.
+
+    A single read_csv call peaks at about twice the finished frame (parser
+    buffers plus the result). When the row count is known (feature_info.json)
+    and every column is numeric, chunks are copied into preallocated column
+    arrays instead, which become the frame's columns without a copy, so the
+    peak is the frame plus one chunk.
+    """
+    kwargs = read_processed_kwargs(columns)
+    dtypes = kwargs['dtype']
+    if rows is None or len(dtypes) < len(columns) or 'category' in dtypes.values():
+        return pd.read_csv(path, **kwargs)
+
+    arrays = {c: np.empty(rows, dtype=dtypes[c]) for c in columns}
+    start = 0
+    for chunk in pd.read_csv(path, chunksize=chunksize, **kwargs):
+        stop = start + len(chunk)
+        if stop > rows:
+            raise ValueError(f"{path} has more than the {rows:,} rows recorded by prep; "
+                             "re-run prep_data.py")
+        for c in columns:
+            arrays[c][start:stop] = chunk[c].to_numpy()
+        start = stop
+    return pd.DataFrame({c: a[:start] for c, a in arrays.items()}, copy=False)
+
+
+def apply_feature_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Cast engineered feature columns present in df to the schema, in place."""
+    for col, dtype in FEATURE_DTYPES.items():
+        if col in df.columns and df[col].dtype != dtype:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def frame_bytes(df) -> int:
+    """Deep memory usage of a DataFrame or Series in bytes."""
+    usage = df.memory_usage(deep=True)
+    return int(usage.sum()) if hasattr(usage, 'sum') else int(usage)
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process so far."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    return int(peak) if sys.platform == 'darwin' else int(peak) * 1024
+
+
+class MemoryReport:
+    """Records DataFrame bytes and process peak RSS at each pipeline stage."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stages = []
+
+    def record(self, stage: str, *frames) -> None:
+        self.stages.append({
+            'stage': stage,
+            'frame_bytes': sum(frame_bytes(f) for f in frames),
+            'peak_rss_bytes': peak_rss_bytes(),
+        })
+
+    def print_summary(self) -> None:
+        print(f"\nMemory report ({self.name}):")
+        for entry in self.stages:
+            print(f"  {entry['stage']:<12} frames {entry['frame_bytes'] / 2**20:>9.1f} MiB"
+                  f"   peak RSS {entry['peak_rss_bytes'] / 2**20:>9.1f} MiB")
+
+    def write(self, path) -> None:
+        with open(Path(path), 'w') as f:
+            json.dump({'name': self.name, 'stages': self.stages}, f, indent=2)
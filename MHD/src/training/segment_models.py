@@ -0,0 +1,311 @@
+"""
+Segment-Specialized Models for Memphis Housing Price Prediction
+
+Trains one XGBoost model per segment (property type or neighborhood group)
+plus a global model, concurrently in threads within a fixed core budget,
+and packages them in one model bundle. Segments with too few training rows
+are routed to the global model.
+
+At inference rows are routed by their encoded segment column: the batch is
+stably sorted by segment, each segment's rows are scored by its booster in
+one inplace_predict call, and predictions are scattered back to the
+original row order. The routing table ships in the bundle's feature spec
+under 'segments'; the serving reader (src/serving/bundle.py) routes the
+same way.
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import xgboost as xgb
+
+from bundle import BUNDLE_FILENAME, load_bundle
+from comparables import copy_index
+from train_model import (
+    DEFAULT_PARAMS,
+    booster_to_regressor,
+    load_feature_spec,
+    load_training_data,
+    native_params,
+    regression_metrics,
+    save_model,
+    train_xgboost,
+)
+
+# Neighborhood groups by price tier (see README "Memphis Neighborhoods")
+NEIGHBORHOOD_GROUPS = {
+    'upper': ['Germantown', 'Collierville', 'East Memphis', 'Mud Island', 'Harbor Town'],
+    'middle': ['Midtown', 'Bartlett', 'Cordova', 'Cooper-Young', 'High Point Terrace',
+               'Downtown'],
+    'lower': ['Whitehaven', 'Frayser', 'Raleigh', 'Orange Mound', 'Hickory Hill',
+              'South Memphis', 'North Memphis', 'Berclair', 'Parkway Village'],
+}
+
+# Segmentation name -> (categorical column, value -> segment groups or None for one per value)
+SEGMENTATIONS = {
+    'property_type': ('property_type', None),
+    'neighborhood_group': ('neighborhood', NEIGHBORHOOD_GROUPS),
+}
+
+GLOBAL_BOOSTER = 'main'
+
+
+def segment_routes(segment_by: str, feature_spec: dict) -> tuple:
+    """
+    Map every encoded category code to a segment name.
+
+    Returns:
+        Tuple of (encoded feature column, list of segment names indexed by code)
+    """
+    column, groups = SEGMENTATIONS[segment_by]
+    vocabulary = feature_spec['encoders'][column]
+    if groups is None:
+        names = list(vocabulary)
+    else:
+        value_to_group = {value: group for group, values in groups.items() for value in values}
+        names = [value_to_group.get(value, GLOBAL_BOOSTER) for value in vocabulary]
+    return f'{column}_encoded', names
+
+
+def segment_index(X: np.ndarray, segments: dict, feature_columns: list) -> tuple:
+    """
+    Vectorized segment lookup for each row of X.
+
+    Returns:
+        Tuple of (booster names, per-row index into those names); codes that
+        are unseen (-1) or route to no trained segment get the global model
+    """
+    names = [GLOBAL_BOOSTER] + sorted(set(segments['routes']) - {GLOBAL_BOOSTER})
+    table = np.array([names.index(route) for route in segments['routes']], dtype=np.intp)
+    codes = X[:, feature_columns.index(segments['feature'])].astype(np.intp)
+    valid = (codes >= 0) & (codes < len(table))
+    index = np.zeros(len(X), dtype=np.intp)
+    index[valid] = table[codes[valid]]
+    return names, index
+
+
+def predict_segmented(boosters: dict, segments: dict, feature_columns: list,
+                      X: np.ndarray) -> np.ndarray:
+    """Score X with one inplace_predict per segment, returned in the original row order."""
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    names, index = segment_index(X, segments, feature_columns)
+    order = np.argsort(index, kind='stable')
+    counts = np.bincount(index, minlength=len(names))
+
+    predictions = np.empty(len(X), dtype=np.float32)
+    start = 0
+    for name, count in zip(names, counts):
+        if count:
+            rows = order[start:start + count]
+            predictions[rows] = boosters[name].inplace_predict(X[rows])
+            start += count
+    return predictions
+
+
+class SegmentedModel:
+    """sklearn-style predict() over a segmented bundle; importances are the global model's."""
+
+    def __init__(self, boosters: dict, segments: dict, feature_columns: list, params: dict):
+        self.boosters = boosters
+        self.segments = segments
+        self.feature_columns = feature_columns
+        self.global_model = booster_to_regressor(boosters[GLOBAL_BOOSTER], params)
+
+    @property
+    def feature_importances_(self):
+        return self.global_model.feature_importances_
+
+    def get_booster(self) -> xgb.Booster:
+        return self.boosters[GLOBAL_BOOSTER]
+
+    def predict(self, X) -> np.ndarray:
+        X = X[self.feature_columns].to_numpy() if hasattr(X, 'columns') else X
+        return predict_segmented(self.boosters, self.segments, self.feature_columns, X)
+
+
+def load_segmented_model(model_dir: str):
+    """Load a bundle as a SegmentedModel if it has segments, otherwise as an XGBRegressor."""
+    bundle = load_bundle(Path(model_dir) / BUNDLE_FILENAME)
+    params = bundle['metadata'].get('params', {})
+    segments = bundle['feature_spec'].get('segments')
+    if not segments:
+        return booster_to_regressor(bundle['boosters'][GLOBAL_BOOSTER], params)
+    return SegmentedModel(bundle['boosters'], segments,
+                          bundle['feature_spec']['feature_columns'], params)
+
+
+def _fit_segment(name: str, X: np.ndarray, y: np.ndarray, params: dict,
+                 nthread: int, max_bin: int) -> tuple:
+    """Train one segment's booster on its rows."""
+    start = time.perf_counter()
+    booster_params, num_boost_round = native_params(params, 'hist', nthread)
+    booster_params['max_bin'] = max_bin
+    dtrain = xgb.QuantileDMatrix(X, y, max_bin=max_bin, nthread=nthread)
+    booster = xgb.train(booster_params, dtrain, num_boost_round=num_boost_round)
+    return name, booster, time.perf_counter() - start
+
+
+def train_segment_models(X_train, y_train, X_test, y_test, feature_spec: dict,
+                         segment_by: str = 'neighborhood_group', params: dict = None,
+                         min_segment_rows: int = 500, n_jobs: int = None,
+                         max_bin: int = 256) -> tuple:
+    """
+    Train a global model and one model per sufficiently large segment.
+
+    Args:
+        X_train, y_train: Training data
+        X_test, y_test: Test data for the per-segment comparison
+        feature_spec: Bundle feature spec (load_feature_spec); supplies the vocabularies
+        segment_by: Key of SEGMENTATIONS
+        params: XGBoost hyperparameters (default DEFAULT_PARAMS)
+        min_segment_rows: Segments with fewer training rows use the global model
+        n_jobs: Total cores to use (default: all); split between concurrent models
+        max_bin: Histogram bins per feature
+
+    Returns:
+        Tuple of (global XGBRegressor, segment boosters by bundle name,
+        segments routing spec, report)
+    """
+    params = params or DEFAULT_PARAMS
+    n_jobs = n_jobs or os.cpu_count()
+    feature_columns = feature_spec['feature_columns']
+
+    feature, names = segment_routes(segment_by, feature_spec)
+    X = np.ascontiguousarray(X_train[feature_columns].to_numpy(dtype=np.float32))
+    y = y_train.to_numpy(dtype=np.float32)
+    codes = X[:, feature_columns.index(feature)].astype(np.intp)
+    row_segments = np.where((codes >= 0) & (codes < len(names)),
+                            np.array(names, dtype=object)[np.clip(codes, 0, len(names) - 1)],
+                            GLOBAL_BOOSTER)
+
+    segment_rows = {name: int((row_segments == name).sum())
+                    for name in sorted(set(names) - {GLOBAL_BOOSTER})}
+    trained = [name for name, rows in segment_rows.items() if rows >= min_segment_rows]
+    sparse = [name for name in segment_rows if name not in trained]
+
+    concurrent = min(len(trained) + 1, n_jobs)
+    threads_per_model = max(1, n_jobs // concurrent)
+    print(f"Training global + {len(trained)} segment models by {segment_by} "
+          f"({concurrent} concurrent x {threads_per_model} threads); "
+          f"global fallback for {sparse or 'none'}")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrent) as pool:
+        global_future = pool.submit(train_xgboost, X_train[feature_columns], y_train,
+                                    X_test[feature_columns], y_test, params,
+                                    nthread=threads_per_model, max_bin=max_bin)
+        futures = [
+            pool.submit(_fit_segment, name, X[row_segments == name], y[row_segments == name],
+                        params, threads_per_model, max_bin)
+            for name in trained
+        ]
+        global_model, _ = global_future.result()
+        fitted = [future.result() for future in futures]
+    wall_time = time.perf_counter() - start
+
+    boosters = {f'segment/{name}': booster for name, booster, _ in fitted}
+    segments = {
+        'by': segment_by,
+        'feature': feature,
+        'routes': [f'segment/{name}' if name in trained else GLOBAL_BOOSTER for name in names],
+    }
+
+    # Compare each segment model against the global model on its test rows
+    all_boosters = {GLOBAL_BOOSTER: global_model.get_booster(), **boosters}
+    X_eval = np.ascontiguousarray(X_test[feature_columns].to_numpy(dtype=np.float32))
+    y_eval = y_test.to_numpy(dtype=np.float32)
+    routed = predict_segmented(all_boosters, segments, feature_columns, X_eval)
+    global_pred = global_model.get_booster().inplace_predict(X_eval)
+    eval_names, eval_index = segment_index(X_eval, segments, feature_columns)
+
+    per_segment = {}
+    for k, name in enumerate(eval_names):
+        mask = eval_index == k
+        if not mask.any():
+            continue
+        per_segment[name] = {
+            'test_rows': int(mask.sum()),
+            'segment_rmse': regression_metrics(y_eval[mask], routed[mask])['rmse'],
+            'global_rmse': regression_metrics(y_eval[mask], global_pred[mask])['rmse'],
+        }
+    for name, _, seconds in fitted:
+        per_segment.setdefault(f'segment/{name}', {})['train_seconds'] = seconds
+
+    report = {
+        'segment_by': segment_by,
+        'min_segment_rows': min_segment_rows,
+        'segment_train_rows': segment_rows,
+        'fallback_segments': sparse,
+        'concurrent_models': concurrent,
+        'threads_per_model': threads_per_model,
+        'wall_time_s': wall_time,
+        'segmented_test': regression_metrics(y_eval, routed),
+        'global_test': regression_metrics(y_eval, global_pred),
+        'per_segment': per_segment,
+    }
+    return global_model, boosters, segments, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train segment-specialized housing price models')
+    parser.add_argument('--data-dir', type=str, default='../../data/processed',
+                        help='Directory with processed data')
+    parser.add_argument('--output-dir', type=str, default='../../models',
+                        help='Output directory for the segmented model bundle')
+    parser.add_argument('--segment-by', type=str, default='neighborhood_group',
+                        choices=sorted(SEGMENTATIONS),
+                        help='Segmentation to train one model per')
+    parser.add_argument('--min-segment-rows', type=int, default=500,
+                        help='Segments with fewer training rows fall back to the global model')
+    parser.add_argument('--n-jobs', type=int, default=None,
+                        help='Total cores to use (default: all)')
+    parser.add_argument('--max-bin', type=int, default=256,
+                        help='Histogram bins per feature')
+
+    args = parser.parse_args()
+
+    X_train, X_test, y_train, y_test, feature_cols = load_training_data(args.data_dir)
+    feature_spec = load_feature_spec(args.data_dir)
+
+    global_model, boosters, segments, report = train_segment_models(
+        X_train, y_train, X_test, y_test, feature_spec,
+        segment_by=args.segment_by,
+        min_segment_rows=args.min_segment_rows,
+        n_jobs=args.n_jobs,
+        max_bin=args.max_bin
+    )
+
+    segmented, overall = report['segmented_test'], report['global_test']
+    metrics = {
+        **{f'test_{k}': v for k, v in segmented.items()},
+        **{f'global_test_{k}': v for k, v in overall.items()},
+        'train_rows': len(X_train),
+    }
+    save_model(global_model, args.output_dir, feature_cols, metrics,
+               {'params': DEFAULT_PARAMS, 'train_rows': len(X_train), 'segments': report},
+               feature_spec={**feature_spec, 'segments': segments},
+               extra_boosters=boosters)
+    copy_index(args.data_dir, args.output_dir)
+
+    print("\n" + "="*60)
+    print(f"Segment models by {args.segment_by}")
+    print("="*60)
+    for name, entry in report['per_segment'].items():
+        if 'test_rows' in entry:
+            print(f"  {name:<28} {entry['test_rows']:>6} rows  "
+                  f"RMSE ${entry['segment_rmse']:>9,.0f} (global ${entry['global_rmse']:,.0f})")
+    print(f"\n  Segmented test RMSE: ${segmented['rmse']:,.0f}  MAPE {segmented['mape']:.2f}%")
+    print(f"  Global test RMSE:    ${overall['rmse']:,.0f}  MAPE {overall['mape']:.2f}%")
+    print(f"  Trained in {report['wall_time_s']:.1f}s")
+
+    with open(Path(args.output_dir) / 'segment_report.json', 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,411 @@
+"""
+Streaming, Sharded Evaluation for Memphis Housing Price Prediction
+
+Evaluates arbitrarily large holdouts (CSV or parquet) in bounded memory.
+Inputs are split into shards (byte ranges of CSV files, row groups of
+parquet files) that worker processes stream in chunks. Each worker folds
+its chunks into an ErrorAccumulator; accumulators merge exactly for
+counts, sums, moments, extremes and top-k, and approximately (relative
+error bounded by QuantileSketch.relative_accuracy) for medians.
+
+The merged accumulator produces the same report structure as
+evaluate.generate_evaluation_report.
+"""
+
+import heapq
+import io
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from error_cube import merge_cells, segment_cells
+from schema import read_processed_kwargs
+from segment_models import load_segmented_model
+
+# Percentage thresholds reported as within_<t>pct
+WITHIN_PCT = (5, 10, 20)
+WORST_K = 5
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch for non-negative values with relative accuracy.
+
+    Values are counted in logarithmic buckets (as in DDSketch), so any
+    quantile is returned within relative_accuracy of a true sample value
+    and merging two sketches is adding their bucket counts. Memory grows
+    with log(max / min), not with the number of values.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.005):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        positive = values[values > 0]
+        self.zero_count += len(values) - len(positive)
+        self.count += len(values)
+        if len(positive):
+            keys, counts = np.unique(np.ceil(np.log(positive) / self._log_gamma).astype(np.int64),
+                                     return_counts=True)
+            for key, count in zip(keys.tolist(), counts.tolist()):
+                self.buckets[key] = self.buckets.get(key, 0) + count
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        self.zero_count += other.zero_count
+        self.count += other.count
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return float('nan')
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class Moments:
+    """Count, mean and 2nd/3rd central moments, mergeable with Chan et al.'s formulas."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+
+    def add(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        other = Moments()
+        other.n = len(values)
+        other.mean = float(values.mean())
+        centered = values - other.mean
+        other.m2 = float(np.dot(centered, centered))
+        other.m3 = float(np.sum(centered ** 3))
+        self.merge(other)
+
+    def merge(self, other: 'Moments') -> None:
+        if other.n == 0:
+            return
+        if self.n == 0:
+            self.n, self.mean, self.m2, self.m3 = other.n, other.mean, other.m2, other.m3
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        m3 = (self.m3 + other.m3
+              + delta ** 3 * self.n * other.n * (self.n - other.n) / n ** 2
+              + 3 * delta * (self.n * other.m2 - other.n * self.m2) / n)
+        m2 = self.m2 + other.m2 + delta ** 2 * self.n * other.n / n
+        self.mean += delta * other.n / n
+        self.n, self.m2, self.m3 = n, m2, m3
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / self.n if self.n else float('nan')
+
+    @property
+    def skew(self) -> float:
+        """Adjusted Fisher-Pearson skewness, as pandas Series.skew()."""
+        n = self.n
+        if n < 3 or self.m2 == 0:
+            return float('nan')
+        g1 = (self.m3 / n) / (self.m2 / n) ** 1.5
+        return g1 * math.sqrt(n * (n - 1)) / (n - 2)
+
+
+class ErrorAccumulator:
+    """Mergeable state for every number in the evaluation report."""
+
+    def __init__(self, price_bins: list, price_labels: list, large_error_pct: float = 25,
+                 relative_accuracy: float = 0.005):
+        self.price_bins = list(price_bins)
+        self.price_labels = list(price_labels)
+        self.large_error_pct = large_error_pct
+
+        self.errors = Moments()        # predicted - actual
+        self.actuals = Moments()       # for R²
+        self.sum_sq_error = 0.0
+        self.sum_abs_error = 0.0
+        self.sum_pct_error = 0.0
+        self.max_abs_error = 0.0
+        self.within = {t: 0 for t in WITHIN_PCT}
+        self.overpredict = 0
+        self.underpredict = 0
+        self.large_errors = 0
+        self.abs_error_sketch = QuantileSketch(relative_accuracy)
+        self.worst = []                # min-heap of (pct_error, actual, predicted)
+
+        n_ranges = len(price_labels)
+        self.range_count = np.zeros(n_ranges, dtype=np.int64)
+        self.range_sum_actual = np.zeros(n_ranges)
+        self.range_sum_abs = np.zeros(n_ranges)
+        self.range_sum_pct = np.zeros(n_ranges)
+        self.range_abs_sketch = [QuantileSketch(relative_accuracy) for _ in range(n_ranges)]
+        self.range_pct_sketch = [QuantileSketch(relative_accuracy) for _ in range(n_ranges)]
+
+        # Per-cell error sums for the segment error cube (error_cube.py)
+        self.cells = None
+
+    @property
+    def count(self) -> int:
+        return self.errors.n
+
+    def update(self, y_true, y_pred, segments: pd.DataFrame = None) -> None:
+        """Fold one chunk of actuals, predictions and (optionally) segment keys into the accumulator."""
+        y_true = np.asarray(y_true, dtype=np.float64)
+        y_pred = np.asarray(y_pred, dtype=np.float64)
+        if len(y_true) == 0:
+            return
+        errors = y_pred - y_true
+        abs_errors = np.abs(errors)
+        pct_errors = abs_errors / y_true * 100
+
+        self.errors.add(errors)
+        self.actuals.add(y_true)
+        self.sum_sq_error += float(np.dot(errors, errors))
+        self.sum_abs_error += float(abs_errors.sum())
+        self.sum_pct_error += float(pct_errors.sum())
+        self.max_abs_error = max(self.max_abs_error, float(abs_errors.max()))
+        for t in WITHIN_PCT:
+            self.within[t] += int((pct_errors <= t).sum())
+        self.overpredict += int((errors > 0).sum())
+        self.underpredict += int((errors < 0).sum())
+        self.large_errors += int((pct_errors > self.large_error_pct).sum())
+        self.abs_error_sketch.add(abs_errors)
+
+        top = np.argpartition(pct_errors, -min(WORST_K, len(pct_errors)))[-WORST_K:]
+        for i in top:
+            self._push_worst((float(pct_errors[i]), float(y_true[i]), float(y_pred[i])))
+
+        # pd.cut bins are right-inclusive: (0, 100000], (100000, 200000], ...
+        ranges = np.searchsorted(self.price_bins, y_true, side='left') - 1
+        in_range = (ranges >= 0) & (ranges < len(self.price_labels))
+        ranges, y_r = ranges[in_range], y_true[in_range]
+        abs_r, pct_r = abs_errors[in_range], pct_errors[in_range]
+        n_ranges = len(self.price_labels)
+        self.range_count += np.bincount(ranges, minlength=n_ranges)
+        self.range_sum_actual += np.bincount(ranges, weights=y_r, minlength=n_ranges)
+        self.range_sum_abs += np.bincount(ranges, weights=abs_r, minlength=n_ranges)
+        self.range_sum_pct += np.bincount(ranges, weights=pct_r, minlength=n_ranges)
+        for k in np.unique(ranges):
+            mask = ranges == k
+            self.range_abs_sketch[k].add(abs_r[mask])
+            self.range_pct_sketch[k].add(pct_r[mask])
+
+        if segments is not None:
+            self.cells = merge_cells(self.cells, segment_cells(
+                segments, y_true, y_pred, self.price_bins, self.price_labels
+            ))
+
+    def _push_worst(self, item: tuple) -> None:
+        if len(self.worst) < WORST_K:
+            heapq.heappush(self.worst, item)
+        elif item > self.worst[0]:
+            heapq.heapreplace(self.worst, item)
+
+    def merge(self, other: 'ErrorAccumulator') -> 'ErrorAccumulator':
+        self.errors.merge(other.errors)
+        self.actuals.merge(other.actuals)
+        self.sum_sq_error += other.sum_sq_error
+        self.sum_abs_error += other.sum_abs_error
+        self.sum_pct_error += other.sum_pct_error
+        self.max_abs_error = max(self.max_abs_error, other.max_abs_error)
+        for t in WITHIN_PCT:
+            self.within[t] += other.within[t]
+        self.overpredict += other.overpredict
+        self.underpredict += other.underpredict
+        self.large_errors += other.large_errors
+        self.abs_error_sketch.merge(other.abs_error_sketch)
+        for item in other.worst:
+            self._push_worst(item)
+        self.range_count += other.range_count
+        self.range_sum_actual += other.range_sum_actual
+        self.range_sum_abs += other.range_sum_abs
+        self.range_sum_pct += other.range_sum_pct
+        for mine, theirs in zip(self.range_abs_sketch, other.range_abs_sketch):
+            mine.merge(theirs)
+        for mine, theirs in zip(self.range_pct_sketch, other.range_pct_sketch):
+            mine.merge(theirs)
+        self.cells = merge_cells(self.cells, other.cells)
+        return self
+
+    def metrics(self) -> dict:
+        """Same keys as evaluate.calculate_metrics."""
+        n = self.count
+        metrics = {
+            'rmse': math.sqrt(self.sum_sq_error / n),
+            'mae': self.sum_abs_error / n,
+            'r2': 1 - self.sum_sq_error / self.actuals.m2 if self.actuals.m2 else float('nan'),
+            'mape': self.sum_pct_error / n,
+            'median_ae': self.abs_error_sketch.quantile(0.5),
+            'max_error': self.max_abs_error,
+        }
+        for t in WITHIN_PCT:
+            metrics[f'within_{t}pct'] = self.within[t] / n * 100
+        return metrics
+
+    def price_range_analysis(self) -> pd.DataFrame:
+        """Same frame as evaluate.analyze_by_price_range (empty ranges omitted)."""
+        rows = {}
+        for k, label in enumerate(self.price_labels):
+            count = int(self.range_count[k])
+            if count == 0:
+                continue
+            rows[label] = {
+                'count': count,
+                'avg_price': self.range_sum_actual[k] / count,
+                'mae': self.range_sum_abs[k] / count,
+                'median_ae': self.range_abs_sketch[k].quantile(0.5),
+                'mape': self.range_sum_pct[k] / count,
+                'median_pct_error': self.range_pct_sketch[k].quantile(0.5),
+            }
+        return pd.DataFrame.from_dict(rows, orient='index').round(2)
+
+    def error_analysis(self) -> dict:
+        """Same keys as evaluate.analyze_errors."""
+        n = self.count
+        return {
+            'mean_error': self.errors.mean,
+            'std_error': math.sqrt(self.errors.variance),
+            'skew': self.errors.skew,
+            'overpredict_rate': self.overpredict / n * 100,
+            'underpredict_rate': self.underpredict / n * 100,
+            'large_error_rate': self.large_errors / n * 100,
+            'worst_predictions': [
+                {'actual': actual, 'predicted': predicted, 'pct_error': pct}
+                for pct, actual, predicted in sorted(self.worst, reverse=True)
+            ],
+        }
+
+
+def plan_shards(paths: list, n_shards: int) -> list:
+    """
+    Split input files into about n_shards work units.
+
+    Returns:
+        List of (path, kind, start, stop): byte ranges for CSV, row-group
+        ranges for parquet
+    """
+    paths = [Path(p) for p in paths]
+    per_file = max(1, math.ceil(n_shards / len(paths)))
+    shards = []
+    for path in paths:
+        if path.suffix == '.parquet':
+            import pyarrow.parquet as pq
+            n_groups = pq.ParquetFile(path).num_row_groups
+            bounds = np.linspace(0, n_groups, min(per_file, n_groups) + 1).astype(int)
+            shards += [(str(path), 'parquet', int(a), int(b))
+                       for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+        else:
+            size = path.stat().st_size
+            bounds = np.linspace(0, size, per_file + 1).astype(int)
+            shards += [(str(path), 'csv', int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:])]
+    return shards
+
+
+def iter_shard(shard: tuple, columns: list, chunk_bytes: int = 32 * 2**20):
+    """Yield DataFrame chunks for one shard; each CSV line belongs to the shard where it starts."""
+    path, kind, start, stop = shard
+    if kind == 'parquet':
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(path)
+        for group in range(start, stop):
+            yield parquet.read_row_group(group, columns=columns).to_pandas()
+        return
+
+    read_kwargs = read_processed_kwargs(columns)
+    with open(path, 'rb') as f:
+        header = f.readline()
+        position = max(start, f.tell())
+        if position > f.tell():
+            f.seek(position - 1)
+            # Skip the partial line unless the range starts exactly on a line boundary
+            if f.read(1) != b'\n':
+                f.readline()
+            position = f.tell()
+        while position < stop:
+            block = f.read(min(chunk_bytes, stop - position))
+            if not block:
+                break
+            if not block.endswith(b'\n'):
+                block += f.readline()  # finish the line that straddles the boundary
+            position = f.tell()
+            yield pd.read_csv(io.BytesIO(header + block), **read_kwargs)
+
+
+# Per-process state for shard workers
+_WORKER = {}
+
+
+def _init_worker(model_dir: str, feature_cols: list, target_col: str, segment_cols: list,
+                 price_bins: list, price_labels: list, chunk_bytes: int):
+    _WORKER.update(model=load_segmented_model(model_dir), feature_cols=feature_cols,
+                   target_col=target_col, segment_cols=segment_cols, price_bins=price_bins,
+                   price_labels=price_labels, chunk_bytes=chunk_bytes)
+
+
+def _evaluate_shard(shard: tuple) -> ErrorAccumulator:
+    accumulator = ErrorAccumulator(_WORKER['price_bins'], _WORKER['price_labels'])
+    segment_cols = _WORKER['segment_cols']
+    columns = _WORKER['feature_cols'] + [_WORKER['target_col']] + segment_cols
+    for chunk in iter_shard(shard, columns, _WORKER['chunk_bytes']):
+        y_pred = _WORKER['model'].predict(chunk[_WORKER['feature_cols']])
+        accumulator.update(chunk[_WORKER['target_col']].to_numpy(), y_pred,
+                           chunk[segment_cols] if segment_cols else None)
+    return accumulator
+
+
+def evaluate_streaming(model_dir: str, paths: list, feature_cols: list, target_col: str,
+                       price_bins: list, price_labels: list, segment_cols: list = None,
+                       n_shards: int = None, n_jobs: int = None,
+                       chunk_bytes: int = 32 * 2**20) -> ErrorAccumulator:
+    """
+    Evaluate a model over CSV/parquet files in parallel shards with bounded memory.
+
+    Args:
+        model_dir: Directory containing model.bundle
+        paths: Processed CSV or parquet files with feature and target columns
+        feature_cols, target_col: Column names
+        price_bins, price_labels: Price ranges for the per-range breakdown
+        segment_cols: Segment key columns to accumulate error cube cells for
+        n_shards: Work units (default: 4 per worker)
+        n_jobs: Worker processes (default: all cores)
+        chunk_bytes: CSV bytes parsed per chunk; bounds per-worker memory
+
+    Returns:
+        Merged ErrorAccumulator over all rows
+    """
+    n_jobs = n_jobs or os.cpu_count()
+    shards = plan_shards(paths, n_shards or 4 * n_jobs)
+    initargs = (model_dir, feature_cols, target_col, segment_cols or [], price_bins,
+                price_labels, chunk_bytes)
+
+    total = ErrorAccumulator(price_bins, price_labels)
+    if n_jobs == 1:
+        _init_worker(*initargs)
+        for shard in shards:
+            total.merge(_evaluate_shard(shard))
+        return total
+
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                             initargs=initargs) as pool:
+        for accumulator in pool.map(_evaluate_shard, shards):
+            total.merge(accumulator)
+    return total
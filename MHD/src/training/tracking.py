@@ -0,0 +1,408 @@
+"""
+Buffered Experiment Tracking for the Memphis Housing Pipeline
+
+Training code logs params, metrics and artifacts to a local append-only
+store instead of calling MLflow directly. A background worker uploads the
+store to the tracking server in batches, retrying with backoff, so a slow
+or unreachable tracking URI never stalls training. Whatever is still
+pending when the process exits stays on disk and can be uploaded later:
+
+    python tracking.py --store-dir ../../.tracking
+
+Store layout, one directory per run:
+    <store>/<run_key>/events.jsonl   append-only param/metric/tag/artifact/end events
+    <store>/<run_key>/artifacts/     snapshots of logged artifact directories
+    <store>/<run_key>/state.json     MLflow run id and how far the events are uploaded
+
+A run key is assigned locally when the run starts, so it can be written to
+model metadata and reopened by later steps (evaluate) before the MLflow run
+exists. Each run directory should have one writer at a time.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+
+try:
+    from mlflow.entities import Metric, Param, RunTag
+    from mlflow.tracking import MlflowClient
+    MLFLOW_AVAILABLE = True
+except ImportError:
+    MLFLOW_AVAILABLE = False
+
+DEFAULT_STORE_DIR = Path(__file__).resolve().parents[2] / '.tracking'
+
+# MLflow log_batch limits per request
+MAX_BATCH_METRICS = 1000
+MAX_BATCH_PARAMS = 100
+MAX_BATCH_TAGS = 100
+MAX_BATCH_ENTITIES = 1000
+BATCH_LIMITS = {'params': MAX_BATCH_PARAMS, 'metrics': MAX_BATCH_METRICS, 'tags': MAX_BATCH_TAGS}
+
+
+def resolve_tracking_uri(tracking_uri: str = None) -> str:
+    """
+    Pick the tracking URI the uploader should use.
+
+    An Azure ML URI without credentials would need interactive auth, so it
+    falls back to local MLflow tracking (the buffered events are unaffected).
+    """
+    tracking_uri = tracking_uri or os.environ.get('MLFLOW_TRACKING_URI', '')
+    if tracking_uri.startswith('azureml://') and not os.environ.get('AZURE_CREDENTIALS'):
+        print("Azure ML tracking URI detected but no credentials - using local MLflow")
+        return ''
+    return tracking_uri
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _read_json(path: Path, default: dict) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _write_json_atomic(path: Path, data: dict) -> None:
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class TrackedRun:
+    """
+    Local handle for one run. All logging calls append to events.jsonl and
+    return immediately; nothing here talks to the tracking server.
+    """
+
+    def __init__(self, tracker: 'BackgroundTracker', run_dir: Path):
+        self.tracker = tracker
+        self.run_dir = run_dir
+        self.run_key = run_dir.name
+        self._lock = threading.Lock()
+        self._artifact_seq = len(list((run_dir / 'artifacts').glob('*'))) \
+            if (run_dir / 'artifacts').exists() else 0
+
+    def _append(self, event: dict) -> None:
+        event.setdefault('time', _now_ms())
+        with self._lock, open(self.run_dir / 'events.jsonl', 'a') as f:
+            f.write(json.dumps(event) + '\n')
+        self.tracker.notify()
+
+    def log_params(self, params: dict) -> None:
+        self._append({'type': 'params',
+                      'values': {k: str(v) for k, v in params.items()}})
+
+    def log_param(self, key: str, value) -> None:
+        self.log_params({key: value})
+
+    def log_metrics(self, metrics: dict, step: int = 0) -> None:
+        values = {k: float(v) for k, v in metrics.items() if v is not None}
+        if values:
+            self._append({'type': 'metrics', 'values': values, 'step': step})
+
+    def log_metric(self, key: str, value, step: int = 0) -> None:
+        self.log_metrics({key: value}, step=step)
+
+    def set_tags(self, tags: dict) -> None:
+        self._append({'type': 'tags', 'values': {k: str(v) for k, v in tags.items()}})
+
+    def set_tag(self, key: str, value) -> None:
+        self.set_tags({key: value})
+
+    def log_artifacts(self, local_dir: str, artifact_path: str = None) -> None:
+        """Snapshot local_dir into the store; the upload happens in the background."""
+        with self._lock:
+            snapshot = self.run_dir / 'artifacts' / f'{self._artifact_seq:04d}'
+            self._artifact_seq += 1
+        shutil.copytree(local_dir, snapshot)
+        self._append({'type': 'artifacts',
+                      'path': str(snapshot.relative_to(self.run_dir)),
+                      'artifact_path': artifact_path})
+
+    def end(self, status: str = 'FINISHED') -> None:
+        self._append({'type': 'end', 'status': status})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end('FAILED' if exc_type else 'FINISHED')
+        return False
+
+
+class BackgroundTracker:
+    """
+    Owns a store directory and a daemon thread that uploads this process's
+    runs to MLflow.
+
+    Usage:
+        tracker = BackgroundTracker('memphis-housing')
+        with tracker.start_run() as run:
+            run.log_params(params)
+            run.log_metrics(metrics)
+            run.log_artifacts(output_dir, artifact_path='model')
+        tracker.close(timeout=30)
+    """
+
+    def __init__(self, experiment_name: str = 'memphis-housing', store_dir=None,
+                 tracking_uri: str = None, flush_interval: float = 2.0,
+                 max_backoff: float = 60.0, start_worker: bool = True):
+        self.experiment_name = experiment_name
+        self.store_dir = Path(store_dir or DEFAULT_STORE_DIR)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.tracking_uri = tracking_uri
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+
+        self.runs = []
+        self.last_error = None
+        self._client = None
+        self._experiment_ids = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._worker = None
+        if start_worker and MLFLOW_AVAILABLE:
+            self._worker = threading.Thread(target=self._run_worker, daemon=True,
+                                            name='tracking-uploader')
+            self._worker.start()
+
+    # Training-thread API
+
+    def start_run(self, run_name: str = None, parent: TrackedRun = None,
+                  tags: dict = None) -> TrackedRun:
+        """Create a run locally; the MLflow run is created by the uploader."""
+        run_key = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        run_dir = self.store_dir / run_key
+        run_dir.mkdir(parents=True)
+        _write_json_atomic(run_dir / 'run.json', {
+            'run_key': run_key,
+            'experiment_name': self.experiment_name,
+            'run_name': run_name,
+            'parent_run_key': parent.run_key if parent else None,
+            'tags': tags or {},
+            'start_time': _now_ms(),
+        })
+        run = TrackedRun(self, run_dir)
+        self.runs.append(run)
+        return run
+
+    def resume_run(self, run_key: str) -> TrackedRun:
+        """Reopen a run started by an earlier process to append more events."""
+        run_dir = self.store_dir / run_key
+        if not (run_dir / 'run.json').exists():
+            raise FileNotFoundError(f"No tracked run {run_key} in {self.store_dir}")
+        run = TrackedRun(self, run_dir)
+        self.runs.append(run)
+        return run
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    def close(self, timeout: float = 30.0) -> bool:
+        """
+        Give the uploader up to timeout seconds to drain, then stop it.
+
+        Returns:
+            True if every event was uploaded; otherwise the events stay in
+            the store for a later `python tracking.py` sync
+        """
+        if self._worker is not None:
+            self._stop.set()
+            self._wake.set()
+            self._worker.join(timeout)
+
+        pending = sum(pending_bytes(run.run_dir) for run in self.runs)
+        if pending:
+            reason = f" ({self.last_error})" if self.last_error else ''
+            print(f"Tracking: {pending:,} bytes of events not yet uploaded{reason}; "
+                  f"kept in {self.store_dir}")
+        return pending == 0
+
+    # Uploader
+
+    def _run_worker(self):
+        backoff = self.flush_interval
+        while True:
+            stopping = self._stop.is_set()
+            try:
+                for run in list(self.runs):
+                    self._upload(run.run_dir)
+                self.last_error = None
+                backoff = self.flush_interval
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                backoff = min(backoff * 2, self.max_backoff)
+                if stopping:
+                    return
+            else:
+                if stopping:
+                    return
+            self._wake.wait(backoff)
+            self._wake.clear()
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = MlflowClient(tracking_uri=resolve_tracking_uri(self.tracking_uri))
+        return self._client
+
+    def _experiment_id(self, client, name: str) -> str:
+        if name not in self._experiment_ids:
+            experiment = client.get_experiment_by_name(name)
+            self._experiment_ids[name] = (experiment.experiment_id if experiment
+                                          else client.create_experiment(name))
+        return self._experiment_ids[name]
+
+    def _upload(self, run_dir: Path) -> None:
+        """Upload the events of one run that are past its recorded offset."""
+        client = self._get_client()
+        info = _read_json(run_dir / 'run.json', {})
+        state = _read_json(run_dir / 'state.json', {'run_id': None, 'offset': 0})
+
+        if state['run_id'] is None:
+            tags = dict(info.get('tags') or {})
+            if info.get('run_name'):
+                tags['mlflow.runName'] = info['run_name']
+            tags['tracking.run_key'] = info['run_key']
+            if info.get('parent_run_key'):
+                parent_state = _read_json(self.store_dir / info['parent_run_key'] / 'state.json', {})
+                if not parent_state.get('run_id'):
+                    return  # parent not created yet; retried on the next pass
+                tags['mlflow.parentRunId'] = parent_state['run_id']
+
+            experiment_id = self._experiment_id(client, info.get('experiment_name',
+                                                                 self.experiment_name))
+            run = client.create_run(experiment_id, start_time=info.get('start_time'), tags=tags)
+            state['run_id'] = run.info.run_id
+            _write_json_atomic(run_dir / 'state.json', state)
+
+        events_path = run_dir / 'events.jsonl'
+        if not events_path.exists():
+            return
+        with open(events_path, 'rb') as f:
+            f.seek(state['offset'])
+            data = f.read()
+        # Only complete lines; a partial write is picked up on the next pass
+        data = data[:data.rfind(b'\n') + 1]
+        if not data:
+            return
+
+        # Upload progress is (offset, sent): the byte offset of the next event and
+        # how many of its params/metrics/tags went out already (an event can span
+        # several log_batch calls). It is saved after every call, so a retry
+        # resumes after the last batch that succeeded instead of logging the
+        # earlier ones (and their metric steps) again.
+        batch = {'params': [], 'metrics': [], 'tags': []}
+        offset, sent = state['offset'], state.get('sent', 0)
+        position = (offset, sent)
+
+        def flush_batch():
+            if any(batch.values()):
+                client.log_batch(state['run_id'], metrics=batch['metrics'],
+                                 params=batch['params'], tags=batch['tags'])
+                for entries in batch.values():
+                    entries.clear()
+            state['offset'], state['sent'] = position
+            _write_json_atomic(run_dir / 'state.json', state)
+
+        for line in data.splitlines(keepends=True):
+            event = json.loads(line)
+            kind = event['type']
+            if kind in batch:
+                for i, entity in enumerate(_entities(event)):
+                    if i < sent:
+                        continue
+                    if (len(batch[kind]) == BATCH_LIMITS[kind]
+                            or sum(map(len, batch.values())) == MAX_BATCH_ENTITIES):
+                        flush_batch()
+                    batch[kind].append(entity)
+                    position = (offset, i + 1)
+            else:
+                # Artifacts and run end are ordered after everything before them
+                flush_batch()
+                if kind == 'artifacts':
+                    client.log_artifacts(state['run_id'], str(run_dir / event['path']),
+                                         event.get('artifact_path'))
+                elif kind == 'end':
+                    client.set_terminated(state['run_id'], event['status'], event['time'])
+            offset, sent = offset + len(line), 0
+            position = (offset, 0)
+            if kind not in batch:
+                flush_batch()
+
+        flush_batch()
+
+
+def _entities(event: dict) -> list:
+    """The MLflow params, metrics or tags of one params/metrics/tags event."""
+    values = event['values'].items()
+    if event['type'] == 'params':
+        return [Param(k, v) for k, v in values]
+    if event['type'] == 'metrics':
+        return [Metric(k, v, event['time'], event.get('step', 0)) for k, v in values]
+    return [RunTag(k, v) for k, v in values]
+
+
+def pending_bytes(run_dir: Path) -> int:
+    """Bytes of events in run_dir not yet uploaded."""
+    events_path = Path(run_dir) / 'events.jsonl'
+    if not events_path.exists():
+        return 0
+    state = _read_json(Path(run_dir) / 'state.json', {'offset': 0})
+    return events_path.stat().st_size - state['offset']
+
+
+def sync_store(store_dir=None, tracking_uri: str = None) -> dict:
+    """
+    Upload every run in the store that has pending events.
+
+    Returns:
+        Dictionary of run_key -> 'uploaded' or the error that stopped it
+    """
+    tracker = BackgroundTracker(store_dir=store_dir, tracking_uri=tracking_uri,
+                                start_worker=False)
+    results = {}
+    run_dirs = [p for p in tracker.store_dir.iterdir() if (p / 'run.json').exists()]
+    # Parent runs first, so nested runs can be created under them
+    run_dirs.sort(key=lambda p: (bool(_read_json(p / 'run.json', {}).get('parent_run_key')), p.name))
+    for run_dir in run_dirs:
+        if not pending_bytes(run_dir) and (run_dir / 'state.json').exists():
+            continue
+        try:
+            tracker._upload(run_dir)
+            results[run_dir.name] = 'uploaded' if not pending_bytes(run_dir) else 'pending'
+        except Exception as e:
+            results[run_dir.name] = f"{type(e).__name__}: {e}"
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Upload buffered tracking events to MLflow')
+    parser.add_argument('--store-dir', type=str, default=str(DEFAULT_STORE_DIR),
+                        help='Tracking store directory')
+    parser.add_argument('--tracking-uri', type=str, default=None,
+                        help='MLflow tracking URI (default: MLFLOW_TRACKING_URI)')
+
+    args = parser.parse_args()
+
+    if not MLFLOW_AVAILABLE:
+        print("MLflow not available - nothing uploaded")
+        return
+
+    results = sync_store(args.store_dir, args.tracking_uri)
+    for run_key, status in results.items():
+        print(f"  {run_key}: {status}")
+    print(f"Synced {sum(s == 'uploaded' for s in results.values())}/{len(results)} runs")
+
+
+if __name__ == '__main__':
+    main()
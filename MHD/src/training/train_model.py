@@ -1,7 +1,9 @@
 """
 Model Training for Memphis Housing Price Prediction
 
-Trains an XGBoost model with MLflow tracking.
+Trains an XGBoost model with MLflow tracking. Tracking goes through the
+buffered BackgroundTracker (tracking.py), so a slow or unreachable tracking
+server does not hold up training.
 """
 
 import pandas as pd
@@ -9,31 +11,76 @@ import numpy as np
 from pathlib import Path
 import argparse
 import json
-import joblib
+import shutil
+import tempfile
+import time
 import xgboost as xgb
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+from sklearn.model_selection import train_test_split
 
-# MLflow for experiment tracking
-import os
-try:
-    import mlflow
-    MLFLOW_AVAILABLE = True
-    # Disable Azure ML tracking in CI (no interactive auth)
-    tracking_uri = os.environ.get('MLFLOW_TRACKING_URI', '')
-    if tracking_uri.startswith('azureml://') and not os.environ.get('AZURE_CREDENTIALS'):
-        print("Azure ML tracking URI detected but no credentials - using local MLflow")
-        mlflow.set_tracking_uri('')  # Use local tracking
-except ImportError:
-    MLFLOW_AVAILABLE = False
+from bundle import BUNDLE_FILENAME, feature_spec_from_info, load_bundle, write_bundle
+from comparables import copy_index
+from profiling import NULL_PROFILER, StageProfiler, load_profile_metrics
+from schema import SALE_DAY_COLUMN, MemoryReport, read_processed_csv, read_processed_kwargs
+from tracking import MLFLOW_AVAILABLE, BackgroundTracker
+
+if not MLFLOW_AVAILABLE:
     print("MLflow not available - training will proceed without experiment tracking")
 
 
-def load_training_data(data_dir: str) -> tuple:
-    """Load prepared training data."""
-    data_dir = Path(data_dir)
+# Default XGBoost hyperparameters (sklearn-style names)
+DEFAULT_PARAMS = {
+    'objective': 'reg:squarederror',
+    'max_depth': 6,
+    'learning_rate': 0.1,
+    'n_estimators': 200,
+    'min_child_weight': 3,
+    'subsample': 0.8,
+    'colsample_bytree': 0.8,
+    'reg_alpha': 0.1,
+    'reg_lambda': 1.0,
+    'random_state': 42,
+}
+
+# Prediction-interval quantiles, predicted together by one booster stored in
+# the bundle next to 'main'
+QUANTILES = [0.1, 0.5, 0.9]
+QUANTILE_BOOSTER = 'quantiles'
+# The quantile booster is shallower than the point model and early-stopped
+# on a held-out slice of the training set; a second slice calibrates the
+# interval (conformalized quantile regression)
+QUANTILE_PARAMS = {'max_depth': 4, 'min_child_weight': 20}
+QUANTILE_MAX_ROUNDS = 1000
+QUANTILE_EARLY_STOPPING_ROUNDS = 30
+QUANTILE_HOLDOUT = 0.2
+# Test coverage further than this from the nominal level is not advertised
+INTERVAL_COVERAGE_TOLERANCE = 0.05
 
-    train_df = pd.read_csv(data_dir / 'train.csv')
-    test_df = pd.read_csv(data_dir / 'test.csv')
+# Low-latency tier: fewer, shallower trees on the most important features,
+# selected per request by the serving app
+COMPACT_BOOSTER = 'compact'
+COMPACT_PARAMS = {
+    **DEFAULT_PARAMS,
+    'max_depth': 4,
+    'learning_rate': 0.3,
+    'n_estimators': 50,
+    'colsample_bytree': 1.0,
+}
+COMPACT_FEATURES = 12
+# Gain ranks the redundant location scores first; split counts pick a more
+# complementary set
+COMPACT_IMPORTANCE = 'weight'
+
+
+def load_training_data(data_dir: str, load_train: bool = True) -> tuple:
+    """
+    Load prepared training data.
+
+    With load_train=False only the test split is read (external-memory
+    training streams the training partitions instead), and X_train and
+    y_train are returned as None.
+    """
+    data_dir = Path(data_dir)
 
     with open(data_dir / 'feature_info.json', 'r') as f:
         feature_info = json.load(f)
@@ -41,76 +88,492 @@ def load_training_data(data_dir: str) -> tuple:
     feature_cols = feature_info['feature_columns']
     target_col = feature_info['target_column']
 
-    X_train = train_df[feature_cols]
-    y_train = train_df[target_col]
+    # Row counts let the reader fill preallocated columns instead of doubling up
+    columns = feature_cols + [target_col]
+    test_df = read_processed_csv(data_dir / 'test.csv', columns, feature_info.get('test_size'))
     X_test = test_df[feature_cols]
     y_test = test_df[target_col]
 
-    print(f"Loaded training data: {len(X_train)} train, {len(X_test)} test samples")
+    if load_train:
+        train_df = read_processed_csv(data_dir / 'train.csv', columns,
+                                      feature_info.get('train_size'))
+        X_train = train_df[feature_cols]
+        y_train = train_df[target_col]
+        print(f"Loaded training data: {len(X_train)} train, {len(X_test)} test samples")
+    else:
+        X_train = y_train = None
+        print(f"Loaded test data: {len(X_test)} samples (training data streamed)")
 
     return X_train, X_test, y_train, y_test, feature_cols
 
 
-def train_xgboost(X_train, y_train, X_test, y_test, params: dict = None) -> tuple:
+def load_feature_spec(data_dir: str) -> dict:
+    """Feature columns and encoder vocabularies to ship in the model bundle."""
+    with open(Path(data_dir) / 'feature_info.json', 'r') as f:
+        return feature_spec_from_info(json.load(f))
+
+
+def load_split_metadata(data_dir: str) -> dict:
+    """
+    How prep split the rows and the latest training sale day, stored in the
+    bundle metadata so a later incremental run can tell which rows are new.
+    """
+    with open(Path(data_dir) / 'feature_info.json', 'r') as f:
+        feature_info = json.load(f)
+    return {'split': feature_info.get('split'),
+            'train_watermark': feature_info.get('train_watermark')}
+
+
+def split_mismatch(model_metadata: dict, split: dict) -> str:
+    """
+    Why the current test set may overlap a model's training rows (None if it cannot).
+
+    Only prep's hash split assigns every sale to the same side on every
+    run, so a model's test rows are held out only when both the data and
+    the model (its bundle metadata) use the same hash split.
+    """
+    if not split or split.get('method') != 'hash':
+        return "the data was not split by prep's hash split (prep_data.py --split hash)"
+    if model_metadata.get('split') != split:
+        return f"the model was trained on a different train/test split ({model_metadata.get('split')})"
+    return None
+
+
+def load_train_days(data_dir: str) -> np.ndarray:
+    """Sale day of each train.csv row (in file order, like load_training_data)."""
+    path = Path(data_dir) / 'train.csv'
+    if SALE_DAY_COLUMN not in pd.read_csv(path, nrows=0).columns:
+        raise ValueError(f"{path} has no {SALE_DAY_COLUMN} column; re-run prep_data.py")
+    return pd.read_csv(path, **read_processed_kwargs([SALE_DAY_COLUMN]))[SALE_DAY_COLUMN].to_numpy()
+
+
+class PartitionIter(xgb.DataIter):
+    """Streams columnar (parquet) training partitions into XGBoost one at a time."""
+
+    def __init__(self, paths: list, feature_cols: list, target_col: str, cache_prefix: str):
+        self._paths = paths
+        self._feature_cols = feature_cols
+        self._target_col = target_col
+        self._it = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data) -> bool:
+        if self._it == len(self._paths):
+            return False
+        part = pd.read_parquet(self._paths[self._it],
+                               columns=self._feature_cols + [self._target_col])
+        input_data(data=part[self._feature_cols], label=part[self._target_col])
+        self._it += 1
+        return True
+
+    def reset(self) -> None:
+        self._it = 0
+
+
+def native_params(params: dict, tree_method: str = 'hist', nthread: int = None) -> tuple:
+    """
+    Translate sklearn-style XGBRegressor parameters for xgb.train.
+
+    Returns:
+        Tuple of (booster params, number of boosting rounds)
+    """
+    params = dict(params)
+    num_boost_round = params.pop('n_estimators', 100)
+    if 'random_state' in params:
+        params['seed'] = params.pop('random_state')
+    if 'n_jobs' in params:
+        params['nthread'] = params.pop('n_jobs')
+    params['tree_method'] = tree_method
+    if nthread:
+        params['nthread'] = nthread
+    return params, num_boost_round
+
+
+def regression_metrics(y_true, y_pred) -> dict:
+    """RMSE, MAE, R² and MAPE for one set of predictions."""
+    return {
+        'rmse': float(np.sqrt(mean_squared_error(y_true, y_pred))),
+        'mae': float(mean_absolute_error(y_true, y_pred)),
+        'r2': float(r2_score(y_true, y_pred)),
+        'mape': float(np.mean(np.abs((y_true - y_pred) / y_true)) * 100),
+    }
+
+
+def booster_to_regressor(booster: xgb.Booster, params: dict) -> xgb.XGBRegressor:
+    """Wrap a trained Booster in an XGBRegressor so callers keep the sklearn API."""
+    model = xgb.XGBRegressor(**params)
+    model.load_model(bytearray(booster.save_raw('ubj')))
+    return model
+
+
+def train_xgboost(X_train, y_train, X_test, y_test, params: dict = None,
+                  tree_method: str = 'hist', nthread: int = None, max_bin: int = 256,
+                  partitions: list = None, cache_dir: str = None,
+                  early_stopping_rounds: int = None,
+                  profiler: StageProfiler = None) -> tuple:
     """
     Train XGBoost model.
 
+    With tree_method='hist' the training data is quantized once into a
+    QuantileDMatrix. Passing partitions switches to external memory: the
+    parquet files are streamed through a DataIter and X_train/y_train are
+    ignored, so the training set never has to fit in RAM.
+
     Args:
-        X_train, y_train: Training data
+        X_train, y_train: Training data (unused in external-memory mode)
         X_test, y_test: Test data for early stopping
         params: XGBoost hyperparameters
+        tree_method: 'hist', 'approx' or 'exact'
+        nthread: Number of threads (default: all cores)
+        max_bin: Histogram bins per feature
+        partitions: Parquet training partitions for external-memory mode
+        cache_dir: Parent directory for XGBoost's external-memory page cache
+            (default: the system temp directory)
+        early_stopping_rounds: Stop when the eval RMSE has not improved for
+            this many rounds and keep only the trees up to the best round
+        profiler: Records the quantize, fit and predict stages
 
     Returns:
         Trained model and evaluation metrics
     """
     if params is None:
-        params = {
-            'objective': 'reg:squarederror',
-            'max_depth': 6,
-            'learning_rate': 0.1,
-            'n_estimators': 200,
-            'min_child_weight': 3,
-            'subsample': 0.8,
-            'colsample_bytree': 0.8,
-            'reg_alpha': 0.1,
-            'reg_lambda': 1.0,
-            'random_state': 42,
-        }
+        params = DEFAULT_PARAMS
+    profiler = profiler or NULL_PROFILER
 
     print("\nTraining XGBoost model...")
     print(f"Parameters: {params}")
+    print(f"Tree method: {tree_method}, threads: {nthread or 'all'}, "
+          f"{'external memory' if partitions else 'in memory'}")
 
-    # Create and train model
-    model = xgb.XGBRegressor(**params)
+    booster_params, num_boost_round = native_params(params, tree_method, nthread)
+    booster_params['max_bin'] = max_bin
 
-    model.fit(
-        X_train, y_train,
-        eval_set=[(X_test, y_test)],
-        verbose=50
-    )
+    with profiler.stage('quantize') as stage:
+        if partitions:
+            if tree_method != 'hist':
+                raise ValueError("External-memory training requires tree_method='hist'")
+            cache_tmp = tempfile.mkdtemp(prefix='xgb-extmem-', dir=cache_dir)
+            cache_prefix = str(Path(cache_tmp) / 'cache')
+            data_iter = PartitionIter(partitions, list(X_test.columns), y_test.name, cache_prefix)
+            ext_mem_matrix = getattr(xgb, 'ExtMemQuantileDMatrix', None)
+            if ext_mem_matrix is not None:
+                dtrain = ext_mem_matrix(data_iter, max_bin=max_bin)
+            else:
+                dtrain = xgb.DMatrix(data_iter)
+            dtest = xgb.DMatrix(X_test, y_test)
+        elif tree_method == 'hist':
+            dtrain = xgb.QuantileDMatrix(X_train, y_train, max_bin=max_bin)
+            dtest = xgb.QuantileDMatrix(X_test, y_test, ref=dtrain)
+        else:
+            dtrain = xgb.DMatrix(X_train, y_train)
+            dtest = xgb.DMatrix(X_test, y_test)
+        stage['rows'] = dtrain.num_row()
+
+    n_rows = dtrain.num_row()
+    with profiler.stage('fit') as stage:
+        start = time.perf_counter()
+        booster = xgb.train(
+            booster_params, dtrain,
+            num_boost_round=num_boost_round,
+            evals=[(dtest, 'validation_0')],
+            early_stopping_rounds=early_stopping_rounds,
+            verbose_eval=50
+        )
+        train_time = time.perf_counter() - start
+        stage['rows'] = n_rows
+    if partitions:
+        del dtrain
+        shutil.rmtree(cache_tmp, ignore_errors=True)
+    rounds = booster.num_boosted_rounds()
+    throughput = n_rows * rounds / train_time
+    print(f"Trained {rounds} rounds on {n_rows:,} rows in {train_time:.2f}s "
+          f"({throughput:,.0f} row-rounds/s)")
+
+    if early_stopping_rounds:
+        print(f"Best iteration: {booster.best_iteration}")
+        booster = booster[:booster.best_iteration + 1]
+
+    model = booster_to_regressor(booster, params)
 
     # Predictions
-    y_pred_train = model.predict(X_train)
-    y_pred_test = model.predict(X_test)
+    with profiler.stage('predict') as stage:
+        if partitions:
+            y_train, y_pred_train = [], []
+            for path in partitions:
+                part = pd.read_parquet(path, columns=list(X_test.columns) + [y_test.name])
+                y_train.append(part[y_test.name].to_numpy())
+                y_pred_train.append(model.predict(part[X_test.columns]))
+            y_train, y_pred_train = np.concatenate(y_train), np.concatenate(y_pred_train)
+        else:
+            y_pred_train = model.predict(X_train)
+        y_pred_test = model.predict(X_test)
+        stage['rows'] = len(y_pred_train) + len(y_pred_test)
 
     # Calculate metrics
+    train_metrics = regression_metrics(y_train, y_pred_train)
+    test_metrics = regression_metrics(y_test, y_pred_test)
+    metrics = {}
+    for name in train_metrics:
+        metrics[f'train_{name}'] = train_metrics[name]
+        metrics[f'test_{name}'] = test_metrics[name]
+    metrics['train_rows'] = n_rows
+    metrics['train_time_s'] = train_time
+    metrics['train_rows_rounds_per_s'] = throughput
+
+    return model, metrics
+
+
+def interval_metrics(y_true, quantile_predictions: np.ndarray, quantiles: list,
+                     correction: float = 0.0) -> dict:
+    """
+    Calibration of multi-quantile predictions (one column per quantile).
+
+    Reports the crossing rate of the raw predictions, the fraction of rows
+    at or below each (sorted, uncorrected) quantile, and the coverage and
+    width of the interval between the outer quantiles widened by correction
+    (conformal_correction).
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    crossing = float(np.mean(np.any(np.diff(quantile_predictions, axis=1) < 0, axis=1)))
+    predicted = np.sort(quantile_predictions, axis=1)
+    low, high = corrected_interval(predicted, correction)
+
     metrics = {
-        'train_rmse': np.sqrt(mean_squared_error(y_train, y_pred_train)),
-        'test_rmse': np.sqrt(mean_squared_error(y_test, y_pred_test)),
-        'train_mae': mean_absolute_error(y_train, y_pred_train),
-        'test_mae': mean_absolute_error(y_test, y_pred_test),
-        'train_r2': r2_score(y_train, y_pred_train),
-        'test_r2': r2_score(y_test, y_pred_test),
-        'train_mape': np.mean(np.abs((y_train - y_pred_train) / y_train)) * 100,
-        'test_mape': np.mean(np.abs((y_test - y_pred_test) / y_test)) * 100,
+        'interval_level': quantiles[-1] - quantiles[0],
+        'interval_coverage': float(np.mean((y_true >= low) & (y_true <= high))),
+        'interval_mean_width': float(np.mean(high - low)),
+        'interval_mean_width_pct': float(np.mean((high - low) / y_true) * 100),
+        'quantile_crossing_rate': crossing,
     }
+    for i, q in enumerate(quantiles):
+        metrics[f'quantile_p{round(q * 100):02d}_below_rate'] = float(np.mean(y_true <= predicted[:, i]))
+    return metrics
+
+
+def corrected_interval(predicted: np.ndarray, correction: float) -> tuple:
+    """Outer quantiles of sorted predictions, each moved out by correction (never crossing)."""
+    low = predicted[:, 0] - correction
+    high = predicted[:, -1] + correction
+    return np.minimum(low, high), np.maximum(low, high)
+
+
+def conformal_correction(y_true, quantile_predictions: np.ndarray, level: float) -> float:
+    """
+    Conformalized quantile regression (CQR) correction for the outer quantiles.
+
+    Each calibration row scores max(low - y, y - high): how far the price
+    falls outside the raw interval (negative when inside). Widening both
+    bounds by the ceil((n + 1) * level) / n quantile of the scores gives an
+    interval that covers a new row with probability at least level; a
+    negative correction narrows an interval that is too wide.
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    predicted = np.sort(quantile_predictions, axis=1)
+    scores = np.maximum(predicted[:, 0] - y_true, y_true - predicted[:, -1])
+    n = len(scores)
+    rank = min(1.0, np.ceil((n + 1) * level) / n)
+    return float(np.quantile(scores, rank, method='higher'))
+
+
+def train_quantile_xgboost(X_train, y_train, X_test, y_test, quantiles: list = None,
+                           params: dict = None, nthread: int = None, max_bin: int = 256,
+                           profiler: StageProfiler = None, seed: int = 42) -> tuple:
+    """
+    Train one booster that predicts several quantiles of the price, and calibrate it.
+
+    Uses the reg:quantileerror objective with a vector of quantile_alpha and
+    multi-output trees: each round adds one tree whose leaves hold a value
+    per quantile, so serving gets every quantile from one predict call.
+    The tree parameters start from the point model's, regularized by
+    QUANTILE_PARAMS.
+
+    QUANTILE_HOLDOUT of the training rows is held out and halved: one half
+    early-stops the booster, the other calibrates the interval between the
+    outer quantiles (conformal_correction). Coverage is then measured on
+    the test set; the interval is marked calibrated only if it is within
+    INTERVAL_COVERAGE_TOLERANCE of the nominal level.
+
+    Returns:
+        Tuple of (booster, interval metrics on the test set, interval spec
+        for the bundle: level, correction, coverage and calibrated)
+    """
+    quantiles = sorted(quantiles or QUANTILES)
+    level = round(quantiles[-1] - quantiles[0], 4)
+    profiler = profiler or NULL_PROFILER
+    booster_params, _ = native_params({**(params or DEFAULT_PARAMS), **QUANTILE_PARAMS},
+                                      'hist', nthread)
+    booster_params.update(objective='reg:quantileerror', quantile_alpha=quantiles,
+                          multi_strategy='multi_output_tree', max_bin=max_bin)
+
+    X_fit, X_holdout, y_fit, y_holdout = train_test_split(
+        X_train, y_train, test_size=QUANTILE_HOLDOUT, random_state=seed
+    )
+    X_stop, X_calibrate, y_stop, y_calibrate = train_test_split(
+        X_holdout, y_holdout, test_size=0.5, random_state=seed
+    )
+
+    print(f"\nTraining quantile model {quantiles}...")
+    with profiler.stage('quantiles') as stage:
+        dfit = xgb.QuantileDMatrix(X_fit, y_fit, max_bin=max_bin)
+        dstop = xgb.QuantileDMatrix(X_stop, y_stop, ref=dfit)
+        booster = xgb.train(booster_params, dfit, num_boost_round=QUANTILE_MAX_ROUNDS,
+                            evals=[(dstop, 'stop')],
+                            early_stopping_rounds=QUANTILE_EARLY_STOPPING_ROUNDS,
+                            verbose_eval=False)
+        # Keep only the trees up to the best round, so serving needs no iteration_range
+        booster = booster[:booster.best_iteration + 1]
+        stage['rows'] = dfit.num_row()
+
+    def predict(X):
+        return booster.inplace_predict(np.ascontiguousarray(X, dtype=np.float32)).reshape(len(X), -1)
+
+    correction = conformal_correction(y_calibrate, predict(X_calibrate), level)
+    metrics = interval_metrics(y_test, predict(X_test), quantiles, correction)
+    metrics.update(quantile_rounds=booster.num_boosted_rounds(), interval_correction=correction)
+    coverage = metrics['interval_coverage']
+    calibrated = abs(coverage - level) <= INTERVAL_COVERAGE_TOLERANCE
+    print(f"{level:.0%} interval ({metrics['quantile_rounds']} rounds, conformal correction "
+          f"${correction:,.0f}): test coverage {coverage:.1%}, "
+          f"mean width ${metrics['interval_mean_width']:,.0f}")
+    if not calibrated:
+        print(f"Warning: {level:.0%} interval covers {coverage:.1%} of test rows; "
+              "the bundle will not advertise its level")
+    interval = {'level': level, 'correction': correction, 'coverage': coverage,
+                'calibrated': calibrated}
+    return booster, metrics, interval
+
+
+def add_quantile_booster(X_train, y_train, X_test, y_test, metrics: dict, feature_cols: list,
+                         feature_spec: dict = None, quantiles: list = None,
+                         params: dict = None, train_options: dict = None,
+                         profiler: StageProfiler = None) -> tuple:
+    """
+    Train the quantile booster for a bundle (no-op without quantiles).
+
+    Interval metrics are added to metrics.
+
+    Returns:
+        Tuple of (extra boosters for save_model, feature spec with
+        'quantiles' and 'interval')
+    """
+    train_options = train_options or {}
+    if not quantiles:
+        return {}, feature_spec
+    if train_options.get('partitions'):
+        print("Skipping the quantile model: it needs the training set in memory")
+        return {}, feature_spec
+
+    booster, quantile_metrics, interval = train_quantile_xgboost(
+        X_train, y_train, X_test, y_test, quantiles, params,
+        nthread=train_options.get('nthread'), max_bin=train_options.get('max_bin', 256),
+        profiler=profiler
+    )
+    metrics.update(quantile_metrics)
+    feature_spec = feature_spec or {'feature_columns': feature_cols, 'encoders': {}}
+    return {QUANTILE_BOOSTER: booster}, {**feature_spec, 'quantiles': sorted(quantiles),
+                                         'interval': interval}
 
-    return model, metrics
 
+def train_compact_xgboost(X_train, y_train, X_test, y_test, model, feature_cols: list,
+                          n_features: int = COMPACT_FEATURES, params: dict = None,
+                          nthread: int = None, max_bin: int = 256,
+                          profiler: StageProfiler = None) -> tuple:
+    """
+    Train the compact tier on the full model's top features.
+
+    Features are ranked by get_feature_importance(model, COMPACT_IMPORTANCE);
+    the compact booster (COMPACT_PARAMS by default) sees only the top
+    n_features, so serving slices those columns out of the full feature row.
+
+    Returns:
+        Tuple of (booster, its feature columns, compact_* test metrics)
+    """
+    profiler = profiler or NULL_PROFILER
+    ranked = get_feature_importance(model, feature_cols, COMPACT_IMPORTANCE)
+    columns = ranked['feature'].head(n_features).tolist()
+    columns = [c for c in feature_cols if c in columns]  # keep the full model's order
+    booster_params, num_boost_round = native_params(params or COMPACT_PARAMS, 'hist', nthread)
+    booster_params['max_bin'] = max_bin
+
+    print(f"\nTraining compact model ({num_boost_round} trees, depth "
+          f"{booster_params['max_depth']}, {len(columns)} features)...")
+    with profiler.stage('compact') as stage:
+        dtrain = xgb.QuantileDMatrix(X_train[columns], y_train, max_bin=max_bin)
+        booster = xgb.train(booster_params, dtrain, num_boost_round=num_boost_round)
+        stage['rows'] = dtrain.num_row()
+
+    y_pred = booster.inplace_predict(np.ascontiguousarray(X_test[columns], dtype=np.float32))
+    metrics = {f'compact_test_{k}': v for k, v in regression_metrics(y_test, y_pred).items()}
+    print(f"Compact tier: test RMSE ${metrics['compact_test_rmse']:,.0f}, "
+          f"MAPE {metrics['compact_test_mape']:.2f}%")
+    return booster, columns, metrics
+
+
+def add_compact_booster(X_train, y_train, X_test, y_test, model, metrics: dict,
+                        feature_cols: list, feature_spec: dict = None,
+                        n_features: int = COMPACT_FEATURES, train_options: dict = None,
+                        profiler: StageProfiler = None) -> tuple:
+    """
+    Train the compact tier for a bundle (no-op with n_features=0).
+
+    Compact metrics are added to metrics.
+
+    Returns:
+        Tuple of (extra boosters for save_model, feature spec with 'tiers')
+    """
+    train_options = train_options or {}
+    if not n_features:
+        return {}, feature_spec
+    if train_options.get('partitions'):
+        print("Skipping the compact model: it needs the training set in memory")
+        return {}, feature_spec
+
+    booster, columns, compact = train_compact_xgboost(
+        X_train, y_train, X_test, y_test, model, feature_cols, n_features,
+        nthread=train_options.get('nthread'), max_bin=train_options.get('max_bin', 256),
+        profiler=profiler
+    )
+    metrics.update(compact)
+    feature_spec = feature_spec or {'feature_columns': feature_cols, 'encoders': {}}
+    tiers = {COMPACT_BOOSTER: {'booster': COMPACT_BOOSTER, 'feature_columns': columns}}
+    return {COMPACT_BOOSTER: booster}, {**feature_spec, 'tiers': tiers}
 
-def get_feature_importance(model, feature_cols: list) -> pd.DataFrame:
-    """Extract and format feature importance."""
-    importance = model.feature_importances_
+
+def add_serving_boosters(X_train, y_train, X_test, y_test, model, metrics: dict,
+                         feature_cols: list, feature_spec: dict = None, quantiles: list = None,
+                         compact_features: int = COMPACT_FEATURES, params: dict = None,
+                         train_options: dict = None, profiler: StageProfiler = None) -> tuple:
+    """
+    Train the boosters bundled next to 'main': the quantile (interval) model
+    and the compact tier.
+
+    Returns:
+        Tuple of (extra boosters for save_model, bundle feature spec)
+    """
+    boosters, feature_spec = add_quantile_booster(
+        X_train, y_train, X_test, y_test, metrics, feature_cols, feature_spec,
+        quantiles, params, train_options, profiler
+    )
+    compact, feature_spec = add_compact_booster(
+        X_train, y_train, X_test, y_test, model, metrics, feature_cols, feature_spec,
+        compact_features, train_options, profiler
+    )
+    return {**boosters, **compact}, feature_spec
+
+
+def get_feature_importance(model, feature_cols: list, importance_type: str = None) -> pd.DataFrame:
+    """
+    Extract and format feature importance.
+
+    importance_type picks a booster score ('weight', 'cover', ...) instead
+    of the model's feature_importances_, normalized to sum to 1.
+    """
+    if importance_type:
+        scores = model.get_booster().get_score(importance_type=importance_type)
+        importance = np.array([scores.get(col, 0.0) for col in feature_cols])
+        importance = importance / max(importance.sum(), 1e-12)
+    else:
+        importance = model.feature_importances_
 
     importance_df = pd.DataFrame({
         'feature': feature_cols,
@@ -120,29 +583,36 @@ def get_feature_importance(model, feature_cols: list) -> pd.DataFrame:
     return importance_df
 
 
-def save_model(model, output_dir: str, feature_cols: list, metrics: dict):
-    """Save model and metadata."""
+def save_model(model, output_dir: str, feature_cols: list, metrics: dict,
+               extra_metadata: dict = None, feature_spec: dict = None,
+               extra_boosters: dict = None):
+    """
+    Save the model bundle plus readable metadata and feature importance.
+
+    The bundle (see bundle.py) holds the booster, the feature spec and the
+    metadata; model_metadata.json is a copy of the metadata for reports and
+    CI. extra_metadata is merged into the metadata. Without a feature_spec
+    (load_feature_spec) the bundle carries no encoder vocabularies.
+    extra_boosters (name -> Booster) are stored next to the 'main' model.
+    """
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    # Save model
-    model_path = output_dir / 'model.joblib'
-    joblib.dump(model, model_path)
-    print(f"Model saved to {model_path}")
-
-    # Save as XGBoost native format too
-    xgb_path = output_dir / 'model.xgb'
-    model.save_model(xgb_path)
-    print(f"XGBoost model saved to {xgb_path}")
-
-    # Save metadata
     metadata = {
         'model_type': 'XGBRegressor',
         'feature_columns': feature_cols,
         'metrics': metrics,
         'xgboost_version': xgb.__version__,
+        **(extra_metadata or {}),
     }
 
+    model_path = output_dir / BUNDLE_FILENAME
+    feature_spec = feature_spec or {'feature_columns': feature_cols, 'encoders': {}}
+    boosters = {'main': model.get_booster(), **(extra_boosters or {})}
+    header = write_bundle(model_path, boosters, feature_spec, metadata)
+    metadata['model_version'] = header['model_version']
+    print(f"Model bundle saved to {model_path} (version {header['model_version']})")
+
     with open(output_dir / 'model_metadata.json', 'w') as f:
         json.dump(metadata, f, indent=2)
 
@@ -153,62 +623,282 @@ def save_model(model, output_dir: str, feature_cols: list, metrics: dict):
     return model_path
 
 
+def load_previous_model(model_dir: str) -> tuple:
+    """Load the booster and metadata of a previously saved model bundle."""
+    bundle = load_bundle(Path(model_dir) / BUNDLE_FILENAME)
+    return bundle['boosters']['main'], bundle['metadata']
+
+
+def train_incremental(X_train, y_train, X_test, y_test, previous_dir: str,
+                      params: dict = None, mode: str = 'add-trees', add_rounds: int = 50,
+                      recent_fraction: float = 0.1, tolerance: float = 0.01,
+                      nthread: int = None, max_bin: int = 256, train_days=None,
+                      split: dict = None) -> tuple:
+    """
+    Warm-start from the previous model bundle and compare against a full retrain.
+
+    Modes:
+        add-trees: boost add_rounds more trees on the new rows only (sales
+            after the previous model's train_watermark), or on the
+            recent_fraction of rows with the latest sale days if there are
+            none.
+        refresh: keep the tree structures and recompute leaf values and
+            statistics over the full training set.
+
+    Both need prep's hash split (split, from load_split_metadata), and the
+    same one the previous model was trained on: a random split reshuffles
+    when rows are added, so rows the previous model trained on could land
+    in the test set and flatter its test RMSE.
+
+    The incremental model is accepted if its test RMSE is within tolerance
+    (relative) of a full retrain; otherwise the full retrain is kept.
+
+    Args:
+        train_days: Sale day of each X_train row (load_train_days)
+        split: The current data's split (load_split_metadata)
+
+    Returns:
+        Tuple of (chosen model, its metrics, comparison report)
+    """
+    params = params or DEFAULT_PARAMS
+    previous, previous_metadata = load_previous_model(previous_dir)
+    booster_params, _ = native_params(params, 'hist', nthread)
+    booster_params['max_bin'] = max_bin
+
+    mismatch = split_mismatch(previous_metadata, split)
+    if mismatch:
+        raise ValueError(f"Cannot train incrementally from {previous_dir}: {mismatch}; "
+                         "train from scratch")
+    if train_days is None or len(train_days) != len(X_train):
+        raise ValueError("train_days must give the sale day of every training row")
+
+    watermark = previous_metadata.get('train_watermark')
+    is_new = train_days > watermark if watermark is not None else np.zeros(len(X_train), bool)
+    if is_new.any():
+        new_rows = np.flatnonzero(is_new)
+    else:
+        n_recent = max(1, int(len(X_train) * recent_fraction))
+        new_rows = np.argsort(train_days, kind='stable')[-n_recent:]
+    X_new, y_new = X_train.iloc[new_rows], y_train.iloc[new_rows]
+
+    print(f"\nIncremental training ({mode}) from {previous_dir}: "
+          f"{previous.num_boosted_rounds()} existing trees, {len(X_new):,} "
+          f"{'new' if is_new.any() else 'most recent'} rows")
+
+    start = time.perf_counter()
+    if mode == 'add-trees':
+        booster = xgb.train(
+            booster_params, xgb.QuantileDMatrix(X_new, y_new, max_bin=max_bin),
+            num_boost_round=add_rounds,
+            xgb_model=previous
+        )
+        rows_used = len(X_new)
+    elif mode == 'refresh':
+        refresh_params = {**booster_params, 'process_type': 'update',
+                          'updater': 'refresh', 'refresh_leaf': True}
+        booster = xgb.train(
+            refresh_params, xgb.DMatrix(X_train, y_train),
+            num_boost_round=previous.num_boosted_rounds(),
+            xgb_model=previous
+        )
+        rows_used = len(X_train)
+    else:
+        raise ValueError(f"Unknown incremental mode '{mode}'")
+    incremental_time = time.perf_counter() - start
+
+    incremental_model = booster_to_regressor(booster, params)
+    train_metrics = regression_metrics(y_train, incremental_model.predict(X_train))
+    test_metrics = regression_metrics(y_test, incremental_model.predict(X_test))
+    incremental_metrics = {}
+    for name in train_metrics:
+        incremental_metrics[f'train_{name}'] = train_metrics[name]
+        incremental_metrics[f'test_{name}'] = test_metrics[name]
+    incremental_metrics['train_rows'] = len(X_train)
+    incremental_metrics['train_time_s'] = incremental_time
+    incremental_metrics['train_rows_rounds_per_s'] = (
+        rows_used * max(1, booster.num_boosted_rounds() - previous.num_boosted_rounds())
+        / incremental_time
+    )
+
+    full_model, full_metrics = train_xgboost(X_train, y_train, X_test, y_test, params,
+                                             nthread=nthread, max_bin=max_bin)
+
+    rmse_drift = incremental_metrics['test_rmse'] / full_metrics['test_rmse'] - 1
+    accepted = bool(rmse_drift <= tolerance)
+    report = {
+        'mode': mode,
+        'rows_used': rows_used,
+        'new_rows': int(is_new.sum()),
+        'incremental_time_s': incremental_time,
+        'full_time_s': full_metrics['train_time_s'],
+        'speedup': full_metrics['train_time_s'] / incremental_time,
+        'incremental_test_rmse': incremental_metrics['test_rmse'],
+        'full_test_rmse': full_metrics['test_rmse'],
+        'rmse_drift_pct': rmse_drift * 100,
+        'mape_drift_pct': incremental_metrics['test_mape'] - full_metrics['test_mape'],
+        'accepted': accepted,
+    }
+
+    print(f"Incremental: RMSE ${report['incremental_test_rmse']:,.0f} in {incremental_time:.2f}s")
+    print(f"Full:        RMSE ${report['full_test_rmse']:,.0f} in {report['full_time_s']:.2f}s")
+    print(f"RMSE drift {report['rmse_drift_pct']:+.2f}% "
+          f"(tolerance {tolerance * 100:.2f}%) -> "
+          f"{'accepting incremental model' if accepted else 'keeping full retrain'}")
+
+    if accepted:
+        return incremental_model, incremental_metrics, report
+    return full_model, full_metrics, report
+
+
+def incremental_with_mlflow(X_train, X_test, y_train, y_test, feature_cols: list,
+                            output_dir: str, experiment_name: str = "memphis-housing",
+                            previous_dir: str = None, tracker: BackgroundTracker = None,
+                            feature_spec: dict = None, train_days=None, metadata: dict = None,
+                            **incremental_options) -> tuple:
+    """
+    Run train_incremental, logging the comparison to MLflow, and save the chosen model.
+
+    metadata (load_split_metadata) describes the current data; its split is
+    checked against the previous model's and it is stored in the new bundle.
+    """
+    metadata = metadata or {}
+    previous_dir = previous_dir or output_dir
+    params = DEFAULT_PARAMS
+    owns_tracker = tracker is None and MLFLOW_AVAILABLE
+    if owns_tracker:
+        tracker = BackgroundTracker(experiment_name)
+
+    # The previous quantile and compact boosters are carried over until the next full retrain
+    previous = load_bundle(Path(previous_dir) / BUNDLE_FILENAME)
+    carried = {name: booster for name, booster in previous['boosters'].items()
+               if name in (QUANTILE_BOOSTER, COMPACT_BOOSTER)}
+    spec = feature_spec
+    if carried:
+        spec = {**(feature_spec or {'feature_columns': feature_cols, 'encoders': {}}),
+                **{key: previous['feature_spec'][key] for key in ('quantiles', 'interval', 'tiers')
+                   if key in previous['feature_spec']}}
+
+    def run(extra_metadata=None):
+        model, metrics, report = train_incremental(
+            X_train, y_train, X_test, y_test, previous_dir, params,
+            train_days=train_days, split=metadata.get('split'), **incremental_options
+        )
+        save_model(model, output_dir, feature_cols, metrics,
+                   {'params': params, 'train_rows': metrics['train_rows'],
+                    'incremental': report, **metadata, **(extra_metadata or {})},
+                   feature_spec=spec, extra_boosters=carried)
+        return model, metrics, report
+
+    if tracker:
+        with tracker.start_run('incremental') as tracked:
+            tracked.log_params(params)
+            tracked.log_params({f'incremental_{k}': v for k, v in incremental_options.items()})
+            model, metrics, report = run({'tracking_run_key': tracked.run_key})
+            tracked.log_metrics(metrics)
+            tracked.log_metrics({
+                'incremental_time_s': report['incremental_time_s'],
+                'full_time_s': report['full_time_s'],
+                'incremental_test_rmse': report['incremental_test_rmse'],
+                'full_test_rmse': report['full_test_rmse'],
+                'rmse_drift_pct': report['rmse_drift_pct'],
+                'mape_drift_pct': report['mape_drift_pct'],
+                'incremental_accepted': int(report['accepted']),
+            })
+            tracked.log_artifacts(str(Path(output_dir)), artifact_path="model")
+        if owns_tracker:
+            tracker.close()
+    else:
+        model, metrics, report = run()
+
+    return model, metrics
+
+
 def train_with_mlflow(X_train, X_test, y_train, y_test, feature_cols: list,
-                      output_dir: str, experiment_name: str = "memphis-housing"):
-    """Train model with MLflow tracking."""
-
-    if MLFLOW_AVAILABLE:
-        mlflow.set_experiment(experiment_name)
-
-        with mlflow.start_run():
-            # Define hyperparameters
-            params = {
-                'objective': 'reg:squarederror',
-                'max_depth': 6,
-                'learning_rate': 0.1,
-                'n_estimators': 200,
-                'min_child_weight': 3,
-                'subsample': 0.8,
-                'colsample_bytree': 0.8,
-                'reg_alpha': 0.1,
-                'reg_lambda': 1.0,
-                'random_state': 42,
-            }
+                      output_dir: str, experiment_name: str = "memphis-housing",
+                      train_options: dict = None, profiler: StageProfiler = None,
+                      upstream_metrics: dict = None, tracker: BackgroundTracker = None,
+                      feature_spec: dict = None, quantiles: list = None,
+                      compact_features: int = COMPACT_FEATURES, metadata: dict = None):
+    """
+    Train model with MLflow tracking.
+
+    train_options are passed through to train_xgboost (tree_method,
+    nthread, max_bin, partitions, cache_dir). The profiler's stage metrics,
+    plus any upstream_metrics (e.g. the prep profile), are logged to the run.
+    feature_spec (load_feature_spec) is stored in the model bundle. With
+    quantiles, a quantile booster for prediction intervals is trained and
+    bundled too, and with compact_features the compact latency tier
+    (add_serving_boosters). metadata (e.g. load_split_metadata) is merged
+    into the bundle metadata.
+    Logging only appends to the tracker's local store; if no tracker is
+    given one is created and drained before returning.
+    """
+    train_options = train_options or {}
+    profiler = profiler or NULL_PROFILER
+    owns_tracker = tracker is None and MLFLOW_AVAILABLE
+    if owns_tracker:
+        tracker = BackgroundTracker(experiment_name)
+
+    if tracker:
+        with tracker.start_run() as run:
+            params = DEFAULT_PARAMS
 
             # Log parameters
-            mlflow.log_params(params)
+            run.log_params(params)
+            run.log_params({
+                'tree_method': train_options.get('tree_method', 'hist'),
+                'nthread': train_options.get('nthread') or 'all',
+                'max_bin': train_options.get('max_bin', 256),
+                'external_memory': bool(train_options.get('partitions')),
+                'early_stopping_rounds': train_options.get('early_stopping_rounds'),
+            })
 
             # Train model
-            model, metrics = train_xgboost(X_train, y_train, X_test, y_test, params)
+            model, metrics = train_xgboost(X_train, y_train, X_test, y_test, params,
+                                           profiler=profiler, **train_options)
+            extra_boosters, bundle_spec = add_serving_boosters(
+                X_train, y_train, X_test, y_test, model, metrics, feature_cols, feature_spec,
+                quantiles, compact_features, params, train_options, profiler
+            )
+            run.log_params({'quantiles': quantiles or 'none',
+                            'compact_features': compact_features})
 
             # Log metrics
-            mlflow.log_metrics(metrics)
+            run.log_metrics(metrics)
 
             # Save model locally first
-            model_path = save_model(model, output_dir, feature_cols, metrics)
+            with profiler.stage('save'):
+                model_path = save_model(model, output_dir, feature_cols, metrics,
+                                        {'params': params, 'train_rows': metrics['train_rows'],
+                                         'tracking_run_key': run.run_key, **(metadata or {})},
+                                        feature_spec=bundle_spec, extra_boosters=extra_boosters)
 
             # Log model artifacts (using log_artifacts instead of log_model for Azure ML compatibility)
-            mlflow.log_artifacts(str(Path(output_dir)), artifact_path="model")
+            with profiler.stage('upload'):
+                run.log_artifacts(str(Path(output_dir)), artifact_path="model")
 
-            print(f"\nMLflow run ID: {mlflow.active_run().info.run_id}")
+            run.log_metrics({**(upstream_metrics or {}), **profiler.metrics()})
+
+            print(f"\nTracking run: {run.run_key}")
+
+        if owns_tracker:
+            tracker.close()
 
     else:
         # Train without MLflow
-        params = {
-            'objective': 'reg:squarederror',
-            'max_depth': 6,
-            'learning_rate': 0.1,
-            'n_estimators': 200,
-            'min_child_weight': 3,
-            'subsample': 0.8,
-            'colsample_bytree': 0.8,
-            'reg_alpha': 0.1,
-            'reg_lambda': 1.0,
-            'random_state': 42,
-        }
-
-        model, metrics = train_xgboost(X_train, y_train, X_test, y_test, params)
-        model_path = save_model(model, output_dir, feature_cols, metrics)
+        params = DEFAULT_PARAMS
+
+        model, metrics = train_xgboost(X_train, y_train, X_test, y_test, params,
+                                       profiler=profiler, **train_options)
+        extra_boosters, bundle_spec = add_serving_boosters(
+            X_train, y_train, X_test, y_test, model, metrics, feature_cols, feature_spec,
+            quantiles, compact_features, params, train_options, profiler
+        )
+        with profiler.stage('save'):
+            model_path = save_model(model, output_dir, feature_cols, metrics,
+                                    {'params': params, 'train_rows': metrics['train_rows'],
+                                     **(metadata or {})},
+                                    feature_spec=bundle_spec, extra_boosters=extra_boosters)
 
     return model, metrics
 
@@ -221,18 +911,114 @@ def main():
                         help='Output directory for model')
     parser.add_argument('--experiment-name', type=str, default='memphis-housing',
                         help='MLflow experiment name')
+    parser.add_argument('--tree-method', type=str, default='hist',
+                        choices=['hist', 'approx', 'exact'],
+                        help='XGBoost tree construction algorithm')
+    parser.add_argument('--nthread', type=int, default=None,
+                        help='Training threads (default: all cores)')
+    parser.add_argument('--max-bin', type=int, default=256,
+                        help='Histogram bins per feature')
+    parser.add_argument('--early-stopping-rounds', type=int, default=None,
+                        help='Stop adding trees once the eval RMSE stalls for this many rounds')
+    parser.add_argument('--incremental', type=str, default=None,
+                        choices=['add-trees', 'refresh'],
+                        help='Warm-start from the previous model bundle instead of training from scratch')
+    parser.add_argument('--previous-model-dir', type=str, default=None,
+                        help='Model to warm-start from (default: --output-dir)')
+    parser.add_argument('--add-rounds', type=int, default=50,
+                        help='Trees to add in add-trees mode')
+    parser.add_argument('--recent-fraction', type=float, default=0.1,
+                        help='Fraction of rows with the latest sale dates to train on when '
+                             'no rows are new')
+    parser.add_argument('--accept-tolerance', type=float, default=0.01,
+                        help='Accept the incremental model if its test RMSE is within this '
+                             'relative margin of a full retrain')
+    parser.add_argument('--quantiles', type=float, nargs='*', default=QUANTILES,
+                        help='Quantiles of the prediction-interval model (none: no interval model)')
+    parser.add_argument('--compact-features', type=int, default=COMPACT_FEATURES,
+                        help='Top features used by the compact latency tier (0: no compact tier)')
+    parser.add_argument('--sample-profile', action='store_true',
+                        help='Capture stack samples and write the slowest stage as folded stacks')
+    parser.add_argument('--external-memory', action='store_true',
+                        help='Stream train_parts/*.parquet from the data directory '
+                             'instead of loading train.csv')
+    parser.add_argument('--tracking-store', type=str, default=None,
+                        help='Local store that buffers tracking events (default: MHD/.tracking)')
+    parser.add_argument('--tracking-timeout', type=float, default=30.0,
+                        help='Seconds to wait for buffered tracking uploads before exiting')
 
     args = parser.parse_args()
+    if args.quantiles and (len(args.quantiles) < 2 or not all(0 < q < 1 for q in args.quantiles)):
+        parser.error("--quantiles needs at least two values between 0 and 1")
+    memory = MemoryReport('train')
+    profiler = StageProfiler('train', sample=args.sample_profile)
+    tracker = (BackgroundTracker(args.experiment_name, store_dir=args.tracking_store)
+               if MLFLOW_AVAILABLE else None)
+
+    train_options = {
+        'tree_method': args.tree_method,
+        'nthread': args.nthread,
+        'max_bin': args.max_bin,
+        'early_stopping_rounds': args.early_stopping_rounds,
+    }
+    if args.external_memory:
+        partitions = sorted((Path(args.data_dir) / 'train_parts').glob('*.parquet'))
+        if not partitions:
+            parser.error(f"No partitions in {Path(args.data_dir) / 'train_parts'}; "
+                         "run prep_data.py with --chunksize and --partitions")
+        train_options['partitions'] = [str(p) for p in partitions]
 
     # Load data
-    X_train, X_test, y_train, y_test, feature_cols = load_training_data(args.data_dir)
+    with profiler.stage('load') as stage:
+        X_train, X_test, y_train, y_test, feature_cols = load_training_data(
+            args.data_dir, load_train=not args.external_memory
+        )
+        stage['rows'] = (0 if X_train is None else len(X_train)) + len(X_test)
+    memory.record('load', *[f for f in (X_train, X_test, y_train, y_test) if f is not None])
+
+    feature_spec = load_feature_spec(args.data_dir)
+    split_metadata = load_split_metadata(args.data_dir)
 
     # Train model
-    model, metrics = train_with_mlflow(
-        X_train, X_test, y_train, y_test, feature_cols,
-        output_dir=args.output_dir,
-        experiment_name=args.experiment_name
-    )
+    if args.incremental:
+        if args.external_memory:
+            parser.error("--incremental does not support --external-memory")
+        with profiler.stage('incremental'):
+            model, metrics = incremental_with_mlflow(
+                X_train, X_test, y_train, y_test, feature_cols,
+                output_dir=args.output_dir,
+                experiment_name=args.experiment_name,
+                previous_dir=args.previous_model_dir,
+                tracker=tracker,
+                feature_spec=feature_spec,
+                train_days=load_train_days(args.data_dir),
+                metadata=split_metadata,
+                mode=args.incremental,
+                add_rounds=args.add_rounds,
+                recent_fraction=args.recent_fraction,
+                tolerance=args.accept_tolerance,
+                nthread=args.nthread,
+                max_bin=args.max_bin
+            )
+    else:
+        prep_profile = Path(args.data_dir) / 'profile_prep.json'
+        model, metrics = train_with_mlflow(
+            X_train, X_test, y_train, y_test, feature_cols,
+            output_dir=args.output_dir,
+            experiment_name=args.experiment_name,
+            train_options=train_options,
+            profiler=profiler,
+            upstream_metrics=load_profile_metrics(prep_profile) if prep_profile.exists() else None,
+            tracker=tracker,
+            feature_spec=feature_spec,
+            quantiles=args.quantiles,
+            compact_features=args.compact_features,
+            metadata=split_metadata
+        )
+    memory.record('fit')
+    memory.write(Path(args.output_dir) / 'memory_report.json')
+    # The serving app loads the comparables index from the model directory
+    copy_index(args.data_dir, args.output_dir)
 
     # Print results
     print("\n" + "="*50)
@@ -243,12 +1029,26 @@ def main():
     print(f"  Test MAE:   ${metrics['test_mae']:,.0f}")
     print(f"  Test R²:    {metrics['test_r2']:.4f}")
     print(f"  Test MAPE:  {metrics['test_mape']:.2f}%")
+    print(f"  Throughput: {metrics['train_rows_rounds_per_s']:,.0f} row-rounds/s")
+    if 'interval_coverage' in metrics:
+        print(f"  {metrics['interval_level']:.0%} interval coverage: {metrics['interval_coverage']:.1%} "
+              f"(mean width ${metrics['interval_mean_width']:,.0f})")
+    if 'compact_test_mape' in metrics:
+        print(f"  Compact tier MAPE: {metrics['compact_test_mape']:.2f}% "
+              f"(RMSE ${metrics['compact_test_rmse']:,.0f})")
 
     print(f"\nTop 5 Important Features:")
     importance_df = get_feature_importance(model, feature_cols)
     for _, row in importance_df.head(5).iterrows():
         print(f"  - {row['feature']}: {row['importance']:.4f}")
 
+    memory.print_summary()
+    profiler.write(args.output_dir)
+    profiler.print_summary()
+
+    if tracker:
+        tracker.close(timeout=args.tracking_timeout)
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,355 @@
+"""
+Hyperparameter Tuning for Memphis Housing Price Prediction
+
+Samples configurations from a declared parameter space and races them with
+successive halving: every surviving trial is trained (with early stopping)
+up to the current rung's round budget, and only the best 1/eta advance.
+Trials run in parallel in a process pool, with the core budget split
+between concurrent trials and XGBoost threads per trial. Each trial is
+logged as a nested MLflow run and the winner is refit on the full training
+set and saved as the same bundle train_model.py writes: the main booster
+plus the quantile and compact serving boosters (add_serving_boosters), the
+split metadata and the comparables index.
+"""
+
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import xgboost as xgb
+from sklearn.model_selection import train_test_split
+
+from comparables import copy_index
+from train_model import (
+    COMPACT_FEATURES,
+    DEFAULT_PARAMS,
+    MLFLOW_AVAILABLE,
+    QUANTILES,
+    add_serving_boosters,
+    load_feature_spec,
+    load_split_metadata,
+    load_training_data,
+    native_params,
+    save_model,
+    train_xgboost,
+)
+from tracking import BackgroundTracker, TrackedRun
+
+# Search space: (kind, low, high); 'log' samples uniformly in log space
+PARAM_SPACE = {
+    'max_depth': ('int', 3, 10),
+    'learning_rate': ('log', 0.02, 0.3),
+    'min_child_weight': ('int', 1, 10),
+    'subsample': ('uniform', 0.5, 1.0),
+    'colsample_bytree': ('uniform', 0.5, 1.0),
+    'reg_alpha': ('log', 1e-3, 10.0),
+    'reg_lambda': ('log', 1e-2, 10.0),
+}
+
+# Per-process state, populated by _init_worker
+_worker = {}
+
+
+def sample_params(space: dict, rng: np.random.Generator) -> dict:
+    """Draw one configuration from the parameter space."""
+    params = {}
+    for name, (kind, low, high) in space.items():
+        if kind == 'int':
+            params[name] = int(rng.integers(low, high + 1))
+        elif kind == 'log':
+            params[name] = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+        elif kind == 'uniform':
+            params[name] = float(rng.uniform(low, high))
+        else:
+            raise ValueError(f"Unknown parameter kind '{kind}' for {name}")
+    return params
+
+
+def rung_budgets(min_rounds: int, max_rounds: int, eta: int) -> list:
+    """Round budgets per rung: min_rounds, min_rounds*eta, ... capped at max_rounds."""
+    budgets = []
+    budget = min_rounds
+    while budget < max_rounds:
+        budgets.append(budget)
+        budget *= eta
+    budgets.append(max_rounds)
+    return budgets
+
+
+def _init_worker(data_dir: str, val_fraction: float, seed: int, nthread: int, max_bin: int):
+    """Load the data once per worker and quantize the fit/validation split."""
+    X_train, _, y_train, _, _ = load_training_data(data_dir)
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X_train, y_train, test_size=val_fraction, random_state=seed
+    )
+    dfit = xgb.QuantileDMatrix(X_fit, y_fit, max_bin=max_bin)
+    _worker['dfit'] = dfit
+    _worker['dval'] = xgb.QuantileDMatrix(X_val, y_val, ref=dfit)
+    _worker['nthread'] = nthread
+    _worker['max_bin'] = max_bin
+
+
+def _run_trial(trial_id: int, params: dict, budget: int, booster_raw: bytes,
+               early_stopping_rounds: int) -> dict:
+    """Continue a trial's booster up to budget rounds; runs in a pool worker."""
+    start = time.perf_counter()
+    booster_params, _ = native_params(params, 'hist', _worker['nthread'])
+    booster_params['max_bin'] = _worker['max_bin']
+
+    previous = None
+    done_rounds = 0
+    if booster_raw is not None:
+        previous = xgb.Booster(model_file=bytearray(booster_raw))
+        done_rounds = previous.num_boosted_rounds()
+
+    evals_result = {}
+    booster = xgb.train(
+        booster_params, _worker['dfit'],
+        num_boost_round=budget - done_rounds,
+        evals=[(_worker['dval'], 'val')],
+        early_stopping_rounds=early_stopping_rounds,
+        evals_result=evals_result,
+        xgb_model=previous,
+        verbose_eval=False
+    )
+
+    rounds = booster.num_boosted_rounds()
+    best_iteration = getattr(booster, 'best_iteration', rounds - 1)
+    best_score = float(getattr(booster, 'best_score', evals_result['val']['rmse'][-1]))
+
+    return {
+        'trial_id': trial_id,
+        'rounds': rounds,
+        'best_iteration': best_iteration,
+        'val_rmse': best_score,
+        # Early stopping fired: more rounds will not help this trial
+        'converged': rounds < budget,
+        'booster_raw': bytes(booster.save_raw('ubj')),
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def successive_halving(data_dir: str, n_trials: int = 27, min_rounds: int = 50,
+                       max_rounds: int = 1000, eta: int = 3, early_stopping_rounds: int = 30,
+                       n_jobs: int = None, threads_per_trial: int = 2, val_fraction: float = 0.2,
+                       max_bin: int = 256, seed: int = 42, parent_run: TrackedRun = None) -> list:
+    """
+    Race n_trials sampled configurations with successive halving.
+
+    Args:
+        data_dir: Directory with processed data
+        n_trials: Number of configurations sampled from PARAM_SPACE
+        min_rounds: Round budget of the first rung
+        max_rounds: Round budget of the last rung
+        eta: Keep the best 1/eta of trials at each rung
+        early_stopping_rounds: Early-stopping patience within each rung
+        n_jobs: Total cores to use (default: all)
+        threads_per_trial: XGBoost threads per trial; n_jobs // threads_per_trial
+            trials run concurrently
+        val_fraction: Fraction of the training set held out for scoring trials
+        max_bin: Histogram bins per feature
+        seed: Seed for sampling and the validation split
+        parent_run: Optional tracked run; each trial is logged as a nested run under it
+
+    Returns:
+        List of trial dictionaries, best first
+    """
+    n_jobs = n_jobs or os.cpu_count()
+    n_workers = max(1, n_jobs // threads_per_trial)
+    rng = np.random.default_rng(seed)
+
+    trials = []
+    for trial_id in range(n_trials):
+        params = {**DEFAULT_PARAMS, **sample_params(PARAM_SPACE, rng)}
+        params.pop('n_estimators')
+        trial = {'trial_id': trial_id, 'params': params, 'booster_raw': None,
+                 'val_rmse': float('inf'), 'rounds': 0, 'converged': False,
+                 'status': 'running', 'seconds': 0.0}
+        if parent_run:
+            trial['run'] = parent_run.tracker.start_run(f'trial-{trial_id:03d}', parent=parent_run)
+            trial['run'].log_params(params)
+        trials.append(trial)
+
+    budgets = rung_budgets(min_rounds, max_rounds, eta)
+    print(f"Tuning {n_trials} trials over rungs {budgets} "
+          f"({n_workers} concurrent trials x {threads_per_trial} threads)")
+
+    survivors = trials
+    with ProcessPoolExecutor(
+        max_workers=n_workers,
+        initializer=_init_worker,
+        initargs=(data_dir, val_fraction, seed, threads_per_trial, max_bin)
+    ) as pool:
+        for rung, budget in enumerate(budgets):
+            start = time.perf_counter()
+            pending = [t for t in survivors if not t['converged']]
+            futures = [
+                pool.submit(_run_trial, t['trial_id'], t['params'], budget,
+                            t['booster_raw'], early_stopping_rounds)
+                for t in pending
+            ]
+            for future in futures:
+                result = future.result()
+                trial = trials[result['trial_id']]
+                trial.update({k: result[k] for k in
+                              ('rounds', 'best_iteration', 'val_rmse', 'converged', 'booster_raw')})
+                trial['seconds'] += result['seconds']
+                if parent_run:
+                    trial['run'].log_metric('val_rmse', trial['val_rmse'], step=trial['rounds'])
+
+            survivors = sorted(survivors, key=lambda t: t['val_rmse'])
+            if rung < len(budgets) - 1:
+                keep = max(1, math.ceil(len(survivors) / eta))
+                for trial in survivors[keep:]:
+                    trial['status'] = 'pruned'
+                survivors = survivors[:keep]
+
+            print(f"  Rung {rung} ({budget} rounds): trained {len(pending)}, "
+                  f"best val RMSE ${survivors[0]['val_rmse']:,.0f}, "
+                  f"{len(survivors)} advance ({time.perf_counter() - start:.1f}s)")
+
+    for trial in survivors:
+        trial['status'] = 'completed'
+
+    if parent_run:
+        for trial in trials:
+            run = trial.pop('run')
+            run.log_metric('train_seconds', trial['seconds'])
+            run.set_tag('status', trial['status'])
+            run.end('FINISHED' if trial['status'] == 'completed' else 'KILLED')
+
+    return sorted(trials, key=lambda t: t['val_rmse'])
+
+
+def tune(data_dir: str, output_dir: str, experiment_name: str = "memphis-housing",
+         tracker: BackgroundTracker = None, quantiles: list = None,
+         compact_features: int = COMPACT_FEATURES, tracking_store: str = None,
+         **search_options) -> tuple:
+    """
+    Run the search, refit the best configuration on the full training set and save it.
+
+    The saved bundle matches train_with_mlflow's: with quantiles and
+    compact_features the serving boosters are trained with the best
+    parameters (add_serving_boosters), and the split metadata is stored so
+    incremental training can continue from the tuned model.
+    Trials are tracked as nested runs through tracker (a BackgroundTracker
+    buffering to tracking_store is created and drained here if none is given
+    and MLflow is available).
+    """
+    X_train, X_test, y_train, y_test, feature_cols = load_training_data(data_dir)
+    feature_spec = load_feature_spec(data_dir)
+    split_metadata = load_split_metadata(data_dir)
+    nthread = search_options.get('n_jobs')
+    max_bin = search_options.get('max_bin', 256)
+
+    def refit(best, run_key=None):
+        params = {**best['params'], 'n_estimators': best['best_iteration'] + 1}
+        print(f"\nRefitting best trial {best['trial_id']} with {params['n_estimators']} rounds")
+        model, metrics = train_xgboost(X_train, y_train, X_test, y_test, params,
+                                       nthread=nthread, max_bin=max_bin)
+        extra_boosters, bundle_spec = add_serving_boosters(
+            X_train, y_train, X_test, y_test, model, metrics, feature_cols, feature_spec,
+            quantiles, compact_features, params, {'nthread': nthread, 'max_bin': max_bin}
+        )
+        metadata = {'params': params, 'train_rows': metrics['train_rows'], **split_metadata}
+        if run_key:
+            metadata['tracking_run_key'] = run_key
+        save_model(model, output_dir, feature_cols, metrics, metadata,
+                   feature_spec=bundle_spec, extra_boosters=extra_boosters)
+        copy_index(data_dir, output_dir)
+        return params, metrics
+
+    owns_tracker = tracker is None and MLFLOW_AVAILABLE
+    if owns_tracker:
+        tracker = BackgroundTracker(experiment_name, store_dir=tracking_store)
+
+    if tracker:
+        with tracker.start_run('tuning') as parent:
+            trials = successive_halving(data_dir, parent_run=parent, **search_options)
+            params, metrics = refit(trials[0], parent.run_key)
+
+            parent.log_params(params)
+            parent.log_params({'best_trial': trials[0]['trial_id'],
+                               'quantiles': quantiles or 'none',
+                               'compact_features': compact_features})
+            parent.log_metrics(metrics)
+            parent.log_artifacts(output_dir, artifact_path="model")
+        if owns_tracker:
+            tracker.close()
+    else:
+        trials = successive_halving(data_dir, **search_options)
+        params, metrics = refit(trials[0])
+
+    return trials, params, metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tune Memphis housing price model')
+    parser.add_argument('--data-dir', type=str, default='../../data/processed',
+                        help='Directory with processed data')
+    parser.add_argument('--output-dir', type=str, default='../../models',
+                        help='Output directory for the best model')
+    parser.add_argument('--experiment-name', type=str, default='memphis-housing',
+                        help='MLflow experiment name')
+    parser.add_argument('--n-trials', type=int, default=27,
+                        help='Number of sampled configurations')
+    parser.add_argument('--min-rounds', type=int, default=50,
+                        help='Boosting rounds in the first rung')
+    parser.add_argument('--max-rounds', type=int, default=1000,
+                        help='Boosting rounds in the final rung')
+    parser.add_argument('--eta', type=int, default=3,
+                        help='Keep the best 1/eta trials at each rung')
+    parser.add_argument('--early-stopping-rounds', type=int, default=30,
+                        help='Early-stopping patience within a rung')
+    parser.add_argument('--n-jobs', type=int, default=None,
+                        help='Total cores to use (default: all)')
+    parser.add_argument('--threads-per-trial', type=int, default=2,
+                        help='XGBoost threads per concurrent trial')
+    parser.add_argument('--max-bin', type=int, default=256,
+                        help='Histogram bins per feature')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='Random seed')
+    parser.add_argument('--quantiles', type=float, nargs='*', default=QUANTILES,
+                        help='Quantiles of the prediction-interval model (none: no interval model)')
+    parser.add_argument('--compact-features', type=int, default=COMPACT_FEATURES,
+                        help='Top features used by the compact latency tier (0: no compact tier)')
+    parser.add_argument('--tracking-store', type=str, default=None,
+                        help='Local store that buffers tracking events (default: MHD/.tracking)')
+
+    args = parser.parse_args()
+    if args.quantiles and (len(args.quantiles) < 2 or not all(0 < q < 1 for q in args.quantiles)):
+        parser.error("--quantiles needs at least two values between 0 and 1")
+
+    trials, params, metrics = tune(
+        args.data_dir, args.output_dir, args.experiment_name,
+        quantiles=args.quantiles,
+        compact_features=args.compact_features,
+        tracking_store=args.tracking_store,
+        n_trials=args.n_trials,
+        min_rounds=args.min_rounds,
+        max_rounds=args.max_rounds,
+        eta=args.eta,
+        early_stopping_rounds=args.early_stopping_rounds,
+        n_jobs=args.n_jobs,
+        threads_per_trial=args.threads_per_trial,
+        max_bin=args.max_bin,
+        seed=args.seed,
+    )
+
+    print("\n" + "="*50)
+    print("Tuning Complete")
+    print("="*50)
+    print(f"\nTop 5 trials:")
+    for trial in trials[:5]:
+        print(f"  #{trial['trial_id']:03d} val RMSE ${trial['val_rmse']:,.0f} "
+              f"({trial['rounds']} rounds, {trial['status']})")
+    print(f"\nBest parameters: {params}")
+    print(f"  Test RMSE:  ${metrics['test_rmse']:,.0f}")
+    print(f"  Test MAPE:  {metrics['test_mape']:.2f}%")
+
+
+if __name__ == '__main__':
+    main()
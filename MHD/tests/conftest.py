@@ -0,0 +1,56 @@
+"""
+Shared setup for the MHD tests.
+
+The training scripts import their siblings by module name (they are run
+from src/training), and the serving app and client are imported as
+src.serving / src.client, so both directories go on sys.path.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+MHD_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(MHD_ROOT / 'src' / 'training'))
+sys.path.insert(0, str(MHD_ROOT))
+
+os.environ.setdefault('MLFLOW_DISABLE_AGENT_HINT', '1')
+
+
+@pytest.fixture(scope='session')
+def trained_bundle(tmp_path_factory):
+    """A small bundle (with serving boosters) trained on generated data."""
+    from generate_data import generate_memphis_housing_data
+    from prep_data import prepare_data
+    from train_model import (DEFAULT_PARAMS, add_serving_boosters, load_feature_spec,
+                             load_training_data, save_model, train_xgboost)
+
+    root = tmp_path_factory.mktemp('bundle')
+    raw = root / 'raw.csv'
+    generate_memphis_housing_data(n_samples=2000, seed=7).to_csv(raw, index=False)
+    prepare_data(str(raw), str(root / 'processed'))
+
+    X_train, X_test, y_train, y_test, feature_cols = load_training_data(str(root / 'processed'))
+    params = {**DEFAULT_PARAMS, 'n_estimators': 20}
+    model, metrics = train_xgboost(X_train, y_train, X_test, y_test, params, nthread=1)
+    boosters, feature_spec = add_serving_boosters(
+        X_train, y_train, X_test, y_test, model, metrics, feature_cols,
+        load_feature_spec(str(root / 'processed')), params=params, train_options={'nthread': 1}
+    )
+    save_model(model, str(root / 'model'), feature_cols, metrics,
+               feature_spec=feature_spec, extra_boosters=boosters)
+    return root / 'model' / 'model.bundle'
+
+
+@pytest.fixture(scope='module')
+def model_bundle(trained_bundle):
+    """trained_bundle loaded into the serving app's registry."""
+    from src.serving import app as service
+
+    # In-process clients do not run the app's startup event, so load the model here
+    assert service.load_model(str(trained_bundle))
+    yield trained_bundle
+    service.registry = None
+    service.comparables_index = None
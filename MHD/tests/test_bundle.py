@@ -0,0 +1,48 @@
+"""Model bundle versions."""
+
+import numpy as np
+import pytest
+
+xgb = pytest.importorskip('xgboost')
+
+from bundle import load_bundle, write_bundle  # noqa: E402
+
+SPEC = {'feature_columns': ['sqft', 'beds'], 'encoders': {'neighborhood': ['Downtown', 'Midtown']}}
+METADATA = {'model_type': 'XGBRegressor', 'feature_columns': ['sqft', 'beds'],
+            'metrics': {'test_rmse': 1000.0}}
+
+
+@pytest.fixture(scope='module')
+def booster():
+    X = np.arange(40, dtype=np.float32).reshape(20, 2)
+    return xgb.train({'max_depth': 2}, xgb.DMatrix(X, label=X[:, 0]), num_boost_round=3)
+
+
+def _version(tmp_path, booster, feature_spec=SPEC, metadata=METADATA, name='main'):
+    path = tmp_path / f'{len(list(tmp_path.iterdir()))}.bundle'
+    header = write_bundle(path, {name: booster}, feature_spec, metadata)
+    assert load_bundle(path)['model_version'] == header['model_version']
+    return header['model_version']
+
+
+def test_version_is_stable_for_identical_content(tmp_path, booster):
+    assert _version(tmp_path, booster) == _version(tmp_path, booster)
+
+
+@pytest.mark.parametrize('feature_spec, metadata', [
+    # Same boosters, different encoding
+    ({**SPEC, 'encoders': {'neighborhood': ['Midtown', 'Downtown']}}, METADATA),
+    # Same boosters, different feature order
+    ({**SPEC, 'feature_columns': ['beds', 'sqft']}, METADATA),
+    # Same boosters, different interval calibration
+    ({**SPEC, 'interval': {'level': 0.8, 'correction': 1000.0}}, METADATA),
+    ({**SPEC}, {**METADATA, 'model_type': 'SegmentedModel'}),
+])
+def test_serving_changes_change_the_version(tmp_path, booster, feature_spec, metadata):
+    assert _version(tmp_path, booster, feature_spec, metadata) != _version(tmp_path, booster)
+
+
+def test_metrics_keep_the_version_but_booster_names_do_not(tmp_path, booster):
+    retrained_metrics = {**METADATA, 'metrics': {'test_rmse': 900.0}, 'tracking_run_key': 'run-2'}
+    assert _version(tmp_path, booster, metadata=retrained_metrics) == _version(tmp_path, booster)
+    assert _version(tmp_path, booster, name='compact') != _version(tmp_path, booster)
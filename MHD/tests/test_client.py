@@ -0,0 +1,185 @@
+"""
+PredictionClient against the real serving app: in process through
+httpx.ASGITransport, and over HTTP against uvicorn on an ephemeral port.
+"""
+
+import asyncio
+
+import pytest
+
+httpx = pytest.importorskip('httpx')
+pytest.importorskip('fastapi')
+
+from src.client.client import PredictionAPIError, PredictionClient  # noqa: E402
+from src.serving import app as service  # noqa: E402
+
+PROPERTY = {
+    'sqft': 1800, 'beds': 3, 'baths': 2, 'year_built': 1995, 'lot_size_acres': 0.25,
+    'stories': 2, 'garage_spaces': 2, 'has_pool': False, 'renovated': True,
+    'neighborhood': 'Midtown', 'distance_to_downtown': 3.5, 'crime_index': 0.3,
+    'school_rating': 8, 'property_type': 'Single Family',
+}
+
+
+def _property(i: int) -> dict:
+    return {**PROPERTY, 'sqft': 1000 + 97 * i, 'beds': 2 + i % 3, 'school_rating': 3 + i % 7}
+
+
+class Unavailable:
+    """ASGI wrapper answering the first `failures` requests with `status` and Retry-After."""
+
+    def __init__(self, app, failures: int, status: int = 503):
+        self.app = app
+        self.failures = failures
+        self.status = status
+        self.requests = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        self.requests += 1
+        if self.requests > self.failures:
+            return await self.app(scope, receive, send)
+        await send({'type': 'http.response.start', 'status': self.status,
+                    'headers': [(b'retry-after', b'0'), (b'content-type', b'application/json')]})
+        await send({'type': 'http.response.body', 'body': b'{"detail": "busy"}'})
+
+
+def _client(app=None, **options) -> PredictionClient:
+    return PredictionClient('http://test', transport=httpx.ASGITransport(app=app or service.app),
+                            **options)
+
+
+def test_concurrent_predicts_are_coalesced(model_bundle):
+    properties = [_property(i) for i in range(16)]
+
+    async def run():
+        server = Unavailable(service.app, failures=0)
+        async with _client(server, batch_window_ms=50) as client:
+            coalesced = await asyncio.gather(*(client.predict(p) for p in properties))
+            stats = dict(client.stats)
+        async with _client(batch_window_ms=0) as client:
+            single = [await client.predict(p) for p in properties]
+        return coalesced, single, stats, server.requests
+
+    coalesced, single, stats, served = asyncio.run(run())
+
+    assert stats['calls'] == 16
+    assert stats['requests'] == served == 1
+    assert [r['predicted_price'] for r in coalesced] == [r['predicted_price'] for r in single]
+    assert len({r['predicted_price'] for r in coalesced}) > 1
+
+
+def test_invalid_property_fails_alone(model_bundle):
+    properties = [_property(i) for i in range(5)]
+    properties[2] = {**properties[2], 'sqft': 50}
+
+    async def run():
+        async with _client(batch_window_ms=50) as client:
+            results = await asyncio.gather(*(client.predict(p) for p in properties),
+                                           return_exceptions=True)
+            return results, dict(client.stats)
+
+    results, stats = asyncio.run(run())
+
+    assert isinstance(results[2], PredictionAPIError)
+    assert results[2].status_code == 422
+    assert all(r['predicted_price'] > 0 for i, r in enumerate(results) if i != 2)
+    # The rejected batch, then one /predict per property
+    assert stats['requests'] == 1 + len(properties)
+
+
+@pytest.mark.parametrize('status', [429, 503])
+def test_retries_honor_retry_after(model_bundle, status):
+    async def run():
+        server = Unavailable(service.app, failures=2, status=status)
+        # backoff would wait up to 60s per retry; Retry-After: 0 must win
+        async with _client(server, batch_window_ms=0, backoff=60, max_backoff=60) as client:
+            result = await asyncio.wait_for(client.predict(PROPERTY), timeout=10)
+            return result, dict(client.stats), server.requests
+
+    result, stats, served = asyncio.run(run())
+
+    assert result['predicted_price'] > 0
+    assert stats['retries'] == 2
+    assert stats['requests'] == served == 3
+
+
+def test_retries_exhausted_raise(model_bundle):
+    async def run():
+        server = Unavailable(service.app, failures=10)
+        async with _client(server, batch_window_ms=0, max_retries=1) as client:
+            return await client.predict(PROPERTY)
+
+    with pytest.raises(PredictionAPIError) as error:
+        asyncio.run(run())
+    assert error.value.status_code == 503
+
+
+class ClientPorts:
+    """ASGI wrapper recording the client port (one per TCP connection) of each request."""
+
+    def __init__(self, app):
+        self.app = app
+        self.ports = []
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            self.ports.append(scope['client'][1])
+        return await self.app(scope, receive, send)
+
+
+@pytest.fixture
+def live_server(model_bundle):
+    """The app served by uvicorn on an ephemeral localhost port."""
+    import socket
+    import threading
+    import time
+
+    uvicorn = pytest.importorskip('uvicorn')
+
+    app = ClientPorts(service.app)
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    # The model_bundle fixture loaded the model; startup would look for another one
+    server = uvicorn.Server(uvicorn.Config(app, lifespan='off', log_level='warning'))
+    thread = threading.Thread(target=server.run, kwargs={'sockets': [sock]}, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        assert thread.is_alive() and time.monotonic() < deadline, 'uvicorn did not start'
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{sock.getsockname()[1]}", app
+    server.should_exit = True
+    thread.join(timeout=10)
+    sock.close()
+
+
+def test_predict_frame_over_http(live_server):
+    import numpy as np
+    import pandas as pd
+
+    url, app = live_server
+    frame = pd.DataFrame([_property(i) for i in range(50)],
+                         index=pd.Index(np.arange(50)[::-1] * 10, name='listing'))
+    frame['listing_agent'] = 'not a feature'
+    frame.loc[frame.index[::5], 'garage_spaces'] = np.nan
+
+    async def run():
+        async with PredictionClient(url, max_connections=3) as client:
+            predicted = await client.predict_frame(frame, batch_size=7, concurrency=3)
+            expected = await client.predict_batch(
+                [{k: v for k, v in row.items() if k in PROPERTY and pd.notna(v)}
+                 for row in frame.to_dict('records')])
+            return predicted, expected, dict(client.stats)
+
+    predicted, expected, stats = asyncio.run(run())
+
+    assert list(predicted.columns) == ['predicted_price', 'price_low', 'price_high']
+    assert predicted.index.equals(frame.index)
+    assert predicted['predicted_price'].tolist() == [p['predicted_price'] for p in expected]
+    assert (predicted['price_low'] <= predicted['predicted_price']).all()
+    assert (predicted['predicted_price'] <= predicted['price_high']).all()
+    # 8 chunks of up to 7 rows plus the reference batch, over at most 3 pooled connections
+    assert stats['requests'] == len(app.ports) == 9
+    assert len(set(app.ports)) <= 3
@@ -0,0 +1,64 @@
+"""compare_models only scores test rows held out from every compared model."""
+
+import pandas as pd
+import pytest
+
+from compare_models import IncompatibleModels, compare_models
+from generate_data import generate_memphis_housing_data
+from prep_data import prepare_data
+from train_model import (DEFAULT_PARAMS, load_split_metadata, load_training_data, save_model,
+                         train_xgboost)
+
+
+def _train(data_dir, output_dir, metadata=None):
+    X_train, X_test, y_train, y_test, feature_cols = load_training_data(str(data_dir))
+    model, metrics = train_xgboost(X_train, y_train, X_test, y_test,
+                                   {**DEFAULT_PARAMS, 'n_estimators': 20}, nthread=1)
+    save_model(model, str(output_dir), feature_cols, metrics,
+               load_split_metadata(str(data_dir)) if metadata is None else metadata)
+    return output_dir
+
+
+@pytest.fixture(scope='module')
+def sales(tmp_path_factory):
+    """Current data and a model trained on it, plus an older model on another split."""
+    root = tmp_path_factory.mktemp('compare')
+    raw = generate_memphis_housing_data(n_samples=3000, seed=3)
+    raw.to_csv(root / 'raw.csv', index=False)
+    # The older model saw only the earlier half of the sales, split with another seed
+    cutoff = pd.to_datetime(raw['sale_date']).median()
+    raw[pd.to_datetime(raw['sale_date']) <= cutoff].to_csv(root / 'old.csv', index=False)
+
+    prepare_data(str(root / 'raw.csv'), str(root / 'data'), comparables_per_neighborhood=0)
+    prepare_data(str(root / 'old.csv'), str(root / 'old'), seed=7, comparables_per_neighborhood=0)
+    return {
+        'root': root,
+        'data': root / 'data',
+        'current': _train(root / 'data', root / 'current'),
+        'old': _train(root / 'old', root / 'old_model'),
+    }
+
+
+def test_same_split_scores_every_test_row(sales):
+    report = compare_models(str(sales['current']), [str(sales['current'])], str(sales['data']))
+
+    assert report['held_out'] == {}
+    assert report['test_samples'] == len(pd.read_csv(sales['data'] / 'test.csv'))
+
+
+def test_other_split_scores_only_sales_after_its_watermark(sales):
+    watermark = load_split_metadata(str(sales['root'] / 'old'))['train_watermark']
+    test_days = pd.read_csv(sales['data'] / 'test.csv')['sale_day']
+
+    report = compare_models(str(sales['old']), [str(sales['current'])], str(sales['data']))
+
+    assert set(report['held_out']) == {str(sales['old'])}
+    assert report['test_samples'] == int((test_days > watermark).sum())
+    assert 0 < report['test_samples'] < len(test_days)
+
+
+def test_model_without_watermark_is_refused(sales):
+    legacy = _train(sales['data'], sales['root'] / 'legacy', metadata={})
+
+    with pytest.raises(IncompatibleModels):
+        compare_models(str(legacy), [str(sales['current'])], str(sales['data']))
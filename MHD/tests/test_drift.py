@@ -0,0 +1,51 @@
+"""Drift reports for empty and filled observation windows."""
+
+import numpy as np
+import pytest
+
+from src.serving.drift import DriftMonitor
+
+REFERENCE = {
+    'rows': 1000,
+    'columns': {
+        'sqft': {'kind': 'numeric', 'edges': [1000.0, 2000.0], 'proportions': [0.3, 0.4, 0.3]},
+        'prediction': {'kind': 'numeric', 'edges': [1e5, 2e5], 'proportions': [0.3, 0.4, 0.3]},
+    },
+}
+
+
+@pytest.mark.parametrize('min_observations', [0, 1, 100])
+def test_empty_window_is_insufficient_data(min_observations):
+    monitor = DriftMonitor(REFERENCE, ['sqft'])
+    monitor.update(np.array([[1500.0]]), np.array([1.5e5]))
+    monitor.reset()
+
+    report = monitor.report(min_observations=min_observations)
+
+    assert report['observations'] == 0
+    assert report['features']['sqft'] == {'psi': None, 'status': 'insufficient_data'}
+    assert report['prediction']['status'] == 'insufficient_data'
+    assert report['drifted_features'] == []
+
+
+def test_shifted_traffic_is_significant():
+    monitor = DriftMonitor(REFERENCE, ['sqft'])
+    monitor.update(np.full((200, 1), 2500.0), np.full(200, 1.5e5))
+
+    report = monitor.report(min_observations=0)
+
+    assert report['features']['sqft']['status'] == 'significant'
+    assert report['drifted_features'] == ['sqft']
+
+
+def test_drift_endpoint_before_any_traffic(model_bundle):
+    from fastapi.testclient import TestClient
+
+    from src.serving import app as service
+
+    response = TestClient(service.app).get('/drift', params={'min_observations': 0})
+
+    assert response.status_code == 200
+    report = response.json()
+    assert report['observations'] == 0
+    assert {r['status'] for r in report['features'].values()} == {'insufficient_data'}
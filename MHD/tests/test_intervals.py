@@ -0,0 +1,44 @@
+"""Conformal calibration of the quantile interval model."""
+
+import numpy as np
+import pytest
+
+xgb = pytest.importorskip('xgboost')
+
+from train_model import conformal_correction, corrected_interval, train_quantile_xgboost  # noqa: E402
+
+
+def test_conformal_correction_restores_coverage():
+    rng = np.random.default_rng(0)
+    y = rng.normal(100.0, 10.0, size=4000)
+    # Raw interval far too narrow: +-1 around the true mean covers ~8%
+    predicted = np.column_stack([np.full_like(y, 99.0), np.full_like(y, 101.0)])
+
+    correction = conformal_correction(y[:2000], predicted[:2000], 0.8)
+    low, high = corrected_interval(predicted[2000:], correction)
+
+    assert correction > 0
+    assert np.mean((y[2000:] >= low) & (y[2000:] <= high)) == pytest.approx(0.8, abs=0.03)
+
+
+def test_negative_correction_never_crosses():
+    predicted = np.array([[90.0, 110.0], [99.0, 101.0]])
+    low, high = corrected_interval(predicted, -5.0)
+    assert np.all(low <= high)
+
+
+def test_quantile_model_is_calibrated_on_test_rows():
+    rng = np.random.default_rng(1)
+    X = rng.uniform(0, 1, size=(6000, 4)).astype(np.float32)
+    y = 1e5 * (1 + X[:, 0] + 0.5 * X[:, 1]) * rng.lognormal(0, 0.1, size=len(X))
+    X_train, X_test, y_train, y_test = X[:5000], X[5000:], y[:5000], y[5000:]
+
+    booster, metrics, interval = train_quantile_xgboost(
+        X_train, y_train, X_test, y_test, [0.1, 0.5, 0.9], nthread=1
+    )
+
+    assert interval['level'] == 0.8
+    assert interval['coverage'] == metrics['interval_coverage']
+    assert abs(interval['coverage'] - 0.8) <= 0.05
+    assert interval['calibrated']
+    assert booster.num_boosted_rounds() == metrics['quantile_rounds']
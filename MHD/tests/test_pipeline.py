@@ -0,0 +1,32 @@
+"""Stage definitions of the cached pipeline runner."""
+
+from argparse import Namespace
+
+import pytest
+
+from pipeline import build_stages, option_value
+
+
+def _args(tmp_path, prep_args=''):
+    return Namespace(data_root=str(tmp_path / 'data'), model_dir=str(tmp_path / 'models'),
+                     reports_dir=str(tmp_path / 'reports'), n_samples=100, seed=42,
+                     test_size=0.2, chunksize=None, prep_args=prep_args, train_args='',
+                     evaluate_args='')
+
+
+@pytest.mark.parametrize('prep_args, indexed', [
+    ('', True),
+    ('--comparables-per-neighborhood 500', True),
+    ('--comparables-per-neighborhood 0', False),
+    ('--comparables-per-neighborhood=0', False),
+])
+def test_comparables_index_is_a_prep_output_only_when_built(tmp_path, prep_args, indexed):
+    stages = build_stages(_args(tmp_path, prep_args))
+    names = [path.name for path in stages['prep']['outputs']]
+    assert ('comparables.index' in names) is indexed
+    assert stages['train']['inputs'] == stages['prep']['outputs']
+
+
+def test_option_value_takes_the_last_occurrence():
+    assert option_value(['--a', '1', '--a=2'], '--a') == '2'
+    assert option_value(['--ab', '1'], '--a') is None
@@ -0,0 +1,92 @@
+"""Buffered tracking store uploaded to a local file-based MLflow tracking store."""
+
+import pytest
+
+mlflow = pytest.importorskip('mlflow')
+
+from mlflow.tracking import MlflowClient  # noqa: E402
+
+from tracking import BackgroundTracker, pending_bytes, sync_store  # noqa: E402
+
+
+@pytest.fixture
+def tracking_uri(tmp_path, monkeypatch):
+    """A local file-based tracking store under tmp_path."""
+    # MLflow 3 keeps the file store in maintenance mode behind this opt-in
+    monkeypatch.setenv('MLFLOW_ALLOW_FILE_STORE', 'true')
+    return (tmp_path / 'mlruns').as_uri()
+
+
+def _runs(tracking_uri, experiment_name='memphis-housing'):
+    client = MlflowClient(tracking_uri=tracking_uri)
+    experiment = client.get_experiment_by_name(experiment_name)
+    return client, client.search_runs([experiment.experiment_id]) if experiment else []
+
+
+def test_sync_store_uploads_every_run(tmp_path, tracking_uri):
+    artifacts = tmp_path / 'model'
+    artifacts.mkdir()
+    (artifacts / 'model_metadata.json').write_text('{}')
+
+    tracker = BackgroundTracker(store_dir=tmp_path / 'store', start_worker=False)
+    for seed in range(3):
+        with tracker.start_run(f'run-{seed}') as run:
+            run.log_params({'seed': seed, 'max_depth': 6})
+            run.log_metrics({'test_rmse': 1000.0 + seed})
+            run.log_artifacts(str(artifacts), artifact_path='model')
+
+    results = sync_store(tmp_path / 'store', tracking_uri)
+
+    assert sorted(results.values()) == ['uploaded'] * 3
+    assert all(pending_bytes(run.run_dir) == 0 for run in tracker.runs)
+    client, runs = _runs(tracking_uri)
+    assert len(runs) == 3
+    assert {r.data.params['seed'] for r in runs} == {'0', '1', '2'}
+    assert all(r.info.status == 'FINISHED' for r in runs)
+    assert all(client.list_artifacts(r.info.run_id, 'model') for r in runs)
+
+    # Nothing pending: a second sync uploads nothing and creates no runs
+    assert sync_store(tmp_path / 'store', tracking_uri) == {}
+    assert len(_runs(tracking_uri)[1]) == 3
+
+
+class FlakyClient:
+    """MlflowClient proxy whose nth log_batch call fails once."""
+
+    def __init__(self, client, fail_on: int):
+        self._client = client
+        self.fail_on = fail_on
+        self.calls = 0
+
+    def log_batch(self, *args, **kwargs):
+        self.calls += 1
+        if self.calls == self.fail_on:
+            raise ConnectionError('tracking server went away')
+        return self._client.log_batch(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def test_retry_after_partial_failure_logs_each_step_once(tmp_path, tracking_uri):
+    tracker = BackgroundTracker(store_dir=tmp_path / 'store', tracking_uri=tracking_uri,
+                                start_worker=False)
+    with tracker.start_run('curve') as run:
+        for step in range(3):
+            # 1,500 metrics per event: each event spans two log_batch calls
+            run.log_metrics({f'rmse_{i}': float(i + step) for i in range(1500)}, step=step)
+
+    flaky = FlakyClient(MlflowClient(tracking_uri=tracking_uri), fail_on=4)
+    tracker._client = flaky
+    with pytest.raises(ConnectionError):
+        tracker._upload(run.run_dir)
+    assert pending_bytes(run.run_dir) > 0
+
+    tracker._upload(run.run_dir)
+
+    assert pending_bytes(run.run_dir) == 0
+    client, runs = _runs(tracking_uri)
+    assert len(runs) == 1
+    for key in ('rmse_0', 'rmse_777', 'rmse_1499'):
+        history = client.get_metric_history(runs[0].info.run_id, key)
+        assert sorted(m.step for m in history) == [0, 1, 2]